@@ -0,0 +1,130 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Headless Batch Rendering
+#
+# This script renders every chart of the visual scripts to
+# image files without opening any window (matplotlib "Agg"
+# backend), so the full chart set can be regenerated from cron
+# or CI. Data for each script is loaded once in the main
+# process; the charts are then drawn in parallel worker
+# processes and the time taken by each chart is reported.
+#
+# Usage:
+#   python batch_render.py --out-dir charts --format svg --workers 4
+# ============================================================
+
+import os
+
+# must be set before pyplot is imported here or in a worker
+os.environ["MPLBACKEND"] = "Agg"
+
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib.pyplot as plt
+
+from instrumentation import stage
+from query_filters import add_filter_arguments, filters_from_args
+
+
+# Scripts whose CHARTS are rendered
+VISUAL_MODULES = [
+    "batting_bowling_visuals",
+    "match_analysis_visuals",
+    "team_toss_impact_visuals",
+    "final_insights_dashboard",
+]
+
+
+# ------------------------------------------------------------
+# Import the chart scripts once per worker process, so the
+# chart timings below do not include the imports
+# ------------------------------------------------------------
+def import_modules(module_names):
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
+# ------------------------------------------------------------
+# Render one chart to a file (runs in a worker process)
+# ------------------------------------------------------------
+def render_chart(module_name, chart_name, frame, out_dir, fmt, dpi):
+    module = importlib.import_module(module_name)
+    plot = {name: function for name, function, _ in module.CHARTS}[chart_name]
+
+    start = time.perf_counter()
+    plot(frame)
+    path = os.path.join(out_dir, f"{module_name}-{chart_name}.{fmt}")
+    with stage("savefig", category="render", chart=chart_name, format=fmt):
+        plt.savefig(path, format=fmt, dpi=dpi)
+    plt.close("all")
+
+    return module_name, chart_name, path, time.perf_counter() - start
+
+
+# ------------------------------------------------------------
+# Load data for every script, then render all charts
+# ------------------------------------------------------------
+def render_all(out_dir="charts", fmt="png", workers=None, modules=None, dpi=100, filters=None):
+    os.makedirs(out_dir, exist_ok=True)
+    modules = modules or VISUAL_MODULES
+    timings = []
+
+    start = time.perf_counter()
+    jobs = []
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        load = getattr(module, "load_chart_data", module.load_data)
+
+        load_start = time.perf_counter()
+        data = load(**(filters or {}))
+        timings.append((module_name, "(load data)", None, time.perf_counter() - load_start))
+
+        for chart_name, _, key in module.CHARTS:
+            jobs.append((module_name, chart_name, data[key]))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=import_modules, initargs=(modules,)) as executor:
+        futures = [
+            executor.submit(render_chart, module_name, chart_name, frame, out_dir, fmt, dpi)
+            for module_name, chart_name, frame in jobs
+        ]
+        for future in as_completed(futures):
+            timings.append(future.result())
+
+    total = time.perf_counter() - start
+    return timings, total
+
+
+def print_report(timings, total):
+    print(f"\n{'script':<28} {'chart':<26} {'seconds':>8}  file")
+    for module_name, chart_name, path, seconds in timings:
+        print(f"{module_name:<28} {chart_name:<26} {seconds:>8.2f}  {path or ''}")
+
+    charts = sum(1 for _, _, path, _ in timings if path)
+    print(f"\n{charts} charts rendered in {total:.2f} s")
+
+
+# ------------------------------------------------------------
+# Command line entry point
+# ------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Render all IPL charts to files.")
+    parser.add_argument("--out-dir", default="charts", help="output folder (default: charts)")
+    parser.add_argument("--format", default="png", choices=["png", "svg", "pdf"], help="image format")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--dpi", type=int, default=100, help="resolution for raster formats")
+    parser.add_argument("--modules", nargs="+", choices=VISUAL_MODULES, help="only these scripts")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    timings, total = render_all(
+        args.out_dir, args.format, args.workers, args.modules, args.dpi, filters_from_args(args)
+    )
+    print_report(timings, total)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,17 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sqlalchemy import text
-from database_connection import engine
+
+import local_backend
+from instrumentation import traced
+from ipl_schema import plain_labels
+from local_backend import BACKEND
+from query_executor import fetch_all
+from query_filters import describe, filter_queries, parse_filters
 
 sns.set_style("whitegrid")
 plt.rcParams["figure.figsize"] = (12,6)
 
-print("Loading batting & bowling data from SQL Server...")
-
 
 # ============================================================
 # 1. TOP RUN SCORERS
@@ -27,18 +31,17 @@ FROM dbo.ball_by_ball_data
 GROUP BY batter
 ORDER BY total_runs DESC
 """)
+
+@traced(category="plot")
+def plot_top_runs(top_runs):
+    plt.figure()
+    sns.barplot(data=top_runs, x="total_runs", y="player_name",
+                hue="player_name", legend=False, palette="viridis")
 
-top_runs = pd.read_sql(top_runs_query, engine)
-
-plt.figure()
-sns.barplot(data=top_runs, x="total_runs", y="player_name",
-            hue="player_name", legend=False, palette="viridis")
-
-plt.title("Top 10 Run Scorers")
-plt.xlabel("Runs")
-plt.ylabel("Player")
-plt.tight_layout()
-plt.show()
+    plt.title("Top 10 Run Scorers")
+    plt.xlabel("Runs")
+    plt.ylabel("Player")
+    plt.tight_layout()
 
 
 
@@ -55,18 +58,17 @@ GROUP BY batter
 HAVING COUNT(*) >= 500
 ORDER BY strike_rate DESC
 """)
+
+@traced(category="plot")
+def plot_strike_rate(strike_rate):
+    plt.figure()
+    sns.barplot(data=strike_rate, x="strike_rate", y="player_name",
+                hue="player_name", legend=False, palette="magma")
 
-strike_rate = pd.read_sql(strike_rate_query, engine)
-
-plt.figure()
-sns.barplot(data=strike_rate, x="strike_rate", y="player_name",
-            hue="player_name", legend=False, palette="magma")
-
-plt.title("Best Strike Rate (Min 500 Balls)")
-plt.xlabel("Strike Rate")
-plt.ylabel("Player")
-plt.tight_layout()
-plt.show()
+    plt.title("Best Strike Rate (Min 500 Balls)")
+    plt.xlabel("Strike Rate")
+    plt.ylabel("Player")
+    plt.tight_layout()
 
 
 
@@ -83,18 +85,17 @@ WHERE is_wicket = 1
 GROUP BY bowler
 ORDER BY wickets DESC
 """)
+
+@traced(category="plot")
+def plot_top_wickets(top_wickets):
+    plt.figure()
+    sns.barplot(data=top_wickets, x="wickets", y="player_name",
+                hue="player_name", legend=False, palette="coolwarm")
 
-top_wickets = pd.read_sql(wickets_query, engine)
-
-plt.figure()
-sns.barplot(data=top_wickets, x="wickets", y="player_name",
-            hue="player_name", legend=False, palette="coolwarm")
-
-plt.title("Top 10 Wicket Takers")
-plt.xlabel("Wickets")
-plt.ylabel("Bowler")
-plt.tight_layout()
-plt.show()
+    plt.title("Top 10 Wicket Takers")
+    plt.xlabel("Wickets")
+    plt.ylabel("Bowler")
+    plt.tight_layout()
 
 
 
@@ -111,18 +112,17 @@ GROUP BY bowler
 HAVING COUNT(*) >= 300
 ORDER BY economy ASC
 """)
+
+@traced(category="plot")
+def plot_economy(economy):
+    plt.figure()
+    sns.barplot(data=economy, x="economy", y="player_name",
+                hue="player_name", legend=False, palette="cubehelix")
 
-economy = pd.read_sql(economy_query, engine)
-
-plt.figure()
-sns.barplot(data=economy, x="economy", y="player_name",
-            hue="player_name", legend=False, palette="cubehelix")
-
-plt.title("Best Economy Rate (Min 300 Balls)")
-plt.xlabel("Economy")
-plt.ylabel("Bowler")
-plt.tight_layout()
-plt.show()
+    plt.title("Best Economy Rate (Min 300 Balls)")
+    plt.xlabel("Economy")
+    plt.ylabel("Bowler")
+    plt.tight_layout()
 
 
 
@@ -138,18 +138,17 @@ FROM dbo.ipl_matches_data
 GROUP BY player_of_match
 ORDER BY awards DESC
 """)
+
+@traced(category="plot")
+def plot_pom(pom):
+    plt.figure()
+    sns.barplot(data=pom, x="awards", y="player_name",
+                hue="player_name", legend=False, palette="Set2")
 
-pom = pd.read_sql(pom_query, engine)
-
-plt.figure()
-sns.barplot(data=pom, x="awards", y="player_name",
-            hue="player_name", legend=False, palette="Set2")
-
-plt.title("Most Player of the Match Awards")
-plt.xlabel("Awards")
-plt.ylabel("Player")
-plt.tight_layout()
-plt.show()
+    plt.title("Most Player of the Match Awards")
+    plt.xlabel("Awards")
+    plt.ylabel("Player")
+    plt.tight_layout()
 
 
 
@@ -165,18 +164,100 @@ FROM dbo.ball_by_ball_data
 GROUP BY team_batting
 ORDER BY total_runs DESC
 """)
+
+@traced(category="plot")
+def plot_team_runs(team_runs):
+    plt.figure()
+    sns.barplot(data=team_runs, x="total_runs", y="team_name",
+                hue="team_name", legend=False, palette="flare")
+
+    plt.title("Top Teams by Total Runs")
+    plt.xlabel("Runs")
+    plt.ylabel("Team")
+    plt.tight_layout()
+
+
+
+# ============================================================
+# LOAD DATA (all queries fetched concurrently)
+# ============================================================
+
+QUERIES = {
+    "top_runs": top_runs_query,
+    "strike_rate": strike_rate_query,
+    "top_wickets": wickets_query,
+    "economy": economy_query,
+    "pom": pom_query,
+    "team_runs": team_runs_query,
+}
+
+
+# Same results computed from the local CSV files (IPL_BACKEND=csv)
+def load_local_data(**filters):
+    return chart_data(local_backend.deliveries(**filters), local_backend.matches(**filters))
+
+
+# chart tables from typed deliveries and matches (also used by
+# dashboard_server.py on its in-memory tables)
+def chart_data(balls, matches):
+    by_batter = balls.groupby("batter", observed=True)["batter_runs"]
+    by_bowler = balls.groupby("bowler", observed=True)["total_runs"]
+
+    strike_rate = (by_batter.sum() / by_batter.size() * 100)[by_batter.size() >= 500]
+    economy = (by_bowler.sum() / (by_bowler.size() / 6.0))[by_bowler.size() >= 300]
+
+    data = {
+        "top_runs": by_batter.sum().nlargest(10)
+            .rename_axis("player_name").reset_index(name="total_runs"),
+        "strike_rate": strike_rate.nlargest(10)
+            .rename_axis("player_name").reset_index(name="strike_rate"),
+        "top_wickets": balls.loc[balls["is_wicket"], "bowler"].value_counts().head(10)
+            .rename_axis("player_name").reset_index(name="wickets"),
+        "economy": economy.nsmallest(10)
+            .rename_axis("player_name").reset_index(name="economy"),
+        "pom": matches["player_of_match"].value_counts().head(10)
+            .rename_axis("player_name").reset_index(name="awards"),
+        "team_runs": balls.groupby("team_batting", observed=True)["total_runs"].sum().nlargest(10)
+            .rename_axis("team_name").reset_index(name="total_runs"),
+    }
+    return {name: plain_labels(df) for name, df in data.items()}
+
+
+# filters: season, team, venue, innings (see query_filters.py)
+def load_data(**filters):
+    if BACKEND == "csv":
+        print(f"Loading batting & bowling data from local CSV files ({describe(filters)})...")
+        return load_local_data(**filters)
+
+    print(f"Loading batting & bowling data from SQL Server ({describe(filters)})...")
+    queries, params = filter_queries(QUERIES, filters)
+    return fetch_all(queries, params=params)
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+# (chart name, plot function, data key)
+CHARTS = [
+    ("top_run_scorers", plot_top_runs, "top_runs"),
+    ("best_strike_rate", plot_strike_rate, "strike_rate"),
+    ("top_wicket_takers", plot_top_wickets, "top_wickets"),
+    ("best_economy", plot_economy, "economy"),
+    ("player_of_match_awards", plot_pom, "pom"),
+    ("team_total_runs", plot_team_runs, "team_runs"),
+]
+
 
-team_runs = pd.read_sql(team_runs_query, engine)
+def main(**filters):
+    data = load_data(**filters)
 
-plt.figure()
-sns.barplot(data=team_runs, x="total_runs", y="team_name",
-            hue="team_name", legend=False, palette="flare")
+    for _, plot, key in CHARTS:
+        plot(data[key])
+        plt.show()
 
-plt.title("Top Teams by Total Runs")
-plt.xlabel("Runs")
-plt.ylabel("Team")
-plt.tight_layout()
-plt.show()
+    print("\nBatting & Bowling visualizations generated successfully.")
 
 
-print("\nBatting & Bowling visualizations generated successfully.")
+if __name__ == "__main__":
+    main(**parse_filters("Batting & bowling charts"))
@@ -0,0 +1,100 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Benchmark: Match Outcome Features
+#
+# Compares the old row-wise DataFrame.apply classification of
+# match_result / toss_result with the vectorized version in
+# match_features.py on a synthetic match table.
+#
+# Usage:
+#   python bench_match_features.py --rows 1000000
+# ============================================================
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from match_features import add_match_outcomes
+
+
+TEAMS = [
+    "Chennai Super Kings", "Mumbai Indians", "Kolkata Knight Riders",
+    "Royal Challengers Bangalore", "Sunrisers Hyderabad", "Rajasthan Royals",
+    "Delhi Capitals", "Punjab Kings", "Lucknow Super Giants", "Gujarat Titans",
+]
+
+
+# ------------------------------------------------------------
+# Synthetic matches (about 45% defended, 50% chased, 5% no result)
+# ------------------------------------------------------------
+def synthetic_matches(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    outcome = rng.choice(3, size=rows, p=[0.45, 0.50, 0.05])
+
+    win_by_runs = np.where(outcome == 0, rng.integers(1, 120, size=rows), 0)
+    win_by_wickets = np.where(outcome == 1, rng.integers(1, 11, size=rows), 0)
+
+    toss_winner = rng.choice(TEAMS, size=rows)
+    match_winner = np.where(rng.random(rows) < 0.5, toss_winner, rng.choice(TEAMS, size=rows))
+    match_winner = np.where(outcome == 2, None, match_winner)
+
+    return pd.DataFrame({
+        "win_by_runs": win_by_runs,
+        "win_by_wickets": win_by_wickets,
+        "toss_winner": toss_winner,
+        "match_winner": match_winner,
+    })
+
+
+# ------------------------------------------------------------
+# Old row-wise version (as previously in match_analysis_visuals.py)
+# ------------------------------------------------------------
+def add_match_outcomes_apply(matches_df):
+    matches_df["match_result"] = matches_df.apply(
+        lambda x: "Defending Team Won" if x.win_by_runs > 0
+        else ("Chasing Team Won" if x.win_by_wickets > 0 else "No Result"),
+        axis=1
+    )
+    matches_df["toss_result"] = matches_df.apply(
+        lambda x: "Toss Winner Won" if x.toss_winner == x.match_winner else "Toss Winner Lost",
+        axis=1
+    )
+    return matches_df
+
+
+def time_it(function, df):
+    start = time.perf_counter()
+    result = function(df.copy())
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark match outcome classification.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="number of synthetic matches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    matches_df = synthetic_matches(args.rows, args.seed)
+    print(f"Synthetic matches: {len(matches_df):,}")
+
+    vectorized, vectorized_seconds = time_it(add_match_outcomes, matches_df)
+    row_wise, row_wise_seconds = time_it(add_match_outcomes_apply, matches_df)
+
+    for column in ["match_result", "toss_result"]:
+        same = (vectorized[column].astype(str) == row_wise[column]).all()
+        print(f"{column} identical: {same}")
+
+    print(f"\nDataFrame.apply : {row_wise_seconds:8.3f} s")
+    print(f"np.select       : {vectorized_seconds:8.3f} s")
+    print(f"Speedup         : {row_wise_seconds / vectorized_seconds:8.1f}x")
+
+    row_wise_mb = row_wise[["match_result", "toss_result"]].memory_usage(deep=True).sum() / 1e6
+    vectorized_mb = vectorized[["match_result", "toss_result"]].memory_usage(deep=True).sum() / 1e6
+    print(f"Output memory   : {row_wise_mb:.1f} MB (object) vs {vectorized_mb:.1f} MB (categorical)")
+
+
+if __name__ == "__main__":
+    main()
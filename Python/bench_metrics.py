@@ -0,0 +1,289 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Benchmark Suite: Metrics and Dashboard Charts
+#
+# This script times every metric of load_sql_results.py and
+# every plot function of final_insights_dashboard.py on
+# synthetic data 10x / 100x / 1000x the size of the bundled
+# CSV files, and writes a JSON report that can be compared
+# with the report of another commit.
+#
+# Synthetic data: the bundled CSVs are repeated N times with
+# shifted match_ids, so every copy is a new set of matches with
+# realistic values.
+#
+# Each (backend, scale) runs in its own process, so backend
+# settings are read fresh and peak memory is per run:
+#   - seconds: best and median of --repeats runs
+#   - peak_mb: tracemalloc peak of one extra run
+#
+# Loading the source tables is timed on its own ("load" rows);
+# metrics are timed on the loaded tables, so "metric" rows are
+# compute only and compare across backends.
+#
+# The sql backend times the data already in SQL Server (scale
+# "server"); it is skipped if no connection can be made.
+#
+# Usage:
+#   python bench_metrics.py --scales 10 100 --backends csv sql
+#   python bench_metrics.py --compare old.json new.json
+# ============================================================
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+# ----- Benchmark Details -----
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_DATA_DIR = os.path.join(HERE, "..", ".cache", "bench_data")
+RESULTS_DIR = os.path.join(HERE, "..", "bench_results")
+
+DEFAULT_SCALES = [10, 100, 1000]
+DEFAULT_REPEATS = 3
+
+# tables repeated with new match_ids / copied unchanged
+SCALED_TABLES = ["ball_by_ball_data", "ipl_matches_data"]
+
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+
+def synthetic_data_dir(scale):
+    import local_backend
+
+    data_dir = os.path.join(BENCH_DATA_DIR, f"x{scale}")
+    marker = os.path.join(data_dir, "complete.json")
+
+    # one match_id offset for every scaled table, so copied
+    # deliveries still point at their copied match
+    step = 1 + max(
+        int(pd.read_csv(os.path.join(local_backend.DATA_DIR, local_backend.TABLE_FILES[name][0]),
+                        usecols=["match_id"], encoding=local_backend.TABLE_FILES[name][1])["match_id"].max())
+        for name in SCALED_TABLES
+    )
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f).get("match_id_step") == step:
+                return data_dir
+
+    os.makedirs(data_dir, exist_ok=True)
+    for name, (file_name, encoding) in local_backend.TABLE_FILES.items():
+        source = os.path.join(local_backend.DATA_DIR, file_name)
+        target = os.path.join(data_dir, file_name)
+
+        # read as text, so the copies keep the exact CSV format
+        df = pd.read_csv(source, dtype=str, keep_default_na=False, encoding=encoding)
+        if name not in SCALED_TABLES:
+            df.to_csv(target, index=False, encoding=encoding)
+            continue
+
+        match_ids = df["match_id"].astype("int64")
+        for copy in range(scale):
+            df["match_id"] = (match_ids + copy * step).astype(str)
+            df.to_csv(target, index=False, encoding=encoding, mode="w" if copy == 0 else "a", header=copy == 0)
+
+    with open(marker, "w") as f:
+        json.dump({"scale": scale, "match_id_step": step}, f)
+    return data_dir
+
+
+# ============================================================
+# TIMING (runs inside the worker process)
+# ============================================================
+
+def measure(function, repeats, setup=None):
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds_min": round(min(times), 6),
+        "seconds_median": round(statistics.median(times), 6),
+        "repeats": repeats,
+        "peak_mb": round(peak / 1e6, 3),
+    }
+
+
+def run_benchmarks(repeats):
+    import matplotlib.pyplot as plt
+
+    import final_insights_dashboard
+    import load_sql_results
+    import local_backend
+
+    results = []
+
+    def record(kind, name, function, setup=None):
+        result = measure(function, repeats, setup)
+        results.append({"kind": kind, "name": name, **result})
+        print(f"  {kind:<7} {name:<25} {result['seconds_min']:9.4f} s  {result['peak_mb']:9.1f} MB", flush=True)
+
+    # ----- loading the source tables -----
+    def reset_sources():
+        load_sql_results._sources.clear()
+        local_backend.load_table.cache_clear()
+        local_backend.load_filtered_table.cache_clear()
+
+    for table_name in SCALED_TABLES:
+        record("load", table_name, lambda: load_sql_results.load_source(table_name), reset_sources)
+
+    load_sql_results.load_source("ball_by_ball_data")
+    load_sql_results.load_source("ipl_matches_data")
+    rows = {
+        "deliveries": len(load_sql_results.load_source("ball_by_ball_data")),
+        "matches": len(load_sql_results.load_source("ipl_matches_data")),
+    }
+
+    # ----- every metric (its group is recomputed each time, from
+    # the source tables loaded above) -----
+    def reset_metrics():
+        load_sql_results.clear_metrics(sources=False)
+
+    for name in load_sql_results.METRICS:
+        record("metric", name, lambda: load_sql_results.get_metric(name), reset_metrics)
+
+    # ----- dashboard data and plot functions -----
+    record("load", "dashboard_chart_data", final_insights_dashboard.load_chart_data)
+    data = final_insights_dashboard.load_chart_data()
+
+    for chart_name, plot, key in final_insights_dashboard.CHARTS:
+        def draw():
+            plot(data[key].copy())
+            plt.gcf().canvas.draw()
+            plt.close("all")
+        record("plot", chart_name, draw)
+
+    return rows, results
+
+
+def worker_main(args):
+    rows, results = run_benchmarks(args.repeats)
+    with open(args.worker_out, "w") as f:
+        json.dump({"rows": rows, "results": results}, f)
+
+
+# ============================================================
+# DRIVER (one worker process per backend and scale)
+# ============================================================
+
+def sql_available():
+    try:
+        from sqlalchemy import text
+        from database_connection import get_engine
+
+        # create_engine() does not connect; run a query so a missing
+        # server is caught here and not inside the timed worker
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as error:
+        print(f"Skipping sql backend: {error}")
+        return False
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_worker(backend, scale, repeats):
+    env = dict(os.environ, IPL_BACKEND=backend, MPLBACKEND="Agg", IPL_CACHE="off")
+    if backend == "csv":
+        data_dir = synthetic_data_dir(scale)
+        env["IPL_DATA_DIR"] = data_dir
+        env["IPL_COLUMNAR_DIR"] = os.path.join(data_dir, "columnar")
+
+    out_path = os.path.join(BENCH_DATA_DIR, f"worker_{backend}_{scale}.json")
+    subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker-out", out_path, "--repeats", str(repeats)],
+        cwd=HERE, env=env, check=True,
+    )
+    with open(out_path) as f:
+        return json.load(f)
+
+
+def compare(old_path, new_path):
+    frames = []
+    for label, path in [("old", old_path), ("new", new_path)]:
+        with open(path) as f:
+            report = json.load(f)
+        df = pd.DataFrame(report["results"]).set_index(["backend", "scale", "kind", "name"])
+        frames.append(df[["seconds_min", "peak_mb"]].add_prefix(f"{label}_"))
+        print(f"{label}: {path} (commit {report['commit']})")
+
+    table = pd.concat(frames, axis=1, join="inner")
+    table["time_ratio"] = (table["new_seconds_min"] / table["old_seconds_min"]).round(2)
+    table["memory_ratio"] = (table["new_peak_mb"] / table["old_peak_mb"]).round(2)
+    print(table.to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics and dashboard charts.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--backends", nargs="+", default=["csv"], choices=["csv", "sql"])
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--out", help="report path (default bench_results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two reports")
+    parser.add_argument("--worker-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_out:
+        return worker_main(args)
+    if args.compare:
+        return compare(*args.compare)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "results": [],
+    }
+
+    runs = [("csv", scale) for scale in args.scales] if "csv" in args.backends else []
+    if "sql" in args.backends and sql_available():
+        runs.append(("sql", "server"))
+
+    for backend, scale in runs:
+        print(f"\n{backend} backend, scale {scale}:", flush=True)
+        worker = run_worker(backend, scale, args.repeats)
+        for result in worker["results"]:
+            report["results"].append({"backend": backend, "scale": scale, **worker["rows"], **result})
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {out}")
+
+
+if __name__ == "__main__":
+    main()
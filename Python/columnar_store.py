@@ -0,0 +1,305 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Memory-Mapped Columnar Store for Deliveries
+#
+# This script converts ball_by_ball_data.csv once into a folder
+# of NumPy files, one per column:
+#   - numbers and flags  -> fixed-width arrays (int8, bool, ...)
+#   - player / team / style columns -> integer codes plus a
+#     dictionary of labels (columns in one shared group, e.g.
+#     batter / bowler / non_striker, use one dictionary); the
+#     codes are saved in the width pandas uses for that many
+#     labels (int8 / int16 / ...)
+#
+# Later runs open the arrays with np.load(mmap_mode="c"): no
+# parsing, and pages are read from disk only when used. frame()
+# wraps the memory-mapped arrays without copying them, so worker
+# processes opening the same files share those pages through
+# the OS page cache. The mapping is copy-on-write: a page that
+# a caller writes to becomes a private copy and the files never
+# change. A frame of selected rows holds its own copy of them.
+#
+# manifest.json records the size and modification time of the
+# source CSV; if the CSV changes, the store is rebuilt. Each
+# source path gets its own store folder, and a rebuild holds a
+# lock file, so worker processes that find the store stale at
+# the same time build it once.
+#
+# Usage:
+#   python columnar_store.py            # build if stale, time open,
+#                                       # check frame() is zero-copy
+#   python columnar_store.py --rebuild
+# ============================================================
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from ipl_schema import DELIVERY_SHARED_CATEGORIES, read_deliveries_csv
+
+
+# ----- Store Details -----
+STORE_DIR = os.environ.get(
+    "IPL_COLUMNAR_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "columnar"),
+)
+ENABLED = os.environ.get("IPL_COLUMNAR", "on").strip().lower() != "off"
+
+FORMAT_VERSION = 3  # 2: blank fields are read as missing, 3: codes in pandas' width
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# one store folder per source file (IPL_DATA_DIR can change)
+def store_dir_for(source_path, table_name="ball_by_ball_data"):
+    digest = hashlib.sha256(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(STORE_DIR, f"{table_name}-{digest}")
+
+
+# exclusive lock on <path> across processes (held while open)
+@contextmanager
+def _file_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after 10 s, keep waiting
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _dictionary_name(column, shared_categories):
+    for group in shared_categories:
+        if column in group:
+            return group[0]
+    return column
+
+
+# ============================================================
+# BUILD (one-time conversion)
+# ============================================================
+
+def build_store(df, store_dir, source_path=None, shared_categories=()):
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(store_dir) + ".tmp-", dir=parent)
+    try:
+        _write_store(df, tmp_dir, source_path, shared_categories)
+
+        # swap in the finished folder, readers never see half a store
+        shutil.rmtree(store_dir, ignore_errors=True)
+        os.replace(tmp_dir, store_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_store(df, tmp_dir, source_path, shared_categories):
+    columns = {}
+    dictionaries = {}
+
+    for column in df.columns:
+        values = df[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            name = _dictionary_name(column, shared_categories)
+            dictionaries.setdefault(name, values.cat.categories.astype(str).tolist())
+            # codes in the width pandas picks for the dictionary, so
+            # Categorical.from_codes() can use the mapped file as is
+            labels = dictionaries[name]
+            codes_dtype = pd.Categorical([], categories=labels).codes.dtype
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values.cat.codes.to_numpy().astype(codes_dtype))
+            columns[column] = {"kind": "category", "dictionary": name}
+
+        elif isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            # nullable integers: values (missing as 0) and a mask
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values.fillna(0).to_numpy(values.dtype.numpy_dtype))
+            np.save(os.path.join(tmp_dir, f"{column}.mask.npy"), values.isna().to_numpy())
+            columns[column] = {"kind": "nullable", "dtype": str(values.dtype)}
+
+        else:
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values.to_numpy())
+            columns[column] = {"kind": "array", "dtype": str(values.dtype)}
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "rows": len(df),
+        "source": _source_stamp(source_path) if source_path else None,
+        "columns": columns,
+        "dictionaries": dictionaries,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+# ============================================================
+# OPEN (zero-copy)
+# ============================================================
+
+class ColumnarStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+
+        self.columns = list(self.manifest["columns"])
+        self._arrays = {}
+        self._dtypes = {
+            name: pd.CategoricalDtype(labels)
+            for name, labels in self.manifest["dictionaries"].items()
+        }
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    # raw memory-mapped array (codes for category columns)
+    def array(self, column):
+        if column not in self._arrays:
+            self._arrays[column] = np.load(os.path.join(self.store_dir, f"{column}.npy"), mmap_mode="c")
+        return self._arrays[column]
+
+    def dictionary(self, column):
+        return self._dtypes[self.manifest["columns"][column]["dictionary"]].categories
+
+    # rows: optional positions to read (predicate pruning)
+    def column(self, column, rows=None):
+        info = self.manifest["columns"][column]
+        values = self.array(column)
+        if rows is not None:
+            values = values[rows]
+
+        if info["kind"] == "category":
+            dtype = self._dtypes[info["dictionary"]]
+            return pd.Series(pd.Categorical.from_codes(values, dtype=dtype), name=column, copy=False)
+        if info["kind"] == "nullable":
+            mask = np.load(os.path.join(self.store_dir, f"{column}.mask.npy"), mmap_mode="c")
+            if rows is not None:
+                mask = mask[rows]
+            return pd.Series(pd.arrays.IntegerArray(values, mask), name=column, copy=False)
+        return pd.Series(values, name=column, copy=False)
+
+    def frame(self, columns=None, rows=None):
+        columns = columns or self.columns
+        return pd.DataFrame({column: self.column(column, rows) for column in columns}, copy=False)
+
+
+# ------------------------------------------------------------
+# Columns of a frame whose data is not a memory-mapped file
+# (codes for category columns, values for nullable ones)
+# ------------------------------------------------------------
+def _is_mapped(values):
+    while values is not None:
+        if isinstance(values, mmap.mmap):
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+
+def copied_columns(df):
+    copied = []
+    for column in df.columns:
+        values = df[column].array
+        if isinstance(values, pd.Categorical):
+            values = values.codes
+        elif isinstance(values, pd.arrays.IntegerArray):
+            values = values._data
+        else:
+            values = np.asarray(values)
+        if not _is_mapped(values):
+            copied.append(column)
+    return copied
+
+
+def is_stale(store_dir, source_path):
+    manifest_path = os.path.join(store_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return True
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return manifest.get("version") != FORMAT_VERSION or manifest.get("source") != _source_stamp(source_path)
+
+
+# ------------------------------------------------------------
+# Open the store for a deliveries CSV, rebuilding when stale
+# ------------------------------------------------------------
+def open_deliveries(source_path, store_dir=None, encoding="utf-8", rebuild=False):
+    store_dir = store_dir or store_dir_for(source_path)
+
+    if rebuild or is_stale(store_dir, source_path):
+        with _file_lock(store_dir + ".lock"):
+            # another process may have built it while we waited
+            if rebuild or is_stale(store_dir, source_path):
+                df = read_deliveries_csv(source_path, encoding=encoding)
+                build_store(df, store_dir, source_path, DELIVERY_SHARED_CATEGORIES)
+
+    return ColumnarStore(store_dir)
+
+
+# same signature as ipl_schema.read_deliveries_csv (used by local_backend)
+def read_deliveries(path, encoding="utf-8", usecols=None):
+    if not ENABLED:
+        return read_deliveries_csv(path, encoding=encoding, usecols=usecols)
+    return open_deliveries(path, encoding=encoding).frame(usecols)
+
+
+# ------------------------------------------------------------
+# Build and time a cold open when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from local_backend import DATA_DIR, TABLE_FILES
+
+    file_name, encoding = TABLE_FILES["ball_by_ball_data"]
+    path = os.path.join(DATA_DIR, file_name)
+
+    start = time.perf_counter()
+    open_deliveries(path, encoding=encoding, rebuild="--rebuild" in sys.argv)
+    print(f"Store ready in {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    csv_frame = read_deliveries_csv(path, encoding=encoding)
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = open_deliveries(path, encoding=encoding)
+    open_seconds = time.perf_counter() - start
+    store_frame = store.frame()
+    frame_seconds = time.perf_counter() - start
+
+    print(f"Parse CSV          : {csv_seconds * 1000:8.1f} ms")
+    print(f"Open store (mmap)  : {open_seconds * 1000:8.1f} ms")
+    print(f"Open + full frame  : {frame_seconds * 1000:8.1f} ms")
+    print(f"Identical to CSV   : {store_frame.equals(csv_frame)}")
+
+    copied = copied_columns(store_frame)
+    print(f"Zero-copy columns  : {len(store_frame.columns) - len(copied)} of {len(store_frame.columns)}"
+          + (f" (copied: {copied})" if copied else ""))
+    if copied or not store_frame.equals(csv_frame):
+        sys.exit(1)
@@ -0,0 +1,512 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Dashboard Server
+#
+# This script serves the charts of final_insights_dashboard.py,
+# batting_bowling_visuals.py and team_toss_impact_visuals.py
+# on a local web page (standard library http.server), as JSON
+# tables and SVG images, filtered by season and / or team:
+#
+#   /                                      page with filters
+#   /api/charts                            charts, seasons, teams
+#   /api/dashboard.json?season=&team=      every chart table
+#   /api/chart/<script>/<chart>.json?...   one chart table
+#   /api/chart/<script>/<chart>.svg?...    one chart image
+#   POST /api/refresh                      reload the data
+#
+# The deliveries and matches are read once from the active
+# backend into an in-process aggregate cache. The cache is
+# warmed at startup with the chart tables of every season,
+# every team and every (season, team) pair that was played, so
+# a filter change is a dictionary lookup, with no database
+# round-trip. Other filters (venue, innings) are computed from
+# the in-memory tables on first use, starting from the season
+# slice when a season is given. SVG images of the unfiltered
+# view, each season and each team are drawn by a background
+# thread after startup; other images are drawn on first
+# request. Views and encoded responses are kept in LRU caches
+# (MAX_CACHED_VIEWS / MAX_CACHED_RESPONSES), large enough for
+# every warmed filter. /api/refresh reloads the tables (and
+# clears query_cache.py on the SQL backend) and drops every
+# cached result.
+#
+# Usage:
+#   python dashboard_server.py --port 8050
+# ============================================================
+
+import os
+
+# charts are drawn to SVG, no window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import batting_bowling_visuals
+import final_insights_dashboard
+import local_backend
+import team_toss_impact_visuals
+from ipl_schema import compact_categories, plain_labels
+from local_backend import BACKEND, SHARED_CATEGORIES
+from query_filters import DELIVERIES_TABLE, FILTER_NAMES, MATCHES_TABLE, filter_mask, filters_key, make_filters
+
+
+# ----- Server Details -----
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8050
+
+# 1 + seasons + teams + (season, team) pairs are warmed (~190)
+MAX_CACHED_VIEWS = 512
+MAX_CACHED_RESPONSES = 4096
+
+DELIVERY_COLUMNS = [
+    "season_id", "match_id", "innings", "team_batting", "team_bowling", "batter", "bowler",
+    "batter_runs", "total_runs", "is_wicket",
+]
+MATCH_COLUMNS = [
+    "season_id", "match_id", "venue", "team1", "team2", "toss_winner", "toss_decision", "match_winner",
+    "win_by_runs", "win_by_wickets", "player_of_match",
+]
+
+CHART_MODULES = {
+    "final_insights_dashboard": final_insights_dashboard,
+    "batting_bowling_visuals": batting_bowling_visuals,
+    "team_toss_impact_visuals": team_toss_impact_visuals,
+}
+
+
+# ------------------------------------------------------------
+# Chart tables of one script from (filtered) typed tables
+# ------------------------------------------------------------
+def script_chart_data(script, balls, matches):
+    if script == "final_insights_dashboard":
+        return final_insights_dashboard.chart_data(
+            matches,
+            final_insights_dashboard.avg_runs_by_team(balls),
+            final_insights_dashboard.wickets_by_team(balls),
+        )
+    if script == "batting_bowling_visuals":
+        return batting_bowling_visuals.chart_data(balls, matches)
+    return team_toss_impact_visuals.chart_data(matches)
+
+
+def _frame(data):
+    if isinstance(data, pd.Series):
+        data = data.rename(data.name or "value").reset_index()
+    return plain_labels(data)
+
+
+# a chart with no rows, or only zero counts (pie charts of
+# all-zero wedges cannot be drawn)
+def _has_data(frame):
+    return bool(frame.select_dtypes("number").fillna(0).to_numpy().any())
+
+
+def _no_data_figure(title):
+    plt.figure(figsize=(6, 4))
+    plt.text(0.5, 0.5, "No data for these filters", ha="center", va="center", fontsize=12, color="grey")
+    plt.title(title)
+    plt.axis("off")
+
+
+def load_tables():
+    if BACKEND == "csv":
+        balls = local_backend.load_table(DELIVERIES_TABLE)[DELIVERY_COLUMNS]
+        matches = local_backend.load_table(MATCHES_TABLE)[MATCH_COLUMNS]
+        return balls, matches
+
+    from ipl_schema import (
+        DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, MATCH_SCHEMA, MATCH_SHARED_CATEGORIES, apply_schema,
+    )
+    from load_sql_results import load_table_columns
+
+    balls = apply_schema(
+        load_table_columns(DELIVERIES_TABLE, DELIVERY_COLUMNS), DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES
+    )
+    matches = apply_schema(
+        load_table_columns(MATCHES_TABLE, MATCH_COLUMNS), MATCH_SCHEMA, MATCH_SHARED_CATEGORIES
+    )
+    return balls, matches
+
+
+# ============================================================
+# AGGREGATE CACHE
+# ============================================================
+
+_render_lock = threading.Lock()  # pyplot is not thread safe
+
+# one load of the tables with every result computed from it;
+# a refresh builds and warms a new cache, then swaps it in, so
+# requests never see a half-filled cache
+class AggregateCache:
+    def __init__(self, balls, matches, generation=1):
+        self.balls = balls
+        self.matches = matches
+        self.generation = generation
+        self.seasons = {
+            season: (balls[balls["season_id"].to_numpy() == season], matches[matches["season_id"].to_numpy() == season])
+            for season in pd.unique(matches["season_id"])
+        }
+        self.views = OrderedDict()
+        self.responses = OrderedDict()
+        self._lru_lock = threading.Lock()
+        self._empty_view = None
+        self.load_seconds = self.warm_seconds = self.svg_seconds = 0.0
+        self.retired = False  # set when a refresh starts replacing this cache
+
+    @classmethod
+    def load(cls, generation=1):
+        local_backend.load_table.cache_clear()
+        local_backend.load_filtered_table.cache_clear()
+        if BACKEND != "csv":
+            # cached results would be served until their fingerprint expires
+            import query_cache
+            query_cache.invalidate()
+
+        start = time.perf_counter()
+        cache = cls(*load_tables(), generation)
+        cache.load_seconds = time.perf_counter() - start
+        return cache
+
+    def warm(self):
+        start = time.perf_counter()
+        self.empty_view()
+        for filters in self.common_filters():
+            self.dashboard_json(filters)
+        self.warm_seconds = time.perf_counter() - start
+        return len(self.views)
+
+    # SVG images of the unfiltered view, each season and each team
+    def warm_svgs(self):
+        start = time.perf_counter()
+        images = 0
+        for filters in self.common_filters():
+            if self.retired:
+                break
+            if len(filters) > 1:
+                continue
+            for script, module in CHART_MODULES.items():
+                for name, _, _ in module.CHARTS:
+                    self.chart_svg(script, name, filters)
+                    images += 1
+        self.svg_seconds = time.perf_counter() - start
+        return images
+
+    # all matches, each season, each team, each (season, team) played
+    def common_filters(self):
+        teams = pd.concat([self.matches["team1"], self.matches["team2"]]).astype(object).dropna().unique()
+        pairs = pd.concat([
+            self.matches[["season_id", "team1"]].set_axis(["season", "team"], axis=1),
+            self.matches[["season_id", "team2"]].set_axis(["season", "team"], axis=1),
+        ]).astype(object).dropna().drop_duplicates()
+
+        yield {}
+        for season in sorted(self.seasons):
+            yield make_filters(season=season)
+        for team in sorted(teams):
+            yield make_filters(team=team)
+        for season, team in sorted(pairs.itertuples(index=False, name=None)):
+            yield make_filters(season=season, team=team)
+
+    def options(self):
+        return {
+            "seasons": sorted(int(season) for season in self.seasons),
+            "teams": sorted(pd.concat([self.matches["team1"], self.matches["team2"]]).astype(object).dropna().unique()),
+            "charts": {script: [name for name, _, _ in module.CHARTS] for script, module in CHART_MODULES.items()},
+            "generation": self.generation,
+        }
+
+    # ------------------------------------------------------------
+    # Filtered tables, from the season slice when a season is given
+    # ------------------------------------------------------------
+    def tables(self, filters):
+        if "season" in filters:
+            balls, matches = self.seasons.get(filters["season"], (self.balls.iloc[:0], self.matches.iloc[:0]))
+            rest = {name: value for name, value in filters.items() if name != "season"}
+        else:
+            balls, matches, rest = self.balls, self.matches, filters
+
+        if rest:
+            balls = balls[filter_mask(balls, DELIVERIES_TABLE, rest, self.matches)]
+            matches = matches[filter_mask(matches, MATCHES_TABLE, rest)]
+        if filters:
+            balls = compact_categories(balls, SHARED_CATEGORIES[DELIVERIES_TABLE])
+            matches = compact_categories(matches, SHARED_CATEGORIES[MATCHES_TABLE])
+        return balls, matches
+
+    # ------------------------------------------------------------
+    # LRU lookup; build() runs outside the lock, so two threads may
+    # build the same entry once each
+    # ------------------------------------------------------------
+    def _cached(self, store, limit, key, build):
+        with self._lru_lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+
+        value = build()
+        with self._lru_lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+    # chart tables of every script for one filter
+    def view(self, filters):
+        def build():
+            balls, matches = self.tables(filters)
+            # e.g. a team in a season it did not play
+            if balls.empty and matches.empty:
+                return self.empty_view()
+            return self._chart_tables(balls, matches)
+        return self._cached(self.views, MAX_CACHED_VIEWS, filters_key(filters), build)
+
+    def empty_view(self):
+        if self._empty_view is None:
+            self._empty_view = self._chart_tables(self.balls.iloc[:0], self.matches.iloc[:0])
+        return self._empty_view
+
+    def _chart_tables(self, balls, matches):
+        view = {}
+        for script, module in CHART_MODULES.items():
+            data = script_chart_data(script, balls, matches)
+            view[script] = {name: _frame(data[data_key]) for name, _, data_key in module.CHARTS}
+        return view
+
+    # ------------------------------------------------------------
+    # Encoded responses (kept until evicted or the next refresh)
+    # ------------------------------------------------------------
+    def _response(self, key, build):
+        return self._cached(self.responses, MAX_CACHED_RESPONSES, key, build)
+
+    def chart_json(self, script, chart, filters):
+        def build():
+            frame = self.view(filters)[script][chart]
+            return json.dumps({
+                "script": script, "chart": chart, "filters": filters,
+                "rows": json.loads(frame.to_json(orient="records")),
+            }).encode()
+        return self._response(("json", script, chart, filters_key(filters)), build)
+
+    def dashboard_json(self, filters):
+        def build():
+            view = self.view(filters)
+            return json.dumps({
+                "filters": filters,
+                "charts": {
+                    script: {chart: json.loads(frame.to_json(orient="records")) for chart, frame in charts.items()}
+                    for script, charts in view.items()
+                },
+            }).encode()
+        return self._response(("dashboard", filters_key(filters)), build)
+
+    def chart_svg(self, script, chart, filters):
+        def build():
+            plot = {name: function for name, function, _ in CHART_MODULES[script].CHARTS}[chart]
+            frame = self.view(filters)[script][chart]
+            # the plot functions take the Series form of their data
+            data = frame.set_index(frame.columns[0])[frame.columns[1]] if script == "final_insights_dashboard" else frame
+
+            buffer = io.BytesIO()
+            with _render_lock:
+                try:
+                    if _has_data(frame):
+                        plot(data)
+                    else:
+                        _no_data_figure(chart.replace("_", " ").title())
+                    plt.savefig(buffer, format="svg")
+                finally:
+                    plt.close("all")
+            return buffer.getvalue()
+        return self._response(("svg", script, chart, filters_key(filters)), build)
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>IPL Performance Analysis</title>
+<style>
+body { font-family: sans-serif; margin: 1em 2em; }
+#charts img { width: 48%; margin: 0.5%; border: 1px solid #ddd; }
+</style></head>
+<body>
+<h2>IPL Performance Analysis</h2>
+<label>Season <select id="season"><option value="">All</option></select></label>
+<label>Team <select id="team"><option value="">All</option></select></label>
+<button id="refresh">Reload data</button> <span id="status"></span>
+<div id="charts"></div>
+<script>
+let charts = {};
+function query() {
+  const params = new URLSearchParams();
+  for (const name of ["season", "team"]) {
+    const value = document.getElementById(name).value;
+    if (value) params.set(name, value);
+  }
+  return params.toString();
+}
+let shown = 0;
+function show() {
+  const q = query(), start = performance.now(), current = ++shown;
+  const status = document.getElementById("status");
+  status.textContent = "loading...";
+  // time until the tables and every chart image have arrived
+  const loads = [fetch("/api/dashboard.json?" + q).then(r => r.ok)];
+  const div = document.getElementById("charts");
+  div.innerHTML = "";
+  for (const [script, names] of Object.entries(charts)) {
+    for (const name of names) {
+      const img = document.createElement("img");
+      loads.push(new Promise(done => { img.onload = () => done(true); img.onerror = () => done(false); }));
+      img.src = `/api/chart/${script}/${name}.svg?${q}`;
+      img.title = `${script} / ${name}`;
+      div.appendChild(img);
+    }
+  }
+  Promise.all(loads).then(results => {
+    if (current !== shown) return;
+    const failed = results.filter(ok => !ok).length;
+    status.textContent = Math.round(performance.now() - start) + " ms" + (failed ? `, ${failed} failed` : "");
+  });
+}
+function load() {
+  fetch("/api/charts").then(r => r.json()).then(options => {
+    charts = options.charts;
+    for (const name of ["season", "team"]) {
+      const select = document.getElementById(name);
+      select.length = 1;
+      for (const value of options[name + "s"]) select.add(new Option(value, value));
+    }
+    show();
+  });
+}
+document.getElementById("season").onchange = show;
+document.getElementById("team").onchange = show;
+document.getElementById("refresh").onclick = () => fetch("/api/refresh", {method: "POST"}).then(load);
+load();
+</script>
+</body></html>
+"""
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    cache = None  # set by serve(), replaced on refresh
+    refresh_lock = threading.Lock()
+
+    def _send(self, status, body, content_type, start):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Server-Timing", f"app;dur={(time.perf_counter() - start) * 1000:.2f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, start):
+        self._send(status, json.dumps({"error": message}).encode(), "application/json", start)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        try:
+            return self._get(start)
+        except ConnectionError:
+            raise  # client went away, nothing to answer
+        except Exception as error:
+            return self._error(500, f"{type(error).__name__}: {error}", start)
+
+    def _get(self, start):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items() if name in FILTER_NAMES}
+        try:
+            filters = make_filters(**query)
+        except ValueError as error:
+            return self._error(400, str(error), start)
+
+        parts = url.path.strip("/").split("/")
+        if url.path == "/":
+            return self._send(200, PAGE.encode(), "text/html; charset=utf-8", start)
+        if url.path == "/api/charts":
+            return self._send(200, json.dumps(self.cache.options()).encode(), "application/json", start)
+        if url.path == "/api/dashboard.json":
+            return self._send(200, self.cache.dashboard_json(filters), "application/json", start)
+
+        if len(parts) == 4 and parts[:2] == ["api", "chart"] and "." in parts[3]:
+            script, (chart, extension) = parts[2], parts[3].rsplit(".", 1)
+            charts = [name for name, _, _ in CHART_MODULES[script].CHARTS] if script in CHART_MODULES else []
+            if chart not in charts or extension not in ("json", "svg"):
+                return self._error(404, f"Unknown chart {script}/{parts[3]}", start)
+            if extension == "json":
+                return self._send(200, self.cache.chart_json(script, chart, filters), "application/json", start)
+            return self._send(200, self.cache.chart_svg(script, chart, filters), "image/svg+xml", start)
+
+        return self._error(404, f"Unknown path {url.path}", start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        if urlparse(self.path).path != "/api/refresh":
+            return self._error(404, f"Unknown path {self.path}", start)
+        with self.refresh_lock:
+            previous = self.cache
+            previous.retired = True  # stop drawing its SVG images
+            cache = load_cache(previous.generation + 1)
+            DashboardHandler.cache = cache
+        body = {"generation": cache.generation, "views": len(cache.views), "seconds": round(cache.warm_seconds, 2)}
+        return self._send(200, json.dumps(body).encode(), "application/json", start)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_cache(generation=1, warm=True):
+    cache = AggregateCache.load(generation)
+    if warm:
+        cache.warm()
+        threading.Thread(target=cache.warm_svgs, name="warm-svgs", daemon=True).start()
+    return cache
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, warm=True):
+    cache = load_cache(warm=warm)
+    print(f"Loaded {len(cache.balls):,} deliveries and {len(cache.matches):,} matches "
+          f"({BACKEND} backend) in {cache.load_seconds:.2f} s")
+    if warm:
+        print(f"Warmed {len(cache.views)} filter views in {cache.warm_seconds:.2f} s "
+              f"(drawing SVG images in the background)")
+
+    DashboardHandler.cache = cache
+    server = ThreadingHTTPServer((host, port), DashboardHandler)
+    print(f"Serving on http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    return server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the IPL dashboards on a local web page.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--no-warm", action="store_true", help="compute each filter view on first request")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, warm=not args.no_warm)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
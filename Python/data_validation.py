@@ -0,0 +1,343 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Data Quality Validation
+#
+# This script runs the checks of SQL/01_database_check.sql
+# (and a few more) on the raw CSV text before it is loaded:
+#   - referential integrity (deliveries -> matches)
+#   - over, ball and innings ranges
+#   - runs consistency (total_runs = batter_runs + extras,
+#     extras = wide + no-ball + leg bye + bye + penalty runs)
+#   - boolean flags that are not TRUE / FALSE / 1 / 0
+#   - numbers that do not parse, NULL tokens in required
+#     columns, blanks and unrecognised null spellings
+#   - duplicate balls and duplicate match_ids
+#
+# Deliveries are read in chunks and every rule is a vectorized
+# mask over the chunk (text checks run once per distinct
+# value of a column), so all checks run in one pass with
+# memory bounded by the chunk size (duplicate balls keep one
+# int64 key per delivery). The result is a compact report: one
+# row per rule with the number of violations and the first few
+# CSV line numbers.
+#
+# sql_loader.py runs this before loading and stops on errors.
+#
+# Usage:
+#   python data_validation.py --chunksize 500000
+# ============================================================
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from ipl_schema import BLANK_VALUE_COLUMNS, DELIVERY_SCHEMA, MATCH_DATE_FORMAT, MATCH_SCHEMA, NULL_TOKENS
+
+
+# ----- Validation Details -----
+DEFAULT_CHUNKSIZE = 500_000
+MAX_EXAMPLES = 5
+
+TRUE_VALUES = ["TRUE", "1"]
+FALSE_VALUES = ["FALSE", "0"]
+
+# spellings of "missing" that are not NULL_TOKENS
+NULL_LIKE = {"null", "none", "nan", "n/a", "na", "nil", "-"}
+
+# over_number and ball_number are 0-based
+OVER_RANGE = (0, 19)
+BALL_RANGE = (0, 10)
+INNINGS_RANGE = (1, 2)
+SUPER_OVER_INNINGS = (3, 4)
+
+EXTRAS_COLUMNS = ["wide_ball_runs", "no_ball_runs", "leg_bye_runs", "bye_runs", "penalty_runs"]
+
+# blank is a real value here (stage is blank for league matches)
+BLANK_ALLOWED = {"ipl_matches_data": BLANK_VALUE_COLUMNS}
+
+REQUIRED_TEXT = {
+    "ball_by_ball_data": ["batter", "bowler", "non_striker", "team_batting", "team_bowling"],
+    "ipl_matches_data": ["team1", "team2", "venue", "result"],
+}
+
+# rule -> (severity, description)
+RULES = {
+    "orphan_match_id": ("error", "delivery match_id not in ipl_matches_data"),
+    "over_out_of_range": ("error", f"over_number outside {OVER_RANGE[0]}-{OVER_RANGE[1]}"),
+    "ball_out_of_range": ("error", f"ball_number outside {BALL_RANGE[0]}-{BALL_RANGE[1]}"),
+    "innings_out_of_range": ("error", "innings not 1-2 (3-4 only in a super over)"),
+    "negative_runs": ("error", "negative batter_runs, extras or total_runs"),
+    "runs_mismatch": ("error", "total_runs != batter_runs + extras"),
+    "extras_mismatch": ("error", "extras != sum of the extras breakdown"),
+    "duplicate_ball": ("error", "same (match_id, innings, over_number, ball_number) twice"),
+    "invalid_boolean": ("error", "flag is not TRUE / FALSE / 1 / 0"),
+    "invalid_number": ("error", "numeric column does not parse"),
+    "invalid_date": ("error", f"match_date not {MATCH_DATE_FORMAT}"),
+    "missing_required": ("error", "required column is NULL or blank"),
+    "duplicate_match_id": ("error", "match_id appears twice"),
+    "winner_not_playing": ("error", "match_winner is neither team1 nor team2"),
+    "toss_winner_not_playing": ("error", "toss_winner is neither team1 nor team2"),
+    "missing_winner": ("warning", "result is 'win' but match_winner is missing"),
+    "blank_value": ("warning", "blank value (read as missing)"),
+    "null_like_value": ("warning", "null spelled differently from NULL_TOKENS"),
+    "match_without_deliveries": ("info", "match has no rows in ball_by_ball_data"),
+}
+SEVERITY_ORDER = {"error": 0, "warning": 1, "info": 2}
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+class ValidationReport:
+    def __init__(self):
+        self.violations = {}
+        self.examples = {}
+        self.rows = {}
+        self.seconds = 0.0
+
+    def add(self, table, rule, column, mask, lines):
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+        key = (table, rule, column)
+        self.violations[key] = self.violations.get(key, 0) + count
+        examples = self.examples.setdefault(key, [])
+        if len(examples) < MAX_EXAMPLES:
+            examples.extend(np.asarray(lines)[np.asarray(mask)][:MAX_EXAMPLES - len(examples)].tolist())
+
+    def frame(self):
+        records = [
+            {
+                "table": table,
+                "rule": rule,
+                "column": column or "",
+                "severity": RULES[rule][0],
+                "violations": count,
+                "example_lines": self.examples[(table, rule, column)],
+                "description": RULES[rule][1],
+            }
+            for (table, rule, column), count in self.violations.items()
+        ]
+        columns = ["table", "rule", "column", "severity", "violations", "example_lines", "description"]
+        df = pd.DataFrame(records, columns=columns)
+        df["rank"] = df["severity"].map(SEVERITY_ORDER)
+        return df.sort_values(["rank", "table", "rule", "column"], ignore_index=True).drop(columns="rank")
+
+    def count(self, severity):
+        return sum(count for (_, rule, _), count in self.violations.items() if RULES[rule][0] == severity)
+
+    @property
+    def errors(self):
+        return self.count("error")
+
+    def summary(self):
+        rows = ", ".join(f"{table} {count:,}" for table, count in self.rows.items())
+        speed = sum(self.rows.values()) / self.seconds if self.seconds else 0
+        return (f"Validated {rows} rows in {self.seconds:.2f} s ({speed:,.0f} rows/s): "
+                f"{self.errors:,} errors, {self.count('warning'):,} warnings, {self.count('info'):,} info")
+
+    def to_json(self):
+        return {"rows": self.rows, "seconds": round(self.seconds, 3),
+                "violations": self.frame().to_dict("records")}
+
+
+# ============================================================
+# VECTORIZED CHECKS (one chunk of raw CSV text)
+# ============================================================
+
+class _Text:
+    # one column of raw text, factorized: every predicate is
+    # evaluated once per distinct value and mapped back to rows
+    def __init__(self, values):
+        self.codes, uniques = pd.factorize(values.to_numpy())
+        self.uniques = pd.Series(uniques, dtype=object)
+        self.stripped = self.uniques.str.strip()
+
+    def rows(self, per_value):
+        return np.asarray(per_value, dtype=bool)[self.codes]
+
+    def is_null(self):
+        return self.rows(self.uniques.isin(NULL_TOKENS))
+
+    def is_blank(self):
+        return self.rows(self.stripped == "")
+
+    def is_missing(self):
+        return self.rows(self.uniques.isin(NULL_TOKENS) | (self.stripped == ""))
+
+    def is_null_like(self):
+        return self.rows(self.stripped.str.lower().isin(NULL_LIKE) & ~self.uniques.isin(NULL_TOKENS))
+
+    def is_invalid_flag(self):
+        flag = self.stripped.str.upper()
+        return self.rows(~flag.isin(TRUE_VALUES + FALSE_VALUES) & ~self.uniques.isin(NULL_TOKENS)
+                         & (self.stripped != ""))
+
+    def is_true(self):
+        return self.rows(self.stripped.str.upper().isin(TRUE_VALUES))
+
+    # (values, rows that do not parse)
+    def numbers(self):
+        present = ~self.uniques.isin(NULL_TOKENS) & (self.stripped != "")
+        values = pd.to_numeric(self.uniques.where(present), errors="coerce").to_numpy(dtype=float)
+        return values[self.codes], self.rows(np.isnan(values) & present.to_numpy())
+
+
+def _out_of_range(numbers, low, high):
+    return ~np.isnan(numbers) & ((numbers < low) | (numbers > high))
+
+
+def check_columns(chunk, table, schema, report, lines):
+    required = set(REQUIRED_TEXT.get(table, []))
+    texts, numbers = {}, {}
+    for column in chunk.columns:
+        text = texts[column] = _Text(chunk[column])
+        dtype = schema.get(column, "")
+
+        # required: non-nullable ints, flags and REQUIRED_TEXT
+        if column in required or dtype == "bool" or dtype.startswith("int"):
+            report.add(table, "missing_required", column, text.is_missing(), lines)
+        elif column not in BLANK_ALLOWED.get(table, []):
+            report.add(table, "blank_value", column, text.is_blank(), lines)
+        report.add(table, "null_like_value", column, text.is_null_like(), lines)
+
+        if dtype == "bool":
+            report.add(table, "invalid_boolean", column, text.is_invalid_flag(), lines)
+        elif dtype.lower().startswith("int"):
+            numbers[column], unparsed = text.numbers()
+            report.add(table, "invalid_number", column, unparsed, lines)
+
+    return texts, numbers
+
+
+def check_deliveries(chunk, match_ids, report, keys):
+    table = "ball_by_ball_data"
+    lines = chunk.index.to_numpy() + 2  # header is line 1
+    texts, numbers = check_columns(chunk, table, DELIVERY_SCHEMA, report, lines)
+
+    match_id = numbers["match_id"]
+    report.add(table, "orphan_match_id", "match_id",
+               ~np.isnan(match_id) & ~pd.Series(match_id).isin(match_ids).to_numpy(), lines)
+
+    over, ball, innings = numbers["over_number"], numbers["ball_number"], numbers["innings"]
+    report.add(table, "over_out_of_range", "over_number", _out_of_range(over, *OVER_RANGE), lines)
+    report.add(table, "ball_out_of_range", "ball_number", _out_of_range(ball, *BALL_RANGE), lines)
+    super_over = texts["is_super_over"].is_true()
+    report.add(table, "innings_out_of_range", "innings",
+               _out_of_range(innings, *INNINGS_RANGE)
+               & (~super_over | _out_of_range(innings, *SUPER_OVER_INNINGS)), lines)
+
+    batter_runs, extras, total_runs = numbers["batter_runs"], numbers["extras"], numbers["total_runs"]
+    report.add(table, "negative_runs", "",
+               (batter_runs < 0) | (extras < 0) | (total_runs < 0), lines)
+    report.add(table, "runs_mismatch", "total_runs",
+               np.abs(total_runs - (batter_runs + extras)) > 0, lines)  # NaN compares False
+    report.add(table, "extras_mismatch", "extras",
+               np.abs(extras - sum(numbers[column] for column in EXTRAS_COLUMNS)) > 0, lines)
+
+    # one int64 key per ball, for the duplicate check at the end
+    parsed = ~(np.isnan(match_id) | np.isnan(innings) | np.isnan(over) | np.isnan(ball))
+    in_range = parsed & (innings >= 0) & (innings < 16) & (over >= 0) & (over < 256) & (ball >= 0) & (ball < 256)
+    key = (((match_id[in_range].astype("int64") * 16 + innings[in_range]) * 256 + over[in_range]) * 256
+           + ball[in_range]).astype("int64")
+    keys.append((key, lines[in_range]))
+    return set(pd.unique(match_id[~np.isnan(match_id)]).astype("int64").tolist())
+
+
+def check_matches(matches, report):
+    table = "ipl_matches_data"
+    lines = matches.index.to_numpy() + 2
+    texts, numbers = check_columns(matches, table, MATCH_SCHEMA, report, lines)
+
+    dates = texts["match_date"]
+    parsed = pd.to_datetime(dates.uniques, format=MATCH_DATE_FORMAT, errors="coerce")
+    report.add(table, "invalid_date", "match_date", dates.rows(parsed.isna()) & ~dates.is_missing(), lines)
+
+    match_id = numbers["match_id"]
+    report.add(table, "duplicate_match_id", "match_id",
+               pd.Series(match_id).duplicated(keep="first").to_numpy() & ~np.isnan(match_id), lines)
+
+    for column, rule in [("match_winner", "winner_not_playing"), ("toss_winner", "toss_winner_not_playing")]:
+        values = matches[column]
+        present = ~texts[column].is_missing()
+        playing = ((values == matches["team1"]) | (values == matches["team2"])).to_numpy()
+        report.add(table, rule, column, present & ~playing, lines)
+        if column == "match_winner":
+            report.add(table, "missing_winner", column, (matches["result"] == "win").to_numpy() & ~present, lines)
+
+    return match_id
+
+
+# ============================================================
+# ONE PASS OVER THE FILES
+# ============================================================
+
+def _read_text(path, encoding, **kwargs):
+    # raw text: no NULL, boolean or number conversion
+    return pd.read_csv(path, dtype=str, keep_default_na=False, encoding=encoding, **kwargs)
+
+
+def validate(data_dir=None, chunksize=DEFAULT_CHUNKSIZE):
+    data_dir = data_dir or local_backend.DATA_DIR
+    report = ValidationReport()
+    start = time.perf_counter()
+
+    file_name, encoding = local_backend.TABLE_FILES["ipl_matches_data"]
+    matches = _read_text(os.path.join(data_dir, file_name), encoding)
+    match_ids = check_matches(matches, report)
+    report.rows["ipl_matches_data"] = len(matches)
+    known_ids = pd.unique(match_ids[~np.isnan(match_ids)])
+
+    file_name, encoding = local_backend.TABLE_FILES["ball_by_ball_data"]
+    keys, seen_ids, rows = [], set(), 0
+    for chunk in _read_text(os.path.join(data_dir, file_name), encoding, chunksize=chunksize):
+        seen_ids |= check_deliveries(chunk, known_ids, report, keys)
+        rows += len(chunk)
+    report.rows["ball_by_ball_data"] = rows
+
+    # duplicate balls across all chunks (hash based, linear)
+    if keys:
+        all_keys = np.concatenate([key for key, _ in keys])
+        all_lines = np.concatenate([line for _, line in keys])
+        duplicated = pd.Series(all_keys).duplicated(keep="first").to_numpy()
+        report.add("ball_by_ball_data", "duplicate_ball", "", duplicated, all_lines)
+
+    without = ~pd.Series(match_ids).isin(list(seen_ids)).to_numpy() & ~np.isnan(match_ids)
+    report.add("ipl_matches_data", "match_without_deliveries", "match_id", without, matches.index.to_numpy() + 2)
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_report(report):
+    print(report.summary())
+    frame = report.frame()
+    if len(frame):
+        frame["example_lines"] = frame["example_lines"].map(lambda lines: ", ".join(map(str, lines)))
+        print(frame.drop(columns="description").to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the IPL CSV files.")
+    parser.add_argument("--data-dir", help="folder with the CSV files (default: IPL_DATA_DIR)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="deliveries per chunk")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = validate(args.data_dir, args.chunksize)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report.to_json(), f, indent=2, default=str)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,10 +6,17 @@
 # This script establishes connection between Python and
 # MS SQL Server database so that query results can be
 # loaded into pandas for visualization.
+#
+# The engine is created on first use (get_engine()), so
+# importing this file does not touch the database. One engine
+# is shared by the whole process; its connection pool is sized
+# for the concurrent queries in query_executor.py.
 # ============================================================
 
-import pyodbc
-from sqlalchemy import create_engine
+import os
+from functools import lru_cache
+
+from sqlalchemy import create_engine, text
 
 
 # ----- SQL Server Details -----
@@ -17,28 +24,48 @@ SERVER = "localhost"
 DATABASE = "IPL Analysis DB"
 DRIVER = "ODBC Driver 17 for SQL Server"
 
+# Connection pool (one connection per concurrent query)
+POOL_SIZE = int(os.environ.get("IPL_DB_POOL_SIZE", "8"))
+MAX_OVERFLOW = int(os.environ.get("IPL_DB_MAX_OVERFLOW", "4"))
+
 
 # Windows Authentication Connection String
 connection_string = f"mssql+pyodbc://@{SERVER}/{DATABASE}?driver={DRIVER}&trusted_connection=yes"
 
 
-# Create Engine
-try:
-    engine = create_engine(connection_string)
-    print("Connection Successful")
+# Create Engine (once, when a query first needs it)
+@lru_cache(maxsize=None)
+def get_engine():
+    import pyodbc  # noqa: F401  (ODBC driver for SQL Server)
+
+    try:
+        engine = create_engine(
+            connection_string,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_pre_ping=True,
+        )
+        print("Connection Successful")
+
+    except Exception as e:
+        print("Connection Failed")
+        print(e)
+        raise
 
-except Exception as e:
-    print("Connection Failed")
-    print(e)
+    return engine
 
 
+# Keeps "from database_connection import engine" working
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from sqlalchemy import text
 
 # Test connection (runs only when this file executed directly)
 if __name__ == "__main__":
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             result = conn.execute(text("SELECT DB_NAME()"))
             for row in result:
                 print("Connected to:", row[0])
@@ -0,0 +1,211 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Per-Match / Per-Innings Index over Deliveries
+#
+# This script sorts ball_by_ball_data once by
+# (match_id, innings, over_number, ball_number) and keeps:
+#   - offset arrays: where each match / innings starts and ends
+#   - cumulative runs, wickets and balls (prefix sums)
+#
+# With these, a match scorecard is a slice of the sorted table,
+# an innings total is cumulative[end] - cumulative[start], and
+# an over range (e.g. death overs 16-20) is found with a binary
+# search inside the innings, so none of them rescan the table.
+#
+# Usage:
+#   from delivery_index import load_delivery_index
+#   index = load_delivery_index()
+#   index.scorecard(335982, innings=1)
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from ipl_schema import DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, apply_schema
+from local_backend import BACKEND
+
+
+# ----- Index Details -----
+SORT_COLUMNS = ["match_id", "innings", "over_number", "ball_number"]
+
+INDEX_COLUMNS = SORT_COLUMNS + [
+    "season_id", "batter", "bowler", "non_striker", "team_batting", "team_bowling",
+    "batter_runs", "extras", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball",
+    "player_out", "wicket_kind",
+]
+
+# overs are numbered from 0, so 16-19 are the last four overs
+# (same filter as SQL/08_views_and_final_metrics.sql)
+DEATH_OVERS = (16, 19)
+
+# over_number fits in this many slots per innings
+OVER_SLOTS = 64
+
+
+def _prefix_sum(values):
+    return np.concatenate([[0], np.cumsum(values, dtype="int64")])
+
+
+def _segment_starts(*keys):
+    # positions where any key changes, plus the end position
+    changed = np.zeros(len(keys[0]), dtype=bool)
+    if len(changed):
+        changed[0] = True
+    for key in keys:
+        changed[1:] |= key[1:] != key[:-1]
+    return np.append(np.flatnonzero(changed), len(changed))
+
+
+class DeliveryIndex:
+    def __init__(self, balls):
+        order = np.lexsort([balls[column].to_numpy() for column in reversed(SORT_COLUMNS)])
+        self.balls = balls.iloc[order].reset_index(drop=True)
+
+        match_id = self.balls["match_id"].to_numpy()
+        innings = self.balls["innings"].to_numpy()
+
+        # ----- match offsets -----
+        self.match_offsets = _segment_starts(match_id)
+        self.match_ids = match_id[self.match_offsets[:-1]]
+        self._match_position = {key: i for i, key in enumerate(self.match_ids.tolist())}
+
+        # ----- innings offsets -----
+        self.innings_offsets = _segment_starts(match_id, innings)
+        starts = self.innings_offsets[:-1]
+        self.innings_keys = pd.DataFrame({
+            "match_id": match_id[starts],
+            "season_id": self.balls["season_id"].to_numpy()[starts],
+            "innings": innings[starts],
+            "team_batting": self.balls["team_batting"].to_numpy()[starts],
+            "team_bowling": self.balls["team_bowling"].to_numpy()[starts],
+        })
+        self._innings_position = {
+            key: i for i, key in enumerate(zip(self.innings_keys["match_id"].tolist(), self.innings_keys["innings"].tolist()))
+        }
+
+        # ----- prefix sums -----
+        self.cum_runs = _prefix_sum(self.balls["total_runs"].to_numpy())
+        self.cum_wickets = _prefix_sum(self.balls["is_wicket"].to_numpy())
+        self.cum_balls = _prefix_sum(np.ones(len(self.balls), dtype="int64"))
+
+        # innings number * OVER_SLOTS + over, non-decreasing over the table
+        segment = np.repeat(np.arange(len(starts)), np.diff(self.innings_offsets))
+        self._over_key = segment * OVER_SLOTS + self.balls["over_number"].to_numpy().astype("int64")
+
+    # ========================================================
+    # SLICES
+    # ========================================================
+
+    def match_slice(self, match_id):
+        i = self._match_position[match_id]
+        return slice(self.match_offsets[i], self.match_offsets[i + 1])
+
+    def innings_slice(self, match_id, innings):
+        i = self._innings_position[(match_id, innings)]
+        return slice(self.innings_offsets[i], self.innings_offsets[i + 1])
+
+    def scorecard(self, match_id, innings=None):
+        rows = self.match_slice(match_id) if innings is None else self.innings_slice(match_id, innings)
+        return self.balls.iloc[rows]
+
+    def _totals(self, start, end):
+        return {
+            "runs": self.cum_runs[end] - self.cum_runs[start],
+            "wickets": self.cum_wickets[end] - self.cum_wickets[start],
+            "balls": self.cum_balls[end] - self.cum_balls[start],
+        }
+
+    # ========================================================
+    # TOTALS FROM PREFIX SUMS
+    # ========================================================
+
+    def innings_total(self, match_id, innings):
+        rows = self.innings_slice(match_id, innings)
+        return {key: int(value) for key, value in self._totals(rows.start, rows.stop).items()}
+
+    def innings_totals(self):
+        starts, ends = self.innings_offsets[:-1], self.innings_offsets[1:]
+        return self.innings_keys.assign(**self._totals(starts, ends))
+
+    def first_innings_scores(self):
+        totals = self.innings_totals()
+        first = totals[totals["innings"] == 1]
+        return first[["match_id", "season_id", "runs"]].rename(columns={"runs": "first_innings_runs"}).reset_index(drop=True)
+
+    def highest_totals(self, top=20):
+        totals = self.innings_totals().rename(columns={"runs": "innings_total"})
+        return totals.sort_values("innings_total", ascending=False, kind="stable").head(top).reset_index(drop=True)
+
+    # ----- over ranges (first_over..last_over, inclusive) -----
+    def over_range_bounds(self, first_over, last_over):
+        segment = np.arange(len(self.innings_keys)) * OVER_SLOTS
+        starts = np.searchsorted(self._over_key, segment + first_over, side="left")
+        ends = np.searchsorted(self._over_key, segment + last_over, side="right")
+        return starts, ends
+
+    def over_range_totals(self, first_over, last_over):
+        starts, ends = self.over_range_bounds(first_over, last_over)
+        totals = self.innings_keys.assign(**self._totals(starts, ends))
+        return totals[totals["balls"] > 0].reset_index(drop=True)
+
+    def over_range_rows(self, first_over, last_over):
+        starts, ends = self.over_range_bounds(first_over, last_over)
+        lengths = ends - starts
+        # start of each range repeated, plus 0..length-1 inside it
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + offsets
+
+    def death_over_economy(self, by="bowler", overs=DEATH_OVERS):
+        if by in self.innings_keys.columns:
+            totals = self.over_range_totals(*overs).groupby(by, observed=True)[["runs", "balls"]].sum()
+        else:
+            rows = self.balls.iloc[self.over_range_rows(*overs)]
+            totals = rows.groupby(by, observed=True)["total_runs"].agg(runs="sum", balls="size")
+
+        economy = (totals["runs"] * 6.0 / totals["balls"]).round(2)
+        result = economy.rename("economy").rename_axis(by).reset_index()
+        result[by] = result[by].astype(str)
+        return result.sort_values("economy", ignore_index=True)
+
+
+# ============================================================
+# BUILD FROM THE ACTIVE BACKEND
+# ============================================================
+
+def load_delivery_index():
+    if BACKEND == "csv":
+        return DeliveryIndex(local_backend.deliveries()[INDEX_COLUMNS])
+
+    from load_sql_results import load_query
+
+    balls = load_query(f"""
+SELECT {", ".join(INDEX_COLUMNS)}
+FROM dbo.ball_by_ball_data
+ORDER BY {", ".join(SORT_COLUMNS)}
+""")
+    return DeliveryIndex(apply_schema(balls, DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES))
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    index = load_delivery_index()
+    print(f"Indexed {len(index.balls)} deliveries, {len(index.match_ids)} matches, "
+          f"{len(index.innings_keys)} innings in {time.perf_counter() - start:.3f} s")
+
+    match_id = int(index.match_ids[0])
+    start = time.perf_counter()
+    total = index.innings_total(match_id, 1)
+    print(f"\nMatch {match_id}, first innings: {total} ({(time.perf_counter() - start) * 1e6:.0f} us)")
+
+    print("\nHighest Team Totals:")
+    print(index.highest_totals(5))
+
+    print("\nDeath Over Economy (bowlers):")
+    print(index.death_over_economy().head())
@@ -0,0 +1,204 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Player and Team Dimension Resolver
+#
+# This script maps the free-text player and team names on
+# deliveries and matches to the integer keys of
+# players_data_updated (player_id) and teams_data (team_id),
+# so joins and group-bys can run on integers instead of names.
+#
+# A player name is looked up in player_name first, then in
+# player_name2 and player_full_name, so a name spelled
+# differently in one column still resolves. Names that match
+# more than one player_id are left unresolved rather than
+# joined to the wrong player.
+#
+# Names are resolved once per distinct value (per category),
+# and the resolver is cached for the process. unresolved()
+# lists every name that did not map to a key.
+#
+# attach_ids() is part of the typed load path: local_backend
+# adds the <column>_id keys when it reads deliveries and matches,
+# load_sql_results adds them to the rows fetched from SQL Server,
+# and sql_loader.py therefore loads them into the SQL tables
+# (SQL/07 joins players_data_updated on batter_id). The batter /
+# bowler group-bys of metrics_engine.py run on these keys.
+#
+# Usage:
+#   from dimensions import attach_ids
+#   balls = attach_ids(balls)   # adds batter_id, bowler_id, ...
+# ============================================================
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# ----- Name Columns (in lookup order) -----
+PLAYER_NAME_COLUMNS = ["player_name", "player_name2", "player_full_name"]
+TEAM_NAME_COLUMNS = ["team_name", "team_name_short"]
+
+# (ipl_matches_data.player_of_match already holds a player_id)
+PLAYER_COLUMNS = ["batter", "bowler", "non_striker", "player_out"]
+TEAM_COLUMNS = ["team_batting", "team_bowling", "team1", "team2", "toss_winner", "match_winner"]
+
+# <column>_id keys added by attach_ids()
+KEY_COLUMNS = [f"{column}_id" for column in PLAYER_COLUMNS + TEAM_COLUMNS]
+
+PLAYER_DIMENSION_COLUMNS = ["player_id"] + PLAYER_NAME_COLUMNS + ["bat_style", "bowl_style"]
+TEAM_DIMENSION_COLUMNS = ["team_id"] + TEAM_NAME_COLUMNS
+
+
+# ------------------------------------------------------------
+# name -> key, earlier columns first; names with several keys
+# in the same column are returned separately as ambiguous
+# ------------------------------------------------------------
+def _name_map(dimension, key_column, name_columns):
+    mapping = {}
+    ambiguous = {}
+
+    for column in name_columns:
+        if column not in dimension.columns:
+            continue
+        pairs = dimension[[column, key_column]].dropna().drop_duplicates()
+        pairs = pairs[pairs[column].astype(str).str.strip() != ""]
+
+        keys_per_name = pairs.groupby(column)[key_column].nunique()
+        for name in keys_per_name.index[keys_per_name > 1]:
+            if name not in mapping:
+                ambiguous[name] = sorted(pairs.loc[pairs[column] == name, key_column].tolist())
+
+        for name, key in zip(pairs[column], pairs[key_column]):
+            if name not in mapping and name not in ambiguous:
+                mapping[name] = int(key)
+
+    return mapping, ambiguous
+
+
+class DimensionResolver:
+    def __init__(self, players, teams):
+        self.players = players.set_index("player_id")
+        self.teams = teams.set_index("team_id")
+
+        self.player_ids, self.ambiguous_players = _name_map(players, "player_id", PLAYER_NAME_COLUMNS)
+        self.team_ids, self.ambiguous_teams = _name_map(teams, "team_id", TEAM_NAME_COLUMNS)
+
+        # category dtype -> key per category code
+        self._category_keys = {}
+
+    def _mapping(self, column):
+        return self.team_ids if column in TEAM_COLUMNS else self.player_ids
+
+    # ----- names -> nullable Int32 keys -----
+    def keys(self, values, mapping):
+        values = pd.Series(values)
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            cache_key = (id(mapping), values.dtype)
+            if cache_key not in self._category_keys:
+                categories = pd.Series(values.cat.categories, dtype=object)
+                self._category_keys[cache_key] = categories.map(mapping).to_numpy(dtype="float64")
+
+            category_keys = np.append(self._category_keys[cache_key], np.nan)  # code -1 = missing
+            keys = category_keys[values.cat.codes.to_numpy()]
+        else:
+            codes, names = pd.factorize(values.astype(object))
+            name_keys = pd.Series(names, dtype=object).map(mapping).to_numpy(dtype="float64")
+            keys = np.append(name_keys, np.nan)[codes]
+
+        return pd.array(keys, dtype="Int32")
+
+    def resolve(self, df, columns=None):
+        columns = columns or [column for column in PLAYER_COLUMNS + TEAM_COLUMNS if column in df.columns]
+        return df.assign(**{
+            f"{column}_id": self.keys(df[column], self._mapping(column)) for column in columns
+        })
+
+    # ----- names that did not map to a key -----
+    def unresolved(self, df, columns=None):
+        columns = columns or [column for column in PLAYER_COLUMNS + TEAM_COLUMNS if column in df.columns]
+
+        report = []
+        for column in columns:
+            values = df[column]
+            named = values.notna().to_numpy() & (values.astype(str).str.strip() != "").to_numpy()
+            missing = named & self.keys(values, self._mapping(column)).isna()
+            counts = values[missing].astype(object).value_counts()
+            report.append(pd.DataFrame({"column": column, "name": counts.index, "rows": counts.to_numpy()}))
+
+        return pd.concat(report, ignore_index=True)
+
+
+# ------------------------------------------------------------
+# Load the dimension tables once per process
+# ------------------------------------------------------------
+@lru_cache(maxsize=None)
+def get_resolver():
+    # imported here: local_backend imports this module
+    import local_backend
+
+    if local_backend.BACKEND == "csv":
+        players = local_backend.load_table("players_data_updated")[PLAYER_DIMENSION_COLUMNS]
+        teams = local_backend.load_table("teams_data")[TEAM_DIMENSION_COLUMNS]
+    else:
+        from load_sql_results import load_table_columns
+
+        players = load_table_columns("players_data_updated", PLAYER_DIMENSION_COLUMNS)
+        teams = load_table_columns("teams_data", TEAM_DIMENSION_COLUMNS)
+
+    return DimensionResolver(players, teams)
+
+
+# ------------------------------------------------------------
+# <column>_id for every player / team name column of a table
+# ------------------------------------------------------------
+def attach_ids(df):
+    columns = [column for column in PLAYER_COLUMNS + TEAM_COLUMNS if column in df.columns]
+    if not columns:
+        return df
+    return get_resolver().resolve(df, columns)
+
+
+# ============================================================
+# EXAMPLE: SQL/07 BAT STYLE SPLIT ON INTEGER KEYS
+# ============================================================
+
+def runs_by_bat_style(balls, resolver=None):
+    resolver = resolver or get_resolver()
+    if "batter_id" in balls.columns:
+        batter_id = balls["batter_id"].array
+    else:
+        batter_id = resolver.keys(balls["batter"], resolver.player_ids)
+
+    runs = pd.Series(balls["batter_runs"].to_numpy(), dtype="int64").groupby(batter_id).sum()
+    bat_style = resolver.players["bat_style"].reindex(runs.index)
+
+    result = runs.groupby(bat_style.to_numpy()).sum()
+    result = result.rename_axis("bat_style").reset_index(name="total_runs")
+    return result.sort_values("total_runs", ascending=False, ignore_index=True)
+
+
+# ------------------------------------------------------------
+# Unresolved names report when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    from load_sql_results import load_table_columns
+
+    resolver = get_resolver()
+    print(f"{len(resolver.player_ids)} player names -> {len(resolver.players)} player_ids, "
+          f"{len(resolver.team_ids)} team names -> {len(resolver.teams)} team_ids")
+    if resolver.ambiguous_players:
+        print(f"Ambiguous player names (not resolved): {resolver.ambiguous_players}")
+
+    balls = load_table_columns("ball_by_ball_data", ["batter", "bowler", "non_striker", "team_batting", "team_bowling", "batter_runs"])
+    matches = load_table_columns("ipl_matches_data", ["team1", "team2", "toss_winner", "match_winner"])
+
+    report = pd.concat([resolver.unresolved(balls), resolver.unresolved(matches)], ignore_index=True)
+    print(f"\nUnresolved names: {len(report)}")
+    if len(report):
+        print(report.to_string(index=False))
+
+    print("\nRuns by Bat Style:")
+    print(runs_by_bat_style(balls))
@@ -1,119 +1,188 @@
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
-import urllib
+
+import local_backend
+from instrumentation import traced
+from ipl_schema import (
+    DELIVERY_SCHEMA,
+    DELIVERY_SHARED_CATEGORIES,
+    MATCH_SCHEMA,
+    MATCH_SHARED_CATEGORIES,
+    apply_schema,
+)
+from local_backend import BACKEND
+from query_executor import fetch_all
+from query_filters import describe, filter_queries, parse_filters
+from streaming_aggregates import stream_team_ball_totals
 
 # =========================
-# DATABASE CONNECTION
+# LOAD DATA
 # =========================
 
-params = urllib.parse.quote_plus(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=INSPIRON;"
-    "DATABASE=IPL Analysis DB;"
-    "Trusted_Connection=yes;"
-)
+# Set IPL_STREAM_CHUNKSIZE (e.g. 250000) to aggregate the
+# deliveries in chunks instead of loading them all at once
+STREAM_CHUNKSIZE = int(os.environ.get("IPL_STREAM_CHUNKSIZE", "0"))
+
+MATCH_COLUMNS = ["team1", "team2", "match_winner", "toss_winner", "toss_decision", "win_by_runs", "win_by_wickets"]
+BALL_COLUMNS = ["team_batting", "team_bowling", "total_runs", "is_wicket"]
+
+matches_query = f"""
+SELECT {", ".join(MATCH_COLUMNS)}
+FROM dbo.ipl_matches_data
+"""
 
-engine = create_engine(f"mssql+pyodbc:///?odbc_connect={params}")
+balls_query = f"""
+SELECT {", ".join(BALL_COLUMNS)}
+FROM dbo.ball_by_ball_data
+"""
 
-print("Connection Successful")
+# filters: season, team, venue, innings (see query_filters.py)
+def load_data(**filters):
+    if BACKEND == "csv":
+        print(f"Loading final dashboard data from local CSV files ({describe(filters)})...")
+        matches = local_backend.matches(**filters)[MATCH_COLUMNS].copy()
+        balls = local_backend.deliveries(**filters)[BALL_COLUMNS]
+        return matches, balls
+
+    print(f"Loading final dashboard data from SQL Server ({describe(filters)})...")
+
+    queries, params = filter_queries({"matches": matches_query, "balls": balls_query}, filters)
+    data = fetch_all(queries, params=params)
+
+    matches = apply_schema(data["matches"], MATCH_SCHEMA, MATCH_SHARED_CATEGORIES)
+    balls = apply_schema(data["balls"], DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES)
+    return matches, balls
+
+def load_matches(**filters):
+    if BACKEND == "csv":
+        return local_backend.matches(**filters)[MATCH_COLUMNS].copy()
+
+    queries, params = filter_queries({"matches": matches_query}, filters)
+    data = fetch_all(queries, params=params)
+    return apply_schema(data["matches"], MATCH_SCHEMA, MATCH_SHARED_CATEGORIES)
 
 # =========================
-# LOAD DATA
+# TEAM TOTALS FROM DELIVERIES
 # =========================
 
-def load_data():
-    print("Loading final dashboard data from SQL Server...")
+def avg_runs_by_team(balls):
+    return balls.groupby('team_batting', observed=True)['total_runs'].mean()
 
-    matches_query = """
-    SELECT team1, team2, match_winner, toss_winner, toss_decision, win_by_runs, win_by_wickets
-    FROM dbo.ipl_matches_data
-    """
+def wickets_by_team(balls):
+    wickets = balls[balls['is_wicket'] == 1]
+    return wickets['team_bowling'].value_counts()
 
-    balls_query = """
-    SELECT team_batting, team_bowling, total_runs, is_wicket
-    FROM dbo.ball_by_ball_data
-    """
+# =========================
+# TEAM TOTALS FROM MATCHES
+# =========================
 
-    matches = pd.read_sql(matches_query, engine)
-    balls = pd.read_sql(balls_query, engine)
+def team_wins(matches):
+    return matches['match_winner'].value_counts().head(10)
 
-    return matches, balls
+def toss_impact(matches):
+    toss_win_match_win = matches['toss_winner'] == matches['match_winner']
+    return toss_win_match_win.rename('toss_win_match_win').value_counts()
 
 # =========================
 # VISUAL 1 — MOST WINS
 # =========================
-
-def plot_team_wins(matches):
-    wins = matches['match_winner'].value_counts().head(10)
-
+
+@traced(category="plot")
+def plot_team_wins(wins):
     plt.figure(figsize=(10,5))
-    sns.barplot(x=wins.values, y=wins.index)
+    sns.barplot(x=wins.values, y=wins.index.astype(str))
     plt.title("Top 10 Teams by Total Wins")
     plt.xlabel("Wins")
     plt.ylabel("Team")
     plt.tight_layout()
-    plt.show()
 
 # =========================
 # VISUAL 2 — AVG RUNS SCORED
 # =========================
-
-def plot_avg_runs(balls):
-    avg_runs = balls.groupby('team_batting')['total_runs'].mean().sort_values(ascending=False).head(10)
+
+@traced(category="plot")
+def plot_avg_runs(avg_runs):
+    avg_runs = avg_runs.sort_values(ascending=False).head(10)
 
     plt.figure(figsize=(10,5))
-    sns.barplot(x=avg_runs.values, y=avg_runs.index)
+    sns.barplot(x=avg_runs.values, y=avg_runs.index.astype(str))
     plt.title("Top 10 Teams by Average Runs per Ball")
     plt.xlabel("Average Runs")
     plt.ylabel("Batting Team")
     plt.tight_layout()
-    plt.show()
 
 # =========================
 # VISUAL 3 — TOSS IMPACT
 # =========================
-
-def plot_toss_impact(matches):
-    matches['toss_win_match_win'] = matches['toss_winner'] == matches['match_winner']
-
-    toss_impact = matches['toss_win_match_win'].value_counts()
-
+
+@traced(category="plot")
+def plot_toss_impact(toss_impact):
     plt.figure(figsize=(6,6))
     plt.pie(toss_impact, labels=['Lost After Toss Win','Won After Toss Win'], autopct='%1.1f%%')
     plt.title("Does Winning Toss Help Win Match?")
-    plt.show()
 
 # =========================
 # VISUAL 4 — WICKETS BY TEAM
 # =========================
-
-def plot_wickets(balls):
-    wickets = balls[balls['is_wicket'] == 1]
-    wickets = wickets['team_bowling'].value_counts().head(10)
+
+@traced(category="plot")
+def plot_wickets(wickets):
+    wickets = wickets.sort_values(ascending=False).head(10)
 
     plt.figure(figsize=(10,5))
-    sns.barplot(x=wickets.values, y=wickets.index)
+    sns.barplot(x=wickets.values, y=wickets.index.astype(str))
     plt.title("Top 10 Teams by Wickets Taken")
     plt.xlabel("Wickets")
     plt.ylabel("Bowling Team")
     plt.tight_layout()
-    plt.show()
 
 # =========================
 # MAIN
 # =========================
 
-def main():
-    matches, balls = load_data()
-
-    plot_team_wins(matches)
-    plot_avg_runs(balls)
-    plot_toss_impact(matches)
-    plot_wickets(balls)
+# (chart name, plot function, data key)
+CHARTS = [
+    ("team_wins", plot_team_wins, "team_wins"),
+    ("avg_runs_per_ball", plot_avg_runs, "avg_runs"),
+    ("toss_impact", plot_toss_impact, "toss_impact"),
+    ("team_wickets", plot_wickets, "wickets"),
+]
+
+# chart inputs from matches and team totals (also used by
+# dashboard_server.py on its in-memory tables)
+def chart_data(matches, avg_runs, wickets):
+    return {
+        "team_wins": team_wins(matches),
+        "avg_runs": avg_runs.sort_values(ascending=False).head(10),
+        "toss_impact": toss_impact(matches),
+        "wickets": wickets.sort_values(ascending=False).head(10),
+    }
+
+def load_chart_data(chunksize=STREAM_CHUNKSIZE, **filters):
+    if chunksize:
+        print(f"Streaming deliveries in chunks of {chunksize:,} rows ({describe(filters)})...")
+        matches = load_matches(**filters)
+        batting, bowling = stream_team_ball_totals(chunksize, filters=filters)
+        avg_runs = batting.mean("total_runs")
+        wickets = bowling.sums["is_wicket"]
+    else:
+        matches, balls = load_data(**filters)
+        avg_runs = avg_runs_by_team(balls)
+        wickets = wickets_by_team(balls)
+
+    return chart_data(matches, avg_runs, wickets)
+
+def main(**filters):
+    data = load_chart_data(**filters)
+
+    for _, plot, key in CHARTS:
+        plot(data[key])
+        plt.show()
 
     print("Final Dashboard Generated Successfully")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**parse_filters("Final insights dashboard"))
\ No newline at end of file
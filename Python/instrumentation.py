@@ -0,0 +1,228 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Query and Render Instrumentation
+#
+# This script times the stages of a run (SQL fetch, pandas
+# post-processing, chart drawing) and records for each stage:
+#   - wall time
+#   - rows and bytes of the frame it returned
+#   - peak Python memory during the stage (tracemalloc)
+#
+# tracemalloc keeps one peak for the whole process, so peak
+# memory is only recorded for stages on the main thread (where
+# it also counts what other threads allocated meanwhile).
+# Stages on worker threads (dashboard_server.py) log time and
+# rows without peak_mb, and they never reset the peak.
+#
+# Every finished stage is written as one JSON line to the log
+# and, optionally, as an event in a Chrome trace file (open in
+# chrome://tracing or https://ui.perfetto.dev). Trace events are
+# appended as they happen, so worker processes (batch_render.py)
+# can write to the same file; delete it to start a new trace.
+#
+# Tracing is off unless IPL_TRACE is set. When off, stage()
+# returns a shared no-op object and @traced returns the
+# function unchanged, so there is no cost at all.
+#
+#   IPL_TRACE=on                  enable, JSON lines to stderr
+#   IPL_TRACE_LOG=trace.jsonl     JSON lines to this file
+#   IPL_TRACE_CHROME=trace.json   also write a Chrome trace
+#   IPL_TRACE_MEMORY=off          skip peak memory (faster)
+# ============================================================
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+
+# ----- Trace Settings -----
+def _enabled(name, default="off"):
+    return os.environ.get(name, default).strip().lower() not in ("", "0", "off", "false", "no")
+
+
+TRACE_ENABLED = _enabled("IPL_TRACE")
+TRACE_MEMORY = TRACE_ENABLED and _enabled("IPL_TRACE_MEMORY", "on")
+TRACE_LOG = os.environ.get("IPL_TRACE_LOG")
+TRACE_CHROME = os.environ.get("IPL_TRACE_CHROME")
+
+logger = logging.getLogger("ipl.trace")
+
+_local = threading.local()
+_chrome_lock = threading.Lock()
+
+
+def _setup():
+    handler = logging.FileHandler(TRACE_LOG) if TRACE_LOG else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+# ------------------------------------------------------------
+# Rows and in-memory bytes of a DataFrame / Series result
+# ------------------------------------------------------------
+def frame_stats(df):
+    if not hasattr(df, "memory_usage"):
+        return {}
+    usage = df.memory_usage(deep=True)  # Series -> int, DataFrame -> per column
+    if hasattr(usage, "sum"):
+        usage = usage.sum()
+    return {"rows": len(df), "bytes": int(usage)}
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def record_frame(self, df):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def record_frame(self, df):
+        self.args.update(frame_stats(df))
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+
+        self.track_memory = TRACE_MEMORY and threading.current_thread() is threading.main_thread()
+        if self.track_memory:
+            # keep the peak seen so far by the enclosing stage
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+        self.peak = 0
+
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _local.stack.pop()
+
+        event = {
+            "stage": self.name,
+            "category": self.category,
+            "seconds": round(seconds, 6),
+            **self.args,
+        }
+        if self.track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            event["peak_mb"] = round((self.peak - self.start_memory) / 1e6, 3)
+            if _local.stack:
+                _local.stack[-1].peak = max(_local.stack[-1].peak, self.peak)
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+
+        logger.info(json.dumps(event, default=str))
+        if TRACE_CHROME:
+            _write_chrome_event(event, seconds)
+        return False
+
+
+def _write_chrome_event(event, seconds):
+    record = {
+        "name": event["stage"],
+        "cat": event["category"],
+        "ph": "X",
+        # wall clock, so events of several processes line up
+        "ts": round((time.time() - seconds) * 1e6, 1),
+        "dur": round(seconds * 1e6, 1),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": {key: value for key, value in event.items() if key not in ("stage", "category")},
+    }
+    # JSON array format; the closing "]" is optional for Chrome
+    with _chrome_lock, open(TRACE_CHROME, "a") as f:
+        if f.tell() == 0:
+            f.write("[\n")
+        f.write(json.dumps(record, default=str) + ",\n")
+
+
+def stage(name, category="stage", **args):
+    if not TRACE_ENABLED:
+        return NULL_STAGE
+    return Stage(name, category, args)
+
+
+# ------------------------------------------------------------
+# Decorator: one stage per call, frame stats of the result
+# ------------------------------------------------------------
+def traced(name=None, category="stage"):
+    def decorate(function):
+        if not TRACE_ENABLED:
+            return function
+
+        stage_name = name or f"{function.__module__}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Stage(stage_name, category, {}) as current:
+                result = function(*args, **kwargs)
+                current.record_frame(result)
+                return result
+        return wrapper
+
+    return decorate
+
+
+# ------------------------------------------------------------
+# One stage per item fetched from an iterator (chunked reads)
+# ------------------------------------------------------------
+def traced_chunks(name, chunks, category="sql"):
+    if not TRACE_ENABLED:
+        return chunks
+    return _traced_chunks(name, iter(chunks), category)
+
+
+def _traced_chunks(name, chunks, category):
+    index = 0
+    while True:
+        with Stage(name, category, {"chunk": index}) as current:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                current.record_frame(chunk)
+        if chunk is None:
+            return
+        yield chunk
+        index += 1
+
+
+if TRACE_ENABLED:
+    _setup()
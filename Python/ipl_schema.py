@@ -0,0 +1,249 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Table Schemas and Typed Loading
+#
+# This script defines the column types of ball_by_ball_data and
+# ipl_matches_data and reads them into compact pandas dtypes:
+#   - player, team and style columns -> category
+#   - runs, overs, balls, innings     -> int8 / int16
+#   - TRUE/FALSE flags                -> bool
+#   - "NULL" and blank fields         -> missing value
+#     (except stage, where blank means a league match)
+#
+# Columns that are compared with each other (toss_winner vs
+# match_winner, batter vs player_out, ...) share one category
+# dtype so the comparison works without casting.
+#
+# apply_schema() gives the same types to a frame read from SQL
+# Server, so the scripts never need TRY_CAST / pd.to_numeric.
+# ============================================================
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from instrumentation import traced
+
+
+# ----- ball_by_ball_data -----
+DELIVERY_SCHEMA = {
+    "season_id": "int16",
+    "match_id": "int32",
+    "batter": "category",
+    "bowler": "category",
+    "non_striker": "category",
+    "team_batting": "category",
+    "team_bowling": "category",
+    "over_number": "int8",
+    "ball_number": "int8",
+    "batter_runs": "int8",
+    "extras": "int8",
+    "total_runs": "int8",
+    "batsman_type": "category",
+    "bowler_type": "category",
+    "player_out": "category",
+    "fielders_involved": "category",
+    "is_wicket": "bool",
+    "is_wide_ball": "bool",
+    "is_no_ball": "bool",
+    "is_leg_bye": "bool",
+    "is_bye": "bool",
+    "is_penalty": "bool",
+    "wide_ball_runs": "int8",
+    "no_ball_runs": "int8",
+    "leg_bye_runs": "int8",
+    "bye_runs": "int8",
+    "penalty_runs": "int8",
+    "wicket_kind": "category",
+    "is_super_over": "bool",
+    "innings": "int8",
+}
+
+DELIVERY_SHARED_CATEGORIES = [
+    ["batter", "bowler", "non_striker", "player_out"],
+    ["team_batting", "team_bowling"],
+]
+
+
+# ----- ipl_matches_data -----
+MATCH_SCHEMA = {
+    "match_id": "int32",
+    "season_id": "int16",
+    "balls_per_over": "int8",
+    "city": "category",
+    "match_date": "datetime",
+    "event_name": "category",
+    "match_number": "Int16",
+    "gender": "category",
+    "match_type": "category",
+    "format": "category",
+    "overs": "int8",
+    "season": "category",
+    "team_type": "category",
+    "venue": "category",
+    "toss_winner": "category",
+    "team1": "category",
+    "team2": "category",
+    "toss_decision": "category",
+    "match_winner": "category",
+    "win_by_runs": "Int16",
+    "win_by_wickets": "Int8",
+    "player_of_match": "category",
+    "result": "category",
+    "stage": "category",
+}
+
+MATCH_SHARED_CATEGORIES = [
+    ["toss_winner", "team1", "team2", "match_winner"],
+]
+
+MATCH_DATE_FORMAT = "%d-%m-%Y"
+
+NULL_TOKENS = ["NULL"]
+
+# columns where a blank field is a value, not a missing one
+BLANK_VALUE_COLUMNS = ["stage"]
+
+
+def null_tokens(column):
+    return NULL_TOKENS if column in BLANK_VALUE_COLUMNS else NULL_TOKENS + [""]
+
+
+# ------------------------------------------------------------
+# Give columns in the same group one common category dtype
+# ------------------------------------------------------------
+def unify_categories(df, groups):
+    for group in groups:
+        columns = [column for column in group if column in df.columns]
+        if len(columns) < 2:
+            continue
+
+        categories = union_categoricals(
+            [df[column].astype("category") for column in columns]
+        ).categories
+        dtype = pd.CategoricalDtype(categories.sort_values())
+
+        for column in columns:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+# ------------------------------------------------------------
+# Drop categories no row uses (e.g. after filtering rows), then
+# give shared groups one dtype again
+# ------------------------------------------------------------
+def compact_categories(df, groups):
+    columns = df.select_dtypes("category").columns
+    df = df.assign(**{column: df[column].cat.remove_unused_categories() for column in columns})
+    return unify_categories(df, groups)
+
+
+def _parse_flags(column):
+    if column.dtype == bool:
+        return column
+    text = column.astype("string").str.strip().str.upper()
+    return text.isin(["1", "TRUE"]).fillna(False).astype(bool)
+
+
+# ------------------------------------------------------------
+# Convert an untyped frame (e.g. from SQL Server) to the schema
+# ------------------------------------------------------------
+@traced(category="pandas")
+def apply_schema(df, schema, shared_categories=()):
+    df = df.copy()
+
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+
+        values = df[column]
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            values = values.replace({token: None for token in null_tokens(column)})
+
+        if dtype == "bool":
+            df[column] = _parse_flags(values)
+        elif dtype == "category":
+            df[column] = values.astype("category")
+        elif dtype == "datetime":
+            df[column] = pd.to_datetime(values, format=MATCH_DATE_FORMAT, errors="coerce")
+        else:
+            numbers = pd.to_numeric(values, errors="coerce")
+            if numbers.isna().any() and dtype[0].islower():
+                dtype = dtype.capitalize()  # nullable integer
+            df[column] = numbers.astype(dtype)
+
+    return unify_categories(df, shared_categories)
+
+
+# ------------------------------------------------------------
+# Category columns back to plain values (for small result
+# tables, so charts do not show unused categories)
+# ------------------------------------------------------------
+def plain_labels(df):
+    columns = df.select_dtypes("category").columns
+    return df.astype({column: object for column in columns})
+
+
+# ------------------------------------------------------------
+# Read a CSV file straight into the schema types
+# ------------------------------------------------------------
+def read_typed_csv(path, schema, shared_categories=(), encoding="utf-8", usecols=None, **kwargs):
+    dtypes = {}
+    parse_dates = []
+    na_values = {}
+    for column, dtype in schema.items():
+        if usecols is not None and column not in usecols:
+            continue
+        na_values[column] = null_tokens(column)
+        if dtype == "datetime":
+            parse_dates.append(column)
+        else:
+            dtypes[column] = dtype
+
+    df = pd.read_csv(
+        path,
+        encoding=encoding,
+        usecols=usecols,
+        dtype=dtypes,
+        na_values=na_values,
+        keep_default_na=False,
+        true_values=["TRUE", "1"],
+        false_values=["FALSE", "0"],
+        parse_dates=parse_dates or None,
+        date_format=MATCH_DATE_FORMAT if parse_dates else None,
+        **kwargs,
+    )
+
+    # chunked reading returns an iterator of frames
+    if kwargs.get("chunksize"):
+        return df
+    return unify_categories(df, shared_categories)
+
+
+def read_deliveries_csv(path, **kwargs):
+    return read_typed_csv(path, DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, **kwargs)
+
+
+def read_matches_csv(path, **kwargs):
+    return read_typed_csv(path, MATCH_SCHEMA, MATCH_SHARED_CATEGORIES, **kwargs)
+
+
+# ------------------------------------------------------------
+# Memory comparison when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import os
+    from local_backend import DATA_DIR
+
+    for file_name, reader in [
+        ("ball_by_ball_data.csv", read_deliveries_csv),
+        ("ipl_matches_data.csv", read_matches_csv),
+    ]:
+        path = os.path.join(DATA_DIR, file_name)
+        untyped = pd.read_csv(path, dtype=str, keep_default_na=False)
+        typed = reader(path)
+
+        untyped_mb = untyped.memory_usage(deep=True).sum() / 1e6
+        typed_mb = typed.memory_usage(deep=True).sum() / 1e6
+        print(f"{file_name}: {untyped_mb:.2f} MB as strings -> {typed_mb:.2f} MB typed "
+              f"({untyped_mb / typed_mb:.1f}x smaller)")
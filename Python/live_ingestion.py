@@ -0,0 +1,357 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Live Delivery Ingestion
+#
+# This script keeps the leaderboards of load_sql_results.py
+#   top_batters   - runs off the bat per batter
+#   strike_rate   - runs per 100 balls faced (wides excluded)
+#   top_bowlers   - wickets per bowler
+#   economy_rate  - runs per over on legal balls
+# up to date while deliveries are appended one ball (or one
+# micro-batch) at a time, without re-reading earlier balls:
+#   - per player running totals, updated in O(1) per ball
+#   - one heap per leaderboard; a changed score is pushed
+#     again and the old entry is dropped when it reaches the
+#     top (lazy deletion), so an update costs O(log n) and a
+#     top-k read O(k log n)
+#   - append() takes one record, append_batch() a DataFrame
+#     or list of records (typed or CSV text), append_rows()
+#     already typed tuples
+#   - snapshot() returns a consistent copy of every board,
+#     so readers can run in another thread while balls arrive
+#   - subscribe() registers callbacks run after every append
+#
+# The same definitions as metrics_engine.py are used, so the
+# boards after a full replay match load_sql_results.py.
+#
+# The replay harness feeds ball_by_ball_data.csv in match and
+# ball order at a given speed (--speed balls per second, 0 for
+# as fast as possible) and reports the sustained balls/s.
+#
+# Usage:
+#   python live_ingestion.py --speed 0 --batch-size 6 --check
+# ============================================================
+
+import heapq
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from delivery_index import SORT_COLUMNS
+
+
+# ----- Ingestion Details -----
+RECORD_COLUMNS = [
+    "batter", "bowler", "batter_runs", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball",
+]
+TRUE_VALUES = {"1", "TRUE"}
+
+DEFAULT_TOP_K = 10
+DEFAULT_BATCH_SIZE = 6  # one over
+DEFAULT_REPORT_EVERY = 1.0  # seconds between progress lines
+
+# heap is rebuilt when stale entries outnumber live ones this much
+COMPACT_FACTOR = 4
+COMPACT_MIN = 1024
+
+
+def _flag(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return False
+    return str(value).strip().upper() in TRUE_VALUES
+
+
+def _number(value):
+    if value is None or value == "" or (isinstance(value, float) and np.isnan(value)):
+        return 0
+    return int(value)
+
+
+# ============================================================
+# TOP-K LEADERBOARD (heap with lazy deletion)
+# ============================================================
+
+class Leaderboard:
+    def __init__(self, ascending=False):
+        self.ascending = ascending
+        self.heap = []
+        self.latest = {}  # key -> (score, sequence of its live entry)
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.latest)
+
+    def _entry(self, key, score, sequence):
+        # ties: the player who reached the score first ranks first
+        return (score if self.ascending else -score, sequence, key)
+
+    def update(self, key, score):
+        self.sequence += 1
+        self.latest[key] = (score, self.sequence)
+        heapq.heappush(self.heap, self._entry(key, score, self.sequence))
+        if len(self.heap) > COMPACT_FACTOR * len(self.latest) + COMPACT_MIN:
+            self._compact()
+
+    def _compact(self):
+        self.heap = [self._entry(key, score, sequence) for key, (score, sequence) in self.latest.items()]
+        heapq.heapify(self.heap)
+
+    def score(self, key):
+        return self.latest[key][0]
+
+    # (key, score) of the k best, stale entries are dropped on the way
+    def top(self, k=DEFAULT_TOP_K):
+        found = []
+        while self.heap and len(found) < k:
+            entry = heapq.heappop(self.heap)
+            live = self.latest.get(entry[2])
+            if live is not None and live[1] == entry[1]:
+                found.append(entry)
+        for entry in found:
+            heapq.heappush(self.heap, entry)
+        return [(key, self.latest[key][0]) for _, _, key in found]
+
+
+# ============================================================
+# RUNNING AGGREGATES
+# ============================================================
+
+class LiveMetrics:
+    def __init__(self, min_balls=0):
+        # strike rate / economy boards only list players with
+        # at least min_balls legal balls (0: everyone, as in SQL)
+        self.min_balls = min_balls
+        self.balls = 0
+
+        self.batters = {}  # batter -> [runs, runs off non-wides, balls faced]
+        self.bowlers = {}  # bowler -> [wickets, runs conceded on legal balls, legal balls]
+        self.boards = {
+            "top_batters": Leaderboard(),
+            "strike_rate": Leaderboard(),
+            "top_bowlers": Leaderboard(),
+            "economy_rate": Leaderboard(ascending=True),
+        }
+
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    # ========================================================
+    # APPEND
+    # ========================================================
+
+    def _add(self, batter, bowler, batter_runs, total_runs, is_wicket, is_wide, is_no_ball):
+        boards = self.boards
+
+        batting = self.batters.get(batter)
+        if batting is None:
+            batting = self.batters[batter] = [0, 0, 0]
+        batting[0] += batter_runs
+        if batter_runs or batter not in boards["top_batters"].latest:
+            boards["top_batters"].update(batter, batting[0])
+        if not is_wide:
+            batting[1] += batter_runs
+            batting[2] += 1
+            if batting[2] >= self.min_balls:
+                boards["strike_rate"].update(batter, batting[1] * 100.0 / batting[2])
+
+        bowling = self.bowlers.get(bowler)
+        if bowling is None:
+            bowling = self.bowlers[bowler] = [0, 0, 0]
+        if is_wicket:
+            bowling[0] += 1
+            boards["top_bowlers"].update(bowler, bowling[0])
+        if not is_wide and not is_no_ball:
+            bowling[1] += total_runs
+            bowling[2] += 1
+            if bowling[2] >= self.min_balls:
+                boards["economy_rate"].update(bowler, bowling[1] / (bowling[2] / 6.0))
+
+        self.balls += 1
+
+    def _notify(self):
+        for callback in self.subscribers:
+            callback(self)
+
+    # one delivery: a dict (or Series) with RECORD_COLUMNS,
+    # typed or as CSV text
+    def append(self, record):
+        with self.lock:
+            self._add(
+                record["batter"], record["bowler"],
+                _number(record["batter_runs"]), _number(record["total_runs"]),
+                _flag(record["is_wicket"]), _flag(record["is_wide_ball"]), _flag(record["is_no_ball"]),
+            )
+        self._notify()
+
+    # a micro-batch: DataFrame or list of records, in ball order
+    def append_batch(self, records):
+        if not isinstance(records, pd.DataFrame):
+            records = pd.DataFrame(list(records), columns=RECORD_COLUMNS)
+
+        # missing names become None, one key like GROUP BY NULL
+        columns = [records[column].astype(object).where(records[column].notna(), None).tolist()
+                   for column in RECORD_COLUMNS[:2]]
+        for column in RECORD_COLUMNS[2:4]:
+            columns.append(pd.to_numeric(records[column], errors="coerce").fillna(0).astype("int64").tolist())
+        for column in RECORD_COLUMNS[4:]:
+            values = records[column]
+            columns.append(values.tolist() if values.dtype == bool else [_flag(value) for value in values])
+
+        self.append_rows(list(zip(*columns)))
+
+    # typed tuples in RECORD_COLUMNS order, no conversion
+    def append_rows(self, rows):
+        with self.lock:
+            for row in rows:
+                self._add(*row)
+        self._notify()
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    # ========================================================
+    # SNAPSHOT READS
+    # ========================================================
+
+    def snapshot(self, k=DEFAULT_TOP_K):
+        with self.lock:
+            boards = {name: board.top(k) for name, board in self.boards.items()}
+            batting = {batter: tuple(self.batters[batter]) for batter, _ in boards["strike_rate"]}
+            balls = self.balls
+
+        # rounded like metrics_engine.py (numpy, not Python round())
+        strike_rate = pd.DataFrame(
+            [(batter, batting[batter][1], batting[batter][2], score)
+             for batter, score in boards["strike_rate"]],
+            columns=["batter", "total_runs", "balls_faced", "strike_rate"],
+        )
+        strike_rate["strike_rate"] = strike_rate["strike_rate"].round(2)
+        economy_rate = pd.DataFrame(boards["economy_rate"], columns=["bowler", "economy_rate"])
+        economy_rate["economy_rate"] = economy_rate["economy_rate"].round(2)
+        return {
+            "balls": balls,
+            "top_batters": pd.DataFrame(boards["top_batters"], columns=["batter", "total_runs"]),
+            "strike_rate": strike_rate,
+            "top_bowlers": pd.DataFrame(boards["top_bowlers"], columns=["bowler", "total_wickets"]),
+            "economy_rate": economy_rate,
+        }
+
+
+# ============================================================
+# REPLAY HARNESS
+# ============================================================
+
+# typed rows in ball order, decoded once like a live feed
+def replay_deliveries():
+    balls = local_backend.load_table("ball_by_ball_data")
+    order = np.lexsort([balls[column].to_numpy() for column in reversed(SORT_COLUMNS)])
+    balls = balls.iloc[order][RECORD_COLUMNS]
+
+    columns = [balls[column].astype(object).where(balls[column].notna(), None).tolist()
+               for column in RECORD_COLUMNS[:2]]
+    columns += [balls[column].to_numpy().astype("int64").tolist() for column in RECORD_COLUMNS[2:4]]
+    columns += [balls[column].to_numpy().astype(bool).tolist() for column in RECORD_COLUMNS[4:]]
+    return list(zip(*columns))
+
+
+def replay(live, balls, speed=0, batch_size=DEFAULT_BATCH_SIZE, report_every=DEFAULT_REPORT_EVERY):
+    start = time.perf_counter()
+    busy = 0.0
+    next_report = start + report_every
+
+    for offset in range(0, len(balls), batch_size):
+        batch = balls[offset:offset + batch_size]
+        began = time.perf_counter()
+        live.append_rows(batch)
+        busy += time.perf_counter() - began
+
+        appended = offset + len(batch)
+        if speed > 0:
+            # hold back to the requested balls per second
+            delay = start + appended / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        now = time.perf_counter()
+        if report_every and now >= next_report:
+            print(f"  {appended:>10,} balls  {appended / (now - start):>10,.0f} balls/s", flush=True)
+            next_report = now + report_every
+
+    elapsed = time.perf_counter() - start
+    return {
+        "balls": len(balls),
+        "seconds": elapsed,
+        "balls_per_second": len(balls) / elapsed if elapsed > 0 else float("inf"),
+        "ingest_balls_per_second": len(balls) / busy if busy > 0 else float("inf"),
+    }
+
+
+# ------------------------------------------------------------
+# Boards after the replay against metrics_engine.py
+# ------------------------------------------------------------
+def check_against_engine(live, k=DEFAULT_TOP_K):
+    from metrics_engine import compute_delivery_metrics
+
+    expected = compute_delivery_metrics(local_backend.load_table("ball_by_ball_data"))
+    snapshot = live.snapshot(k)
+    value_columns = {
+        "top_batters": "total_runs", "strike_rate": "strike_rate",
+        "top_bowlers": "total_wickets", "economy_rate": "economy_rate",
+    }
+
+    mismatches = []
+    for name, column in value_columns.items():
+        # compare the scores, players tied on a score may be listed in any order
+        got = snapshot[name][column].tolist()
+        want = expected[name][column].head(k).tolist()
+        if got != want:
+            mismatches.append(f"{name}: {got} != {want}")
+    return mismatches
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay ball_by_ball_data.csv through the live leaderboards.")
+    parser.add_argument("--speed", type=float, default=0, help="balls per second (0: as fast as possible)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="balls per append")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_K, help="players per leaderboard")
+    parser.add_argument("--min-balls", type=int, default=0, help="balls needed for strike rate / economy")
+    parser.add_argument("--check", action="store_true", help="compare the final boards with metrics_engine.py")
+    args = parser.parse_args()
+
+    balls = replay_deliveries()
+    live = LiveMetrics(min_balls=args.min_balls)
+    speed = f"{args.speed:,.0f} balls/s" if args.speed > 0 else "full speed"
+    print(f"Replaying {len(balls):,} deliveries from {local_backend.DATA_DIR} "
+          f"({speed}, {args.batch_size} per append)")
+
+    result = replay(live, balls, args.speed, args.batch_size)
+    print(f"Done in {result['seconds']:.2f} s: {result['balls_per_second']:,.0f} balls/s sustained, "
+          f"{result['ingest_balls_per_second']:,.0f} balls/s spent appending")
+
+    start = time.perf_counter()
+    snapshot = live.snapshot(args.top)
+    print(f"\nSnapshot after {snapshot['balls']:,} balls ({(time.perf_counter() - start) * 1000:.3f} ms):")
+    for name in ["top_batters", "strike_rate", "top_bowlers", "economy_rate"]:
+        print(f"\n{name}:")
+        print(snapshot[name].to_string(index=False))
+
+    if args.check:
+        mismatches = check_against_engine(live, args.top)
+        print("\nMatches metrics_engine.py" if not mismatches else "\nDiffers from metrics_engine.py:")
+        for line in mismatches:
+            print(f"  {line}")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
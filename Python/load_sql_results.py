@@ -3,184 +3,145 @@
 # IPL Performance Analysis
 # Load SQL Query Results into Pandas
 #
-# This script executes analysis queries from SQL Server and
-# loads the results into pandas DataFrames. These DataFrames
-# will be used later for visualization and insights.
+# This script loads the delivery and match rows from SQL Server
+# and computes the analysis metrics from them in a single pass
+# (see metrics_engine.py). The resulting DataFrames will be
+# used later for visualization and insights.
+#
+# Nothing runs at import time. Each metric is computed on first
+# access and kept in memory:
+#
+#   from load_sql_results import get_metric
+#   top_batters = get_metric("top_batters", season=2017)
+#
+# season / team / venue / innings filters (query_filters.py)
+# are sent to SQL Server as bound parameters, so only the
+# matching rows are fetched.
+#
+# Player / team keys (batter_id, ...) are resolved from the
+# fetched names (dimensions.py), so they are available even for
+# tables that were not loaded with them.
+#
+# With IPL_BACKEND=csv the rows are read from the local CSV
+# files instead (see local_backend.py).
 # ============================================================
 
-import pandas as pd
 from sqlalchemy import text
-from database_connection import engine
 
+import local_backend
+from dimensions import KEY_COLUMNS, attach_ids
+from local_backend import BACKEND
+from instrumentation import stage
+from query_cache import read_sql_cached
+from query_filters import applicable, filtered_table_sql, filters_key, make_filters
+from metrics_engine import (
+    DELIVERY_COLUMNS,
+    MATCH_COLUMNS,
+    compute_delivery_metrics,
+    compute_match_metrics,
+)
 
-# ------------------------------------------------------------
-# Helper function to execute query and return DataFrame
-# ------------------------------------------------------------
-def load_query(query):
-    with engine.connect() as conn:
-        df = pd.read_sql(text(query), conn)
-    return df
 
+# Metrics computed from each source table
+DELIVERY_METRICS = [
+    "avg_first_innings_score",  # average first innings score per season
+    "top_batters",
+    "strike_rate",
+    "top_bowlers",
+    "economy_rate",
+]
 
-# ============================================================
-# MATCH ANALYSIS DATA
-# ============================================================
+MATCH_METRICS = [
+    "matches_per_season",
+    "match_result_type",  # winning type distribution
+    "team_win_percentage",
+    "toss_win_percentage",
+    "player_of_match",
+]
 
-# Matches per season
-matches_per_season = load_query("""
-SELECT season_id, COUNT(DISTINCT match_id) AS total_matches
-FROM dbo.ipl_matches_data
-GROUP BY season_id
-ORDER BY season_id
-""")
-
-
-# Average first innings score per season
-avg_first_innings_score = load_query("""
-WITH first_innings_score AS (
-    SELECT match_id, season_id, SUM(total_runs) AS first_innings_runs
-    FROM dbo.ball_by_ball_data
-    WHERE innings = 1
-    GROUP BY match_id, season_id
-)
-SELECT season_id,
-ROUND(AVG(first_innings_runs),2) AS avg_first_innings_score
-FROM first_innings_score
-GROUP BY season_id
-ORDER BY season_id
-""")
-
-
-# Winning type distribution
-match_result_type = load_query("""
-SELECT
-CASE
-    WHEN TRY_CAST(win_by_runs AS INT) > 0 THEN 'Defending Team Won'
-    WHEN TRY_CAST(win_by_wickets AS INT) > 0 THEN 'Chasing Team Won'
-    ELSE 'No Result'
-END AS match_result_type,
-COUNT(*) AS total_matches
-FROM dbo.ipl_matches_data
-GROUP BY
-CASE
-    WHEN TRY_CAST(win_by_runs AS INT) > 0 THEN 'Defending Team Won'
-    WHEN TRY_CAST(win_by_wickets AS INT) > 0 THEN 'Chasing Team Won'
-    ELSE 'No Result'
-END
-""")
+METRICS = DELIVERY_METRICS + MATCH_METRICS
 
+# loaded source tables and computed metrics, filled on first use
+_sources = {}
+_metrics = {}
 
-# ============================================================
-# BATTING DATA
-# ============================================================
 
-top_batters = load_query("""
-SELECT batter, SUM(TRY_CAST(batter_runs AS INT)) AS total_runs
-FROM dbo.ball_by_ball_data
-GROUP BY batter
-ORDER BY total_runs DESC
-""")
+# ------------------------------------------------------------
+# Helper function to execute query and return DataFrame
+# ------------------------------------------------------------
+def load_query(query, params=None):
+    from database_connection import get_engine
+
+    with stage("load_query", category="sql") as current:
+        with get_engine().connect() as conn:
+            df = read_sql_cached(text(query), conn, params)
+        current.record_frame(df)
+    return df
 
 
-strike_rate = load_query("""
-SELECT
-batter,
-SUM(TRY_CAST(batter_runs AS INT)) AS total_runs,
-COUNT(*) AS balls_faced,
-ROUND(SUM(TRY_CAST(batter_runs AS INT)) * 100.0 / COUNT(*),2) AS strike_rate
-FROM dbo.ball_by_ball_data
-WHERE is_wide_ball = 0
-GROUP BY batter
-ORDER BY strike_rate DESC
-""")
+# ------------------------------------------------------------
+# Load the columns of one table from the active backend
+# ------------------------------------------------------------
+def load_table_columns(table_name, columns, filters=None):
+    if BACKEND == "csv":
+        return local_backend.load_filtered_table(table_name, filters_key(filters))[columns]
 
+    keys = [column for column in columns if column in KEY_COLUMNS]
+    if not keys:
+        query, params = filtered_table_sql(table_name, columns, filters)
+        return load_query(query, params)
 
-# ============================================================
-# BOWLING DATA
-# ============================================================
+    # fetch the names behind the keys and resolve them here
+    names = [key[:-len("_id")] for key in keys]
+    fetched = [column for column in columns if column not in keys]
+    fetched += [name for name in names if name not in fetched]
+    query, params = filtered_table_sql(table_name, fetched, filters)
+    return attach_ids(load_query(query, params))[columns]
 
-top_bowlers = load_query("""
-SELECT bowler, COUNT(*) AS total_wickets
-FROM dbo.ball_by_ball_data
-WHERE is_wicket = 1
-GROUP BY bowler
-ORDER BY total_wickets DESC
-""")
-
-
-economy_rate = load_query("""
-WITH bowler_runs AS (
-SELECT bowler,
-SUM(TRY_CAST(total_runs AS INT)) AS runs_conceded,
-COUNT(*) AS balls_bowled
-FROM dbo.ball_by_ball_data
-WHERE is_wide_ball = 0 AND is_no_ball = 0
-GROUP BY bowler
-)
-SELECT bowler,
-ROUND(runs_conceded / (balls_bowled / 6.0),2) AS economy_rate
-FROM bowler_runs
-ORDER BY economy_rate ASC
-""")
 
+def load_source(table_name, **filters):
+    filters = applicable(table_name, make_filters(**filters))
+    key = (table_name, filters_key(filters))
+    if key not in _sources:
+        columns = DELIVERY_COLUMNS if table_name == "ball_by_ball_data" else MATCH_COLUMNS
+        _sources[key] = load_table_columns(table_name, columns, filters)
+    return _sources[key]
 
-# ============================================================
-# TEAM PERFORMANCE
-# ============================================================
 
-team_win_percentage = load_query("""
-SELECT
-m.team_name,
-w.total_wins,
-m.total_matches,
-ROUND((CAST(w.total_wins AS FLOAT) / m.total_matches) * 100,2) AS win_percentage
-FROM
-(
-SELECT team_name, COUNT(*) AS total_matches
-FROM (
-SELECT team1 AS team_name FROM dbo.ipl_matches_data
-UNION ALL
-SELECT team2 AS team_name FROM dbo.ipl_matches_data
-) t
-GROUP BY team_name
-) m
-LEFT JOIN
-(
-SELECT match_winner AS team_name, COUNT(*) AS total_wins
-FROM dbo.ipl_matches_data
-WHERE match_winner IS NOT NULL
-GROUP BY match_winner
-) w
-ON m.team_name = w.team_name
-ORDER BY win_percentage DESC
-""")
+# ------------------------------------------------------------
+# Get one metric (computed lazily, then memoized)
+# ------------------------------------------------------------
+def get_metric(name, season=None, team=None, venue=None, innings=None):
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric {name!r}, expected one of {METRICS}")
 
+    filters = make_filters(season=season, team=team, venue=venue, innings=innings)
+    key = (name, filters_key(filters))
+    if key not in _metrics:
+        # all metrics of the same table come out of one pass
+        if name in DELIVERY_METRICS:
+            computed = compute_delivery_metrics(load_source("ball_by_ball_data", **filters))
+        else:
+            computed = compute_match_metrics(load_source("ipl_matches_data", **filters))
 
-# ============================================================
-# TOSS IMPACT
-# ============================================================
+        for metric_name, df in computed.items():
+            _metrics[(metric_name, key[1])] = df
 
-toss_win_percentage = load_query("""
-SELECT
-ROUND(
-COUNT(CASE WHEN toss_winner = match_winner THEN 1 END) * 100.0
-/ COUNT(*),2) AS toss_win_percentage
-FROM dbo.ipl_matches_data
-WHERE toss_winner IS NOT NULL AND match_winner IS NOT NULL
-""")
+    return _metrics[key]
 
 
-# ============================================================
-# PLAYER IMPACT
-# ============================================================
+# sources=False keeps the fetched tables (recompute only)
+def clear_metrics(sources=True):
+    if sources:
+        _sources.clear()
+    _metrics.clear()
+
 
-player_of_match = load_query("""
-SELECT player_of_match AS player, COUNT(*) AS total_awards
-FROM dbo.ipl_matches_data
-WHERE player_of_match IS NOT NULL
-GROUP BY player_of_match
-ORDER BY total_awards DESC
-""")
+# Keeps "load_sql_results.top_batters" style access working
+def __getattr__(name):
+    if name in METRICS:
+        return get_metric(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ------------------------------------------------------------
@@ -188,10 +149,10 @@ ORDER BY total_awards DESC
 # ------------------------------------------------------------
 if __name__ == "__main__":
     print("\nMatches Per Season:")
-    print(matches_per_season.head())
+    print(get_metric("matches_per_season").head())
 
     print("\nTop Batters:")
-    print(top_batters.head())
+    print(get_metric("top_batters").head())
 
     print("\nTop Bowlers:")
-    print(top_bowlers.head())
\ No newline at end of file
+    print(get_metric("top_bowlers").head())
@@ -0,0 +1,194 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Local CSV Backend
+#
+# This script loads the CSV files in "IPL Data" once into
+# typed, in-memory pandas tables (column types from
+# ipl_schema.py, player / team keys from dimensions.py) and
+# computes the same
+# aggregates as the SQL queries in load_sql_results.py, so the
+# analysis can run on machines without SQL Server.
+#
+# Select the backend with the IPL_BACKEND environment variable:
+#   IPL_BACKEND=sql  -> MS SQL Server over ODBC (default)
+#   IPL_BACKEND=csv  -> local CSV files
+# ============================================================
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import columnar_store
+from columnar_store import read_deliveries
+from dimensions import attach_ids
+from ipl_schema import (
+    DELIVERY_SHARED_CATEGORIES,
+    MATCH_SHARED_CATEGORIES,
+    compact_categories,
+    read_matches_csv,
+)
+from metrics_engine import compute_delivery_metrics, compute_match_metrics
+from query_filters import applicable, filter_mask, filters_key, make_filters, mask_columns
+
+
+# ----- Backend Details -----
+BACKEND = os.environ.get("IPL_BACKEND", "sql").strip().lower()
+
+DATA_DIR = os.environ.get(
+    "IPL_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPL Data"),
+)
+
+# table name -> (file name, encoding)
+TABLE_FILES = {
+    "ball_by_ball_data": ("ball_by_ball_data.csv", "utf-8"),
+    "ipl_matches_data": ("ipl_matches_data.csv", "utf-8"),
+    "players_data_updated": ("players_data_updated.csv", "latin-1"),
+    "teams_data": ("teams_data.csv", "utf-8"),
+}
+
+
+# tables with a typed schema in ipl_schema.py
+# (deliveries are read through the memory-mapped columnar store)
+TYPED_READERS = {
+    "ball_by_ball_data": read_deliveries,
+    "ipl_matches_data": read_matches_csv,
+}
+
+SHARED_CATEGORIES = {
+    "ball_by_ball_data": DELIVERY_SHARED_CATEGORIES,
+    "ipl_matches_data": MATCH_SHARED_CATEGORIES,
+}
+
+
+# ------------------------------------------------------------
+# Load one CSV table ("NULL" is read as missing, TRUE/FALSE as bool)
+# ------------------------------------------------------------
+@lru_cache(maxsize=None)
+def load_table(name):
+    file_name, encoding = TABLE_FILES[name]
+    path = os.path.join(DATA_DIR, file_name)
+
+    if name in TYPED_READERS:
+        return attach_ids(TYPED_READERS[name](path, encoding=encoding))
+
+    df = pd.read_csv(
+        path,
+        encoding=encoding,
+        na_values=["NULL"],
+        keep_default_na=False,
+        true_values=["TRUE"],
+        false_values=["FALSE"],
+    )
+    return df
+
+
+def load_tables():
+    return {name: load_table(name) for name in TABLE_FILES}
+
+
+# ------------------------------------------------------------
+# One table restricted by season / team / venue / innings
+# (query_filters.py). For deliveries in the columnar store only
+# the filter columns are read in full; the other columns are
+# read for the matching rows only.
+# ------------------------------------------------------------
+@lru_cache(maxsize=32)
+def load_filtered_table(name, filter_items=()):
+    filters = applicable(name, dict(filter_items))
+    if not filters:
+        return load_table(name)
+
+    all_matches = load_table("ipl_matches_data")
+
+    if name == "ball_by_ball_data" and columnar_store.ENABLED:
+        file_name, encoding = TABLE_FILES[name]
+        store = columnar_store.open_deliveries(os.path.join(DATA_DIR, file_name), encoding=encoding)
+        mask = filter_mask(store.frame(mask_columns(name, filters)), name, filters, all_matches)
+        df = attach_ids(store.frame(rows=np.flatnonzero(mask)))
+    else:
+        df = load_table(name)
+        df = df[filter_mask(df, name, filters, all_matches)].reset_index(drop=True)
+
+    # same categories as if only these rows had been loaded
+    return compact_categories(df, SHARED_CATEGORIES[name])
+
+
+def deliveries(**filters):
+    return load_filtered_table("ball_by_ball_data", filters_key(make_filters(**filters)))
+
+
+def matches(**filters):
+    return load_filtered_table("ipl_matches_data", filters_key(make_filters(**filters)))
+
+
+# ============================================================
+# METRICS
+# (computed for all metrics at once by metrics_engine.py)
+# ============================================================
+
+@lru_cache(maxsize=None)
+def delivery_metrics(**filters):
+    return compute_delivery_metrics(deliveries(**filters))
+
+
+@lru_cache(maxsize=None)
+def match_metrics(**filters):
+    return compute_match_metrics(matches(**filters))
+
+
+def matches_per_season(**filters):
+    return match_metrics(**filters)["matches_per_season"]
+
+
+def avg_first_innings_score(**filters):
+    return delivery_metrics(**filters)["avg_first_innings_score"]
+
+
+def match_result_type(**filters):
+    return match_metrics(**filters)["match_result_type"]
+
+
+def top_batters(**filters):
+    return delivery_metrics(**filters)["top_batters"]
+
+
+def strike_rate(**filters):
+    return delivery_metrics(**filters)["strike_rate"]
+
+
+def top_bowlers(**filters):
+    return delivery_metrics(**filters)["top_bowlers"]
+
+
+def economy_rate(**filters):
+    return delivery_metrics(**filters)["economy_rate"]
+
+
+def team_win_percentage(**filters):
+    return match_metrics(**filters)["team_win_percentage"]
+
+
+def toss_win_percentage(**filters):
+    return match_metrics(**filters)["toss_win_percentage"]
+
+
+def player_of_match(**filters):
+    return match_metrics(**filters)["player_of_match"]
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    for table_name, table in load_tables().items():
+        print(f"{table_name}: {len(table)} rows, {table.shape[1]} columns")
+
+    print("\nTop Batters:")
+    print(top_batters().head())
+
+    print("\nTeam Win Percentage:")
+    print(team_win_percentage().head())
@@ -7,176 +7,258 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sqlalchemy import text
-from database_connection import engine
+
+import local_backend
+from instrumentation import traced
+from ipl_schema import MATCH_SCHEMA, MATCH_SHARED_CATEGORIES, apply_schema, plain_labels
+from local_backend import BACKEND
+from match_features import counts_frame, match_result, toss_result
+from query_executor import fetch_all
+from query_filters import describe, filter_queries, parse_filters
 
 sns.set_style("whitegrid")
 plt.rcParams["figure.figsize"] = (12,6)
 
 
 # ============================================================
-# LOAD MATCH TABLE ONCE (and fix datatypes)
+# QUERIES (independent, fetched concurrently)
 # ============================================================
 
-print("Loading dataset from SQL Server...")
-
-matches_df = pd.read_sql(text("SELECT * FROM dbo.ipl_matches_data"), engine)
+# Match table is loaded once and reused by charts 1, 4 and 6
+matches_query = text("SELECT * FROM dbo.ipl_matches_data")
 
-# ---- FIX DATATYPES (IMPORTANT) ----
-matches_df["win_by_runs"] = pd.to_numeric(matches_df["win_by_runs"], errors="coerce").fillna(0)
-matches_df["win_by_wickets"] = pd.to_numeric(matches_df["win_by_wickets"], errors="coerce").fillna(0)
+top_batters_query = text("""
+SELECT TOP 10 batter, SUM(CAST(batter_runs AS INT)) AS total_runs
+FROM dbo.ball_by_ball_data
+GROUP BY batter
+ORDER BY total_runs DESC
+""")
 
+top_bowlers_query = text("""
+SELECT TOP 10 bowler, COUNT(*) AS total_wickets
+FROM dbo.ball_by_ball_data
+WHERE is_wicket = 1
+GROUP BY bowler
+ORDER BY total_wickets DESC
+""")
 
-# ============================================================
-# 1. MATCHES PER SEASON
-# ============================================================
+top_avg_win_query = text("""
+SELECT TOP 10
+    m.match_winner,
+    ROUND(AVG(CAST(b.total_runs AS FLOAT)),2) AS avg_runs_scored
+FROM dbo.ball_by_ball_data b
+JOIN dbo.ipl_matches_data m ON b.match_id = m.match_id
+WHERE b.team_batting = m.match_winner
+GROUP BY m.match_winner
+ORDER BY avg_runs_scored DESC
+""")
 
-matches_per_season = (
-    matches_df.groupby("season_id")["match_id"]
-    .count()
-    .reset_index(name="total_matches")
+first_innings_query = text("""
+WITH first_innings AS (
+SELECT m.season_id, b.match_id,
+SUM(CAST(b.total_runs AS INT)) AS runs
+FROM dbo.ball_by_ball_data b
+JOIN dbo.ipl_matches_data m ON b.match_id = m.match_id
+WHERE b.innings = 1
+GROUP BY m.season_id, b.match_id
 )
+SELECT season_id, AVG(runs) AS avg_score
+FROM first_innings
+GROUP BY season_id
+ORDER BY season_id
+""")
 
-plt.figure()
-sns.barplot(data=matches_per_season,
-            x="season_id", y="total_matches",
-            hue="season_id", legend=False)
+QUERIES = {
+    "matches_df": matches_query,
+    "top_batters": top_batters_query,
+    "top_bowlers": top_bowlers_query,
+    "top_avg_win": top_avg_win_query,
+    "first_innings": first_innings_query,
+}
 
-plt.title("Matches Played Per IPL Season")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
 
+# ============================================================
+# LOAD DATA (typed as in ipl_schema.py)
+# ============================================================
+
+# Same results computed from the local CSV files (IPL_BACKEND=csv)
+def load_local_data(**filters):
+    balls = local_backend.deliveries(**filters)
+    matches = local_backend.matches(**filters)
+
+    # team columns of the two tables have different categories
+    winners = balls.merge(matches[["match_id", "match_winner"]], on="match_id")
+    winners = winners[winners["team_batting"].astype(object) == winners["match_winner"].astype(object)]
+
+    first_innings = (
+        balls[balls["innings"] == 1]
+        .groupby(["season_id", "match_id"])["total_runs"].sum()
+        .groupby("season_id").mean()
+    )
+
+    data = {
+        "top_batters": balls.groupby("batter", observed=True)["batter_runs"].sum().nlargest(10)
+            .reset_index(name="total_runs"),
+        "top_bowlers": balls.loc[balls["is_wicket"], "bowler"].value_counts().head(10)
+            .reset_index(name="total_wickets"),
+        "top_avg_win": winners.groupby("match_winner", observed=True)["total_runs"].mean().round(2).nlargest(10)
+            .reset_index(name="avg_runs_scored"),
+        "first_innings": first_innings.reset_index(name="avg_score"),
+    }
+    data = {name: plain_labels(df) for name, df in data.items()}
+    data["matches_df"] = matches.copy()
+    return data
+
+
+# filters: season, team, venue, innings (see query_filters.py)
+def load_data(**filters):
+    if BACKEND == "csv":
+        print(f"Loading dataset from local CSV files ({describe(filters)})...")
+        data = load_local_data(**filters)
+    else:
+        print(f"Loading dataset from SQL Server ({describe(filters)})...")
+        queries, params = filter_queries(QUERIES, filters)
+        data = fetch_all(queries, params=params)
+        data["matches_df"] = apply_schema(data["matches_df"], MATCH_SCHEMA, MATCH_SHARED_CATEGORIES)
+
+    return data
 
 
 # ============================================================
-# 2. TOP 10 BATTERS
+# 1. MATCHES PER SEASON
 # ============================================================
+
+@traced(category="plot")
+def plot_matches_per_season(matches_df):
+    matches_per_season = (
+        matches_df.groupby("season_id")["match_id"]
+        .count()
+        .reset_index(name="total_matches")
+    )
 
-top_batters = pd.read_sql(text("""
-SELECT TOP 10 batter, SUM(CAST(batter_runs AS INT)) AS total_runs
-FROM dbo.ball_by_ball_data
-GROUP BY batter
-ORDER BY total_runs DESC
-"""), engine)
+    plt.figure()
+    sns.barplot(data=matches_per_season,
+                x="season_id", y="total_matches",
+                hue="season_id", legend=False)
 
-plt.figure()
-sns.barplot(data=top_batters, x="total_runs", y="batter", hue="batter", legend=False)
-plt.title("Top 10 Run Scorers in IPL")
-plt.tight_layout()
-plt.show()
+    plt.title("Matches Played Per IPL Season")
+    plt.xticks(rotation=45)
+    plt.tight_layout()
 
 
 
 # ============================================================
-# 3. TOP 10 BOWLERS
+# 2. TOP 10 BATTERS
 # ============================================================
+
+@traced(category="plot")
+def plot_top_batters(top_batters):
+    plt.figure()
+    sns.barplot(data=top_batters, x="total_runs", y="batter", hue="batter", legend=False)
+    plt.title("Top 10 Run Scorers in IPL")
+    plt.tight_layout()
 
-top_bowlers = pd.read_sql(text("""
-SELECT TOP 10 bowler, COUNT(*) AS total_wickets
-FROM dbo.ball_by_ball_data
-WHERE is_wicket = 1
-GROUP BY bowler
-ORDER BY total_wickets DESC
-"""), engine)
 
-plt.figure()
-sns.barplot(data=top_bowlers, x="total_wickets", y="bowler", hue="bowler", legend=False)
-plt.title("Top 10 Wicket Takers in IPL")
-plt.tight_layout()
-plt.show()
+
+# ============================================================
+# 3. TOP 10 BOWLERS
+# ============================================================
+
+@traced(category="plot")
+def plot_top_bowlers(top_bowlers):
+    plt.figure()
+    sns.barplot(data=top_bowlers, x="total_wickets", y="bowler", hue="bowler", legend=False)
+    plt.title("Top 10 Wicket Takers in IPL")
+    plt.tight_layout()
 
 
 
 # ============================================================
 # 4. CHASING VS DEFENDING (NOW WORKS)
 # ============================================================
+
+@traced(category="plot")
+def plot_chase_defend(matches_df):
+    matches_df["match_result"] = match_result(matches_df["win_by_runs"], matches_df["win_by_wickets"])
 
-matches_df["match_result"] = matches_df.apply(
-    lambda x: "Defending Team Won" if x.win_by_runs > 0
-    else ("Chasing Team Won" if x.win_by_wickets > 0 else "No Result"),
-    axis=1
-)
-
-chase_defend = matches_df["match_result"].value_counts().reset_index()
-chase_defend.columns = ["match_result", "matches"]
+    chase_defend = counts_frame(matches_df["match_result"], "match_result", "matches")
 
-plt.figure()
-sns.barplot(data=chase_defend, x="match_result", y="matches", hue="match_result", legend=False)
-plt.title("Chasing vs Defending Wins")
-plt.xticks(rotation=20)
-plt.tight_layout()
-plt.show()
+    plt.figure()
+    sns.barplot(data=chase_defend, x="match_result", y="matches", hue="match_result", legend=False)
+    plt.title("Chasing vs Defending Wins")
+    plt.xticks(rotation=20)
+    plt.tight_layout()
 
 
 
 # ============================================================
 # 5. AVG RUNS SCORED BY WINNING TEAMS
 # ============================================================
-
-top_avg_win = pd.read_sql(text("""
-SELECT TOP 10
-    m.match_winner,
-    ROUND(AVG(CAST(b.total_runs AS FLOAT)),2) AS avg_runs_scored
-FROM dbo.ball_by_ball_data b
-JOIN dbo.ipl_matches_data m ON b.match_id = m.match_id
-WHERE b.team_batting = m.match_winner
-GROUP BY m.match_winner
-ORDER BY avg_runs_scored DESC
-"""), engine)
-
-plt.figure()
-sns.barplot(data=top_avg_win, x="avg_runs_scored", y="match_winner", hue="match_winner", legend=False)
-plt.title("Average Runs Scored by Winning Teams")
-plt.tight_layout()
-plt.show()
+
+@traced(category="plot")
+def plot_top_avg_win(top_avg_win):
+    plt.figure()
+    sns.barplot(data=top_avg_win, x="avg_runs_scored", y="match_winner", hue="match_winner", legend=False)
+    plt.title("Average Runs Scored by Winning Teams")
+    plt.tight_layout()
 
 
 
 # ============================================================
 # 6. TOSS IMPACT
 # ============================================================
+
+@traced(category="plot")
+def plot_toss_result(matches_df):
+    matches_df["toss_result"] = toss_result(matches_df["toss_winner"], matches_df["match_winner"])
 
-matches_df["toss_result"] = matches_df.apply(
-    lambda x: "Toss Winner Won" if x.toss_winner == x.match_winner else "Toss Winner Lost",
-    axis=1
-)
-
-toss_result = matches_df["toss_result"].value_counts().reset_index()
-toss_result.columns = ["toss_result", "total_matches"]
+    toss_counts = counts_frame(matches_df["toss_result"], "toss_result", "total_matches")
 
-plt.figure()
-sns.barplot(data=toss_result, x="toss_result", y="total_matches", hue="toss_result", legend=False)
-plt.title("Impact of Toss on Match Result")
-plt.tight_layout()
-plt.show()
+    plt.figure()
+    sns.barplot(data=toss_counts, x="toss_result", y="total_matches", hue="toss_result", legend=False)
+    plt.title("Impact of Toss on Match Result")
+    plt.tight_layout()
 
 
 
 # ============================================================
 # 7. FIRST INNINGS TREND
 # ============================================================
+
+@traced(category="plot")
+def plot_first_innings(first_innings):
+    plt.figure()
+    sns.lineplot(data=first_innings, x="season_id", y="avg_score", marker="o")
+    plt.title("Average First Innings Score Trend")
+    plt.xticks(rotation=45)
+    plt.tight_layout()
 
-first_innings = pd.read_sql(text("""
-WITH first_innings AS (
-SELECT m.season_id, b.match_id,
-SUM(CAST(b.total_runs AS INT)) AS runs
-FROM dbo.ball_by_ball_data b
-JOIN dbo.ipl_matches_data m ON b.match_id = m.match_id
-WHERE b.innings = 1
-GROUP BY m.season_id, b.match_id
-)
-SELECT season_id, AVG(runs) AS avg_score
-FROM first_innings
-GROUP BY season_id
-ORDER BY season_id
-"""), engine)
 
-plt.figure()
-sns.lineplot(data=first_innings, x="season_id", y="avg_score", marker="o")
-plt.title("Average First Innings Score Trend")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
+# ============================================================
+# MAIN
+# ============================================================
+
+# (chart name, plot function, data key)
+CHARTS = [
+    ("matches_per_season", plot_matches_per_season, "matches_df"),
+    ("top_batters", plot_top_batters, "top_batters"),
+    ("top_bowlers", plot_top_bowlers, "top_bowlers"),
+    ("chasing_vs_defending", plot_chase_defend, "matches_df"),
+    ("winning_team_avg_runs", plot_top_avg_win, "top_avg_win"),
+    ("toss_impact", plot_toss_result, "matches_df"),
+    ("first_innings_trend", plot_first_innings, "first_innings"),
+]
+
+
+def main(**filters):
+    data = load_data(**filters)
+
+    for _, plot, key in CHARTS:
+        plot(data[key])
+        plt.show()
+
+    print("\nAll visualizations generated successfully.")
 
 
-print("\nAll visualizations generated successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main(**parse_filters("Match analysis charts"))
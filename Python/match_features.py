@@ -0,0 +1,129 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Match Outcome Features
+#
+# This script derives the match outcome columns used by the
+# charts and metrics (chasing vs defending result, toss result)
+# for whole columns at once with np.select instead of a Python
+# call per row. Outputs are categoricals with a fixed category
+# order.
+#
+# The labels and conditions are the same as the CASE
+# expressions in SQL/08_views_and_final_metrics.sql;
+# match_result_case_sql() and toss_result_case_sql() build
+# those CASE expressions from the same definitions, and
+# check_sql_case_expressions() (run when the file is executed
+# directly) fails if the SQL file no longer contains them.
+# ============================================================
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# ----- Labels (same order as the CASE branches) -----
+DEFENDING_WON = "Defending Team Won"
+CHASING_WON = "Chasing Team Won"
+NO_RESULT = "No Result"
+MATCH_RESULT_LABELS = [DEFENDING_WON, CHASING_WON, NO_RESULT]
+
+TOSS_WINNER_WON = "Toss Winner Won"
+TOSS_WINNER_LOST = "Toss Winner Lost"
+TOSS_RESULT_LABELS = [TOSS_WINNER_WON, TOSS_WINNER_LOST]
+
+
+# ------------------------------------------------------------
+# Chasing vs defending result
+# (won by runs -> defended, won by wickets -> chased)
+# ------------------------------------------------------------
+def match_result(win_by_runs, win_by_wickets):
+    runs = pd.to_numeric(pd.Series(win_by_runs), errors="coerce").astype(float).to_numpy()
+    wickets = pd.to_numeric(pd.Series(win_by_wickets), errors="coerce").astype(float).to_numpy()
+
+    codes = np.select([runs > 0, wickets > 0], [0, 1], default=2)
+    return pd.Categorical.from_codes(codes, categories=MATCH_RESULT_LABELS)
+
+
+# ------------------------------------------------------------
+# Did the toss winner win the match?
+# (a missing winner counts as lost, like the SQL ELSE branch)
+# ------------------------------------------------------------
+def toss_result(toss_winner, match_winner):
+    toss_winner = pd.Series(toss_winner).to_numpy(dtype=object)
+    match_winner = pd.Series(match_winner).to_numpy(dtype=object)
+
+    won = pd.notna(toss_winner) & (toss_winner == match_winner)
+    codes = np.where(won, 0, 1)
+    return pd.Categorical.from_codes(codes, categories=TOSS_RESULT_LABELS)
+
+
+def add_match_outcomes(matches_df):
+    matches_df["match_result"] = match_result(matches_df["win_by_runs"], matches_df["win_by_wickets"])
+    matches_df["toss_result"] = toss_result(matches_df["toss_winner"], matches_df["match_winner"])
+    return matches_df
+
+
+# ------------------------------------------------------------
+# Value counts as a frame, without empty categories
+# (matches GROUP BY on the CASE expression / category column)
+# ------------------------------------------------------------
+def counts_frame(values, label_column, count_column):
+    counts = pd.Series(values).value_counts()
+    counts = counts[counts > 0]
+    result = counts.rename_axis(label_column).reset_index(name=count_column)
+    result[label_column] = result[label_column].astype(str)
+    return result
+
+
+# ============================================================
+# SAME LOGIC AS SQL CASE EXPRESSIONS
+# ============================================================
+
+def match_result_case_sql(runs_column="win_by_runs", wickets_column="win_by_wickets"):
+    return f"""CASE
+    WHEN TRY_CAST({runs_column} AS INT) > 0 THEN '{DEFENDING_WON}'
+    WHEN TRY_CAST({wickets_column} AS INT) > 0 THEN '{CHASING_WON}'
+    ELSE '{NO_RESULT}'
+END"""
+
+
+def toss_result_case_sql(toss_column="toss_winner", winner_column="match_winner"):
+    return f"""CASE
+    WHEN {toss_column} = {winner_column} THEN '{TOSS_WINNER_WON}'
+    ELSE '{TOSS_WINNER_LOST}'
+END"""
+
+
+SQL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SQL", "08_views_and_final_metrics.sql")
+
+
+def _normalize_sql(query):
+    return " ".join(re.sub(r"--[^\n]*", " ", query).split())
+
+
+# names of the CASE expressions missing from the SQL file
+# (each is used in the SELECT list and in the GROUP BY)
+def check_sql_case_expressions(path=SQL_FILE):
+    with open(path, encoding="utf-8") as f:
+        sql = _normalize_sql(f.read())
+
+    expressions = {
+        "match_result": match_result_case_sql(),
+        "toss_result": toss_result_case_sql(),
+    }
+    return [name for name, case in expressions.items() if sql.count(_normalize_sql(case)) < 2]
+
+
+if __name__ == "__main__":
+    import sys
+
+    missing = check_sql_case_expressions()
+    for name in missing:
+        print(f"{os.path.basename(SQL_FILE)} no longer matches {name}_case_sql():")
+        print(match_result_case_sql() if name == "match_result" else toss_result_case_sql())
+    if not missing:
+        print(f"{os.path.basename(SQL_FILE)} CASE expressions match match_features.py")
+    sys.exit(1 if missing else 0)
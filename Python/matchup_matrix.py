@@ -0,0 +1,244 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Batter vs Bowler Matchup Matrix
+#
+# This script builds a sparse batter x bowler matrix from
+# ball_by_ball_data. Only pairs that actually met are stored,
+# each with:
+#   runs        - batter runs off the bowler
+#   balls       - balls faced (wides excluded)
+#   dismissals  - wickets credited to the bowler
+#   dots        - legal balls with no run
+#
+# The pairs are kept in two sorted orders (by batter and by
+# bowler) with offset arrays, like a CSR / CSC matrix, so all
+# matchups of one player are a slice and top-k is an
+# argpartition over that slice.
+#
+# update() adds new deliveries: existing pairs are added to in
+# place, new pairs are appended, and the sorted orders are
+# rebuilt on the next query.
+#
+# Usage:
+#   python matchup_matrix.py "V Kohli"
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from local_backend import BACKEND
+
+
+# ----- Matrix Details -----
+STATS = ["runs", "balls", "dismissals", "dots"]
+
+# wickets not credited to the bowler
+NON_BOWLER_WICKETS = ["run out", "retired hurt", "retired out", "obstructing the field"]
+
+DELIVERY_COLUMNS = ["batter", "bowler", "batter_runs", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball", "wicket_kind"]
+
+DEFAULT_MIN_BALLS = 6
+
+
+def _pair_stats(balls):
+    legal = ~balls["is_wide_ball"].to_numpy()
+    credited = balls["is_wicket"].to_numpy() & ~balls["wicket_kind"].isin(NON_BOWLER_WICKETS).to_numpy()
+    dot = legal & ~balls["is_no_ball"].to_numpy() & (balls["total_runs"].to_numpy() == 0)
+
+    return np.column_stack([
+        balls["batter_runs"].to_numpy().astype("int64"),
+        legal.astype("int64"),
+        credited.astype("int64"),
+        dot.astype("int64"),
+    ])
+
+
+def _offsets(sorted_codes, size):
+    return np.searchsorted(sorted_codes, np.arange(size + 1), side="left")
+
+
+class MatchupMatrix:
+    def __init__(self):
+        self.players = []
+        self._player_code = {}
+
+        self.batter_codes = np.empty(0, dtype="int64")
+        self.bowler_codes = np.empty(0, dtype="int64")
+        self.stats = np.empty((0, len(STATS)), dtype="int64")
+        self._pair_position = {}
+
+        self._by_batter = None
+        self._by_bowler = None
+
+    def __len__(self):
+        return len(self.stats)
+
+    # ----- player name <-> integer code -----
+    def _encode(self, names):
+        names = pd.Series(names, dtype=object)
+        for name in names.drop_duplicates():
+            if name not in self._player_code:
+                self._player_code[name] = len(self.players)
+                self.players.append(name)
+        return names.map(self._player_code).to_numpy(dtype="int64")
+
+    # ========================================================
+    # BUILD / INCREMENTAL UPDATE
+    # ========================================================
+
+    def update(self, balls):
+        batter = self._encode(balls["batter"])
+        bowler = self._encode(balls["bowler"])
+        stats = _pair_stats(balls)
+
+        # sum the new deliveries per (batter, bowler) pair
+        pair_key = batter * len(self.players) + bowler
+        unique_keys, inverse = np.unique(pair_key, return_inverse=True)
+        totals = np.zeros((len(unique_keys), len(STATS)), dtype="int64")
+        np.add.at(totals, inverse, stats)
+        new_batter, new_bowler = np.divmod(unique_keys, len(self.players))
+
+        positions = np.array([
+            self._pair_position.get(pair, -1)
+            for pair in zip(new_batter.tolist(), new_bowler.tolist())
+        ], dtype="int64")
+
+        seen = positions >= 0
+        self.stats[positions[seen]] += totals[seen]
+
+        fresh = ~seen
+        start = len(self.stats)
+        for offset, pair in enumerate(zip(new_batter[fresh].tolist(), new_bowler[fresh].tolist())):
+            self._pair_position[pair] = start + offset
+        self.batter_codes = np.concatenate([self.batter_codes, new_batter[fresh]])
+        self.bowler_codes = np.concatenate([self.bowler_codes, new_bowler[fresh]])
+        self.stats = np.concatenate([self.stats, totals[fresh]])
+
+        self._by_batter = self._by_bowler = None
+        return self
+
+    # sorted order + offsets per batter / per bowler
+    def _sorted(self, by_bowler=False):
+        if self._by_batter is None:
+            size = len(self.players)
+            order = np.argsort(self.batter_codes, kind="stable")
+            self._by_batter = (order, _offsets(self.batter_codes[order], size))
+            order = np.argsort(self.bowler_codes, kind="stable")
+            self._by_bowler = (order, _offsets(self.bowler_codes[order], size))
+        return self._by_bowler if by_bowler else self._by_batter
+
+    def _rows(self, player, by_bowler=False):
+        code = self._player_code.get(player)
+        if code is None:
+            raise KeyError(f"Unknown player {player!r}")
+        order, offsets = self._sorted(by_bowler)
+        return order[offsets[code]:offsets[code + 1]]
+
+    # ========================================================
+    # QUERIES
+    # ========================================================
+
+    def _frame(self, rows):
+        runs, balls, dismissals, dots = self.stats[rows].T
+        players = np.asarray(self.players, dtype=object)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({
+                "batter": players[self.batter_codes[rows]],
+                "bowler": players[self.bowler_codes[rows]],
+                "runs": runs,
+                "balls": balls,
+                "dismissals": dismissals,
+                "dots": dots,
+                "strike_rate": np.round(np.where(balls > 0, runs * 100.0 / balls, np.nan), 2),
+                "dot_percentage": np.round(np.where(balls > 0, dots * 100.0 / balls, np.nan), 2),
+            })
+
+    def _top(self, rows, score, k):
+        if len(rows) > k:
+            top = np.argpartition(-score, k - 1)[:k]
+            rows, score = rows[top], score[top]
+        order = np.argsort(-score, kind="stable")
+        return self._frame(rows[order]).reset_index(drop=True)
+
+    def matchup(self, batter, bowler):
+        position = self._pair_position.get((self._player_code.get(batter), self._player_code.get(bowler)))
+        if position is None:
+            return None
+        return self._frame(np.array([position])).iloc[0]
+
+    def batter_matchups(self, batter):
+        return self._frame(self._rows(batter))
+
+    def bowler_matchups(self, bowler):
+        return self._frame(self._rows(bowler, by_bowler=True))
+
+    # highest strike rate against each bowler (dismissals break ties)
+    def best_matchups(self, batter, k=5, min_balls=DEFAULT_MIN_BALLS):
+        rows = self._rows(batter)
+        runs, balls, dismissals, _ = self.stats[rows].T
+        keep = balls >= min_balls
+        rows, runs, balls, dismissals = rows[keep], runs[keep], balls[keep], dismissals[keep]
+        return self._top(rows, runs / balls - dismissals * 1e-6, k)
+
+    # most dismissals, then lowest strike rate
+    def worst_matchups(self, batter, k=5, min_balls=DEFAULT_MIN_BALLS):
+        rows = self._rows(batter)
+        runs, balls, dismissals, _ = self.stats[rows].T
+        keep = balls >= min_balls
+        rows, runs, balls, dismissals = rows[keep], runs[keep], balls[keep], dismissals[keep]
+        return self._top(rows, dismissals - runs / balls * 1e-3, k)
+
+    # batters the bowler dismissed most often (cheapest first on ties)
+    def bunnies(self, bowler, k=5):
+        rows = self._rows(bowler, by_bowler=True)
+        runs, _, dismissals, _ = self.stats[rows].T
+        keep = dismissals > 0
+        rows, runs, dismissals = rows[keep], runs[keep], dismissals[keep]
+        return self._top(rows, dismissals - runs / (runs.max(initial=0) + 1.0), k)
+
+
+# ------------------------------------------------------------
+# Build from the active backend
+# ------------------------------------------------------------
+def load_matchup_matrix():
+    if BACKEND == "csv":
+        balls = local_backend.deliveries()[DELIVERY_COLUMNS]
+    else:
+        from ipl_schema import DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, apply_schema
+        from load_sql_results import load_table_columns
+
+        balls = apply_schema(
+            load_table_columns("ball_by_ball_data", DELIVERY_COLUMNS),
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES,
+        )
+    return MatchupMatrix().update(balls)
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+
+    start = time.perf_counter()
+    matrix = load_matchup_matrix()
+    print(f"{len(matrix)} batter-bowler pairs from {len(matrix.players)} players "
+          f"in {time.perf_counter() - start:.3f} s")
+
+    batter = sys.argv[1] if len(sys.argv) > 1 else "V Kohli"
+    matrix.best_matchups(batter)  # builds the sorted orders
+
+    start = time.perf_counter()
+    best = matrix.best_matchups(batter)
+    print(f"\nBest matchups for {batter} ({(time.perf_counter() - start) * 1000:.3f} ms):")
+    print(best)
+
+    print(f"\nWorst matchups for {batter}:")
+    print(matrix.worst_matchups(batter))
+
+    bowler = sys.argv[2] if len(sys.argv) > 2 else "JJ Bumrah"
+    print(f"\nBunnies of {bowler}:")
+    print(matrix.bunnies(bowler))
@@ -0,0 +1,365 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Materialized Aggregates with Incremental Refresh
+#
+# This script keeps per-batter, per-bowler, per-team, per-venue
+# and per-season summary tables on disk together with a
+# high-water mark: the largest match_id already ingested.
+#
+# refresh() reads only matches above the high-water mark (and
+# their deliveries), aggregates those rows and adds them to the
+# stored totals. The summary tables hold additive columns only
+# (runs, balls, wickets, counts), so ratios such as strike rate
+# or economy are derived when read and stay exact.
+#
+# The tables and the high-water mark are saved together in one
+# file, written to a temporary file and renamed into place, so a
+# crash mid-save leaves the previous totals and mark as a pair.
+#
+# On the SQL backend only the new rows are fetched. On the CSV
+# backend the matches file is read in full; deliveries come from
+# the columnar store (columnar_store.py), where only match_id is
+# scanned and the other columns are read for the new rows. With
+# IPL_COLUMNAR=off the whole deliveries file is read and filtered.
+#
+# New matches are expected to get larger match_ids than earlier
+# ones, and a match is ingested once its row is present in
+# ipl_matches_data (after the match is complete).
+#
+# Usage:
+#   python materialized_aggregates.py            # refresh
+#   python materialized_aggregates.py --rebuild  # from scratch
+# ============================================================
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import columnar_store
+import local_backend
+from instrumentation import stage
+from ipl_schema import (
+    DELIVERY_SCHEMA,
+    DELIVERY_SHARED_CATEGORIES,
+    MATCH_SCHEMA,
+    MATCH_SHARED_CATEGORIES,
+    apply_schema,
+)
+from local_backend import BACKEND
+from match_features import CHASING_WON, DEFENDING_WON, match_result
+
+
+# ----- Store Details -----
+STORE_DIR = os.environ.get(
+    "IPL_MATERIALIZED_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "materialized"),
+)
+STORE_FILE = "aggregates.pkl"  # {"state": ..., "tables": ...}
+
+# overs 16-20 as in SQL/08_views_and_final_metrics.sql
+DEATH_OVER_START = 16
+
+DELIVERY_COLUMNS = [
+    "match_id", "season_id", "innings", "over_number", "batter", "bowler",
+    "team_batting", "team_bowling", "batter_runs", "total_runs",
+    "is_wicket", "is_wide_ball", "is_no_ball",
+]
+
+MATCH_COLUMNS = [
+    "match_id", "season_id", "venue", "team1", "team2", "toss_winner",
+    "match_winner", "win_by_runs", "win_by_wickets",
+]
+
+TABLES = ["batter", "bowler", "team", "venue", "season"]
+
+
+# ============================================================
+# LOAD ONLY NEW ROWS (match_id above the high-water mark)
+# ============================================================
+
+def load_new_rows(high_water_mark):
+    if BACKEND == "csv":
+        matches = local_backend.matches()
+        matches = matches.loc[matches["match_id"] > high_water_mark, MATCH_COLUMNS]
+        if not columnar_store.ENABLED:
+            balls = local_backend.deliveries()
+            balls = balls.loc[balls["match_id"].isin(matches["match_id"]), DELIVERY_COLUMNS]
+            return matches, balls
+
+        file_name, encoding = local_backend.TABLE_FILES["ball_by_ball_data"]
+        store = columnar_store.open_deliveries(os.path.join(local_backend.DATA_DIR, file_name), encoding=encoding)
+        rows = np.flatnonzero(np.isin(store.array("match_id"), matches["match_id"].to_numpy()))
+        return matches, store.frame(DELIVERY_COLUMNS, rows=rows)
+
+    from database_connection import get_engine
+
+    matches_query = text(f"""
+SELECT {", ".join(MATCH_COLUMNS)}
+FROM dbo.ipl_matches_data
+WHERE match_id > :high_water_mark
+""")
+    balls_query = text(f"""
+SELECT {", ".join("b." + column for column in DELIVERY_COLUMNS)}
+FROM dbo.ball_by_ball_data b
+JOIN dbo.ipl_matches_data m ON b.match_id = m.match_id
+WHERE m.match_id > :high_water_mark
+""")
+    params = {"high_water_mark": int(high_water_mark)}
+
+    with get_engine().connect() as conn:
+        with stage("read_sql", category="sql", table="ipl_matches_data") as current:
+            matches = pd.read_sql(matches_query, conn, params=params)
+            current.record_frame(matches)
+        with stage("read_sql", category="sql", table="ball_by_ball_data") as current:
+            balls = pd.read_sql(balls_query, conn, params=params)
+            current.record_frame(balls)
+
+    matches = apply_schema(matches, MATCH_SCHEMA, MATCH_SHARED_CATEGORIES)
+    balls = apply_schema(balls, DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES)
+    return matches, balls
+
+
+# ============================================================
+# AGGREGATE A BATCH OF ROWS INTO ADDITIVE SUMMARIES
+# ============================================================
+
+def _sum_by(df, key, columns):
+    result = df.groupby(key, observed=True)[columns].sum()
+    if isinstance(result.index, pd.CategoricalIndex):
+        result.index = result.index.astype(object)
+    return result.astype("int64")
+
+
+def _add(totals, new):
+    # a key or column missing on one side counts as 0
+    return totals.add(new, fill_value=0).fillna(0).astype("int64")
+
+
+def summarize(balls, matches):
+    balls = balls.assign(
+        balls=1,
+        not_wide=~balls["is_wide_ball"],
+        legal=~balls["is_wide_ball"] & ~balls["is_no_ball"],
+        death=balls["over_number"] >= DEATH_OVER_START,
+        first_innings=balls["innings"] == 1,
+    )
+    balls = balls.assign(
+        runs_not_wide=balls["batter_runs"] * balls["not_wide"],
+        fours=balls["batter_runs"] == 4,
+        sixes=balls["batter_runs"] == 6,
+        legal_runs=balls["total_runs"] * balls["legal"],
+        death_runs=balls["total_runs"] * balls["death"],
+        first_innings_runs=balls["total_runs"] * balls["first_innings"],
+    )
+
+    summaries = {}
+
+    summaries["batter"] = _sum_by(balls, "batter", [
+        "batter_runs", "balls", "runs_not_wide", "not_wide", "fours", "sixes",
+    ]).rename(columns={"not_wide": "balls_faced"})
+
+    summaries["bowler"] = _sum_by(balls, "bowler", [
+        "is_wicket", "legal_runs", "legal", "death_runs", "death",
+    ]).rename(columns={"is_wicket": "wickets", "legal": "legal_balls", "death": "death_balls"})
+
+    # per match first innings total, joined to its venue and season
+    per_match = balls.groupby("match_id")[["first_innings_runs", "first_innings"]].sum()
+    per_match = per_match[per_match["first_innings"] > 0]
+    per_match = per_match.join(matches.set_index("match_id")[["venue", "season_id"]], how="inner")
+    per_match["first_innings_matches"] = 1
+
+    summaries["venue"] = _sum_by(per_match, "venue", ["first_innings_runs", "first_innings_matches"])
+    venue_matches = matches.assign(matches=1)
+    summaries["venue"] = _add(summaries["venue"], _sum_by(venue_matches, "venue", ["matches"]))
+
+    # team: matches played / won from ipl_matches_data, runs and wickets from deliveries
+    played = pd.concat([matches["team1"], matches["team2"]]).astype(object).value_counts()
+    won = matches["match_winner"].astype(object).value_counts()
+    toss_won = matches["toss_winner"].astype(object).value_counts()
+    team_runs = _sum_by(balls, "team_batting", ["total_runs", "balls"])
+    team_wickets = _sum_by(balls, "team_bowling", ["is_wicket"])
+    summaries["team"] = pd.DataFrame({
+        "matches": played,
+        "wins": won,
+        "toss_wins": toss_won,
+        "runs_scored": team_runs["total_runs"],
+        "balls_faced": team_runs["balls"],
+        "wickets_taken": team_wickets["is_wicket"],
+    }).fillna(0).astype("int64")
+
+    # season: match counts, results, toss and first innings totals
+    toss_winner = matches["toss_winner"].astype(object)
+    match_winner = matches["match_winner"].astype(object)
+    result = match_result(matches["win_by_runs"], matches["win_by_wickets"])
+    season_matches = pd.DataFrame({
+        "season_id": matches["season_id"].to_numpy(),
+        "matches": 1,
+        "defending_wins": np.asarray(result == DEFENDING_WON),
+        "chasing_wins": np.asarray(result == CHASING_WON),
+        "toss_decided": (toss_winner.notna() & match_winner.notna()).to_numpy(),
+        "toss_winner_won": (toss_winner.notna() & (toss_winner == match_winner)).to_numpy(),
+    })
+    summaries["season"] = _add(
+        _sum_by(season_matches, "season_id", [
+            "matches", "defending_wins", "chasing_wins", "toss_decided", "toss_winner_won",
+        ]),
+        _sum_by(per_match, "season_id", ["first_innings_runs", "first_innings_matches"]),
+    )
+
+    return summaries
+
+
+# ============================================================
+# STORED SUMMARY TABLES
+# ============================================================
+
+class MaterializedAggregates:
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.state = {"high_water_mark": 0, "matches": 0, "deliveries": 0}
+        self.tables = {name: pd.DataFrame(dtype="int64") for name in TABLES}
+        self.load()
+
+    @property
+    def path(self):
+        return os.path.join(self.store_dir, STORE_FILE)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        stored = pd.read_pickle(self.path)
+        self.state = stored["state"]
+        self.tables = stored["tables"]
+
+    # totals and mark in one file, renamed into place: a crash
+    # leaves either the old pair or the new one
+    def save(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.store_dir)
+        os.close(fd)
+        try:
+            pd.to_pickle({"state": self.state, "tables": self.tables}, tmp_path)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # add one batch of new matches / deliveries to the totals
+    def apply(self, balls, matches):
+        for name, summary in summarize(balls, matches).items():
+            self.tables[name] = _add(self.tables[name], summary)
+
+        self.state["high_water_mark"] = max(self.state["high_water_mark"], int(matches["match_id"].max()))
+        self.state["matches"] += len(matches)
+        self.state["deliveries"] += len(balls)
+
+    def refresh(self):
+        matches, balls = load_new_rows(self.state["high_water_mark"])
+        if len(matches):
+            self.apply(balls, matches)
+            self.save()
+        return len(matches), len(balls)
+
+    def rebuild(self):
+        self.state = {"high_water_mark": 0, "matches": 0, "deliveries": 0}
+        self.tables = {name: pd.DataFrame(dtype="int64") for name in TABLES}
+        return self.refresh()
+
+    # ========================================================
+    # METRICS DERIVED FROM THE SUMMARIES
+    # (same columns as metrics_engine.py)
+    # ========================================================
+
+    def top_batters(self):
+        batter = self.tables["batter"]
+        result = batter["batter_runs"].rename("total_runs").rename_axis("batter").reset_index()
+        return result.sort_values("total_runs", ascending=False, ignore_index=True)
+
+    def strike_rate(self):
+        batter = self.tables["batter"]
+        batter = batter[batter["balls_faced"] > 0]
+        result = pd.DataFrame({
+            "total_runs": batter["runs_not_wide"],
+            "balls_faced": batter["balls_faced"],
+            "strike_rate": (batter["runs_not_wide"] * 100.0 / batter["balls_faced"]).round(2),
+        }).rename_axis("batter").reset_index()
+        return result.sort_values("strike_rate", ascending=False, ignore_index=True)
+
+    def top_bowlers(self):
+        bowler = self.tables["bowler"]
+        wickets = bowler.loc[bowler["wickets"] > 0, "wickets"]
+        result = wickets.rename("total_wickets").rename_axis("bowler").reset_index()
+        return result.sort_values("total_wickets", ascending=False, ignore_index=True)
+
+    def economy_rate(self):
+        bowler = self.tables["bowler"]
+        bowler = bowler[bowler["legal_balls"] > 0]
+        economy = (bowler["legal_runs"] / (bowler["legal_balls"] / 6.0)).round(2)
+        result = economy.rename("economy_rate").rename_axis("bowler").reset_index()
+        return result.sort_values("economy_rate", ignore_index=True)
+
+    def death_over_economy(self):
+        bowler = self.tables["bowler"]
+        bowler = bowler[bowler["death_balls"] > 0]
+        economy = (bowler["death_runs"] * 6.0 / bowler["death_balls"]).round(2)
+        result = economy.rename("economy").rename_axis("bowler").reset_index()
+        return result.sort_values("economy", ignore_index=True)
+
+    def avg_first_innings_score(self):
+        season = self.tables["season"]
+        season = season[season["first_innings_matches"] > 0]
+        average = (season["first_innings_runs"] / season["first_innings_matches"]).round(2)
+        result = average.rename("avg_first_innings_score").rename_axis("season_id").reset_index()
+        return result.sort_values("season_id", ignore_index=True)
+
+    def venue_first_innings_score(self):
+        venue = self.tables["venue"]
+        venue = venue[venue["first_innings_matches"] > 0]
+        average = (venue["first_innings_runs"] / venue["first_innings_matches"]).round(2)
+        result = average.rename("avg_first_innings_score").rename_axis("venue").reset_index()
+        return result.sort_values("avg_first_innings_score", ascending=False, ignore_index=True)
+
+    def matches_per_season(self):
+        matches = self.tables["season"]["matches"]
+        result = matches.rename("total_matches").rename_axis("season_id").reset_index()
+        return result.sort_values("season_id", ignore_index=True)
+
+    def team_win_percentage(self):
+        team = self.tables["team"]
+        team = team[team["matches"] > 0]
+        result = pd.DataFrame({
+            "total_wins": team["wins"],
+            "total_matches": team["matches"],
+            "win_percentage": (team["wins"] / team["matches"] * 100).round(2),
+        }).rename_axis("team_name").reset_index()
+        return result.sort_values("win_percentage", ascending=False, ignore_index=True)
+
+    def toss_win_percentage(self):
+        season = self.tables["season"]
+        decided = season["toss_decided"].sum()
+        percentage = round(season["toss_winner_won"].sum() * 100.0 / decided, 2) if decided else None
+        return pd.DataFrame({"toss_win_percentage": [percentage]})
+
+
+# ------------------------------------------------------------
+# Refresh when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+
+    store = MaterializedAggregates()
+    start = time.perf_counter()
+    new_matches, new_balls = store.rebuild() if "--rebuild" in sys.argv else store.refresh()
+
+    print(f"Ingested {new_matches} new matches ({new_balls} deliveries) "
+          f"in {time.perf_counter() - start:.2f} s")
+    print(f"High-water mark: match_id {store.state['high_water_mark']}, "
+          f"{store.state['matches']} matches / {store.state['deliveries']} deliveries in total")
+
+    print("\nTop Batters:")
+    print(store.top_batters().head())
@@ -0,0 +1,215 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Single-Pass Metrics Engine
+#
+# This script computes every batting, bowling, team and season
+# metric used in load_sql_results.py from one fetch of the
+# delivery rows and one fetch of the match rows. Batters and
+# bowlers are grouped on their player_id (dimensions.py) and
+# matches on match_id, encoded to integer codes once, and all
+# per-player totals are accumulated with np.bincount, so the
+# delivery table is never scanned again per metric. A name
+# without a player_id is grouped on its own; results are
+# labelled with the name as it appears on the deliveries.
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import traced
+from match_features import counts_frame, match_result
+
+
+# Columns needed from each table
+DELIVERY_COLUMNS = [
+    "season_id", "match_id", "innings", "batter", "bowler", "batter_id", "bowler_id",
+    "batter_runs", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball",
+]
+
+MATCH_COLUMNS = [
+    "match_id", "season_id", "team1", "team2", "toss_winner", "match_winner",
+    "win_by_runs", "win_by_wickets", "player_of_match",
+]
+
+
+# ------------------------------------------------------------
+# Helpers to read untyped SQL / CSV columns
+# ------------------------------------------------------------
+def _numbers(column):
+    return pd.to_numeric(column, errors="coerce").fillna(0).to_numpy()
+
+
+def _flags(column):
+    if column.dtype == bool:
+        return column.to_numpy()
+    text = column.astype("string").str.strip().str.upper()
+    return text.isin(["1", "TRUE"]).fillna(False).to_numpy(dtype=bool)
+
+
+# ------------------------------------------------------------
+# Integer group codes for a player column: one group per
+# player_id (<column>_id), or per name when the name has no id;
+# -1 for a missing name. Keys are worked out once per distinct
+# name, then spread to the rows by indexing.
+# ------------------------------------------------------------
+def _player_codes(balls, column):
+    name_codes, names = pd.factorize(balls[column])
+    names = np.asarray(names, dtype=object)
+    id_column = f"{column}_id"
+    if id_column not in balls.columns or not len(names):
+        return name_codes, names
+
+    # player_id of each distinct name (from its first row)
+    first_rows = np.unique(name_codes[name_codes >= 0], return_index=True)[1]
+    first_rows = np.flatnonzero(name_codes >= 0)[first_rows]
+    ids = balls[id_column].to_numpy(dtype="float64", na_value=np.nan)[first_rows]
+
+    # unresolved names get keys below every player_id
+    name_keys = np.where(np.isnan(ids), -1.0 - np.arange(len(names)), ids)
+    group_of_name, _ = pd.factorize(name_keys)
+    labels = names[np.unique(group_of_name, return_index=True)[1]]  # first name of each group
+
+    codes = np.append(group_of_name, -1)[name_codes]
+    return codes, labels
+
+
+# ============================================================
+# DELIVERY METRICS (batting, bowling, first innings)
+# ============================================================
+
+@traced(category="pandas")
+def compute_delivery_metrics(balls):
+    batter_codes, batters = _player_codes(balls, "batter")
+    bowler_codes, bowlers = _player_codes(balls, "bowler")
+    match_codes, match_ids = pd.factorize(balls["match_id"])
+
+    batter_runs = _numbers(balls["batter_runs"])
+    total_runs = _numbers(balls["total_runs"])
+    innings = _numbers(balls["innings"])
+    is_wicket = _flags(balls["is_wicket"])
+    is_wide = _flags(balls["is_wide_ball"])
+    is_no_ball = _flags(balls["is_no_ball"])
+
+    # rows with a missing player name get code -1 and are grouped
+    # separately, matching GROUP BY NULL in SQL
+    n_batters = len(batters) + 1
+    n_bowlers = len(bowlers) + 1
+    n_matches = len(match_ids)
+    batter_codes = np.where(batter_codes < 0, n_batters - 1, batter_codes)
+    bowler_codes = np.where(bowler_codes < 0, n_bowlers - 1, bowler_codes)
+    batter_names = np.append(batters, None)
+    bowler_names = np.append(bowlers, None)
+
+    not_wide = ~is_wide
+    legal = ~is_wide & ~is_no_ball
+    first_innings = innings == 1
+
+    # ---- per batter ----
+    runs_all = np.bincount(batter_codes, weights=batter_runs, minlength=n_batters)
+    runs_not_wide = np.bincount(batter_codes, weights=batter_runs * not_wide, minlength=n_batters)
+    balls_faced = np.bincount(batter_codes, weights=not_wide, minlength=n_batters)
+    batter_seen = np.bincount(batter_codes, minlength=n_batters) > 0
+
+    # ---- per bowler ----
+    wickets = np.bincount(bowler_codes, weights=is_wicket, minlength=n_bowlers)
+    runs_conceded = np.bincount(bowler_codes, weights=total_runs * legal, minlength=n_bowlers)
+    balls_bowled = np.bincount(bowler_codes, weights=legal, minlength=n_bowlers)
+
+    # ---- per match (first innings) ----
+    first_runs = np.bincount(match_codes, weights=total_runs * first_innings, minlength=n_matches)
+    has_first = np.bincount(match_codes, weights=first_innings, minlength=n_matches) > 0
+    match_season = np.empty(n_matches, dtype=object)
+    match_season[match_codes] = balls["season_id"].to_numpy()
+
+    metrics = {}
+
+    top_batters = pd.DataFrame({
+        "batter": batter_names[batter_seen],
+        "total_runs": runs_all[batter_seen].astype(np.int64),
+    })
+    metrics["top_batters"] = top_batters.sort_values(
+        "total_runs", ascending=False, ignore_index=True
+    )
+
+    faced = balls_faced > 0
+    strike_rate = pd.DataFrame({
+        "batter": batter_names[faced],
+        "total_runs": runs_not_wide[faced].astype(np.int64),
+        "balls_faced": balls_faced[faced].astype(np.int64),
+    })
+    strike_rate["strike_rate"] = (strike_rate["total_runs"] * 100.0 / strike_rate["balls_faced"]).round(2)
+    metrics["strike_rate"] = strike_rate.sort_values(
+        "strike_rate", ascending=False, ignore_index=True
+    )
+
+    took_wicket = wickets > 0
+    top_bowlers = pd.DataFrame({
+        "bowler": bowler_names[took_wicket],
+        "total_wickets": wickets[took_wicket].astype(np.int64),
+    })
+    metrics["top_bowlers"] = top_bowlers.sort_values(
+        "total_wickets", ascending=False, ignore_index=True
+    )
+
+    bowled = balls_bowled > 0
+    economy_rate = pd.DataFrame({
+        "bowler": bowler_names[bowled],
+        "economy_rate": (runs_conceded[bowled] / (balls_bowled[bowled] / 6.0)).round(2),
+    })
+    metrics["economy_rate"] = economy_rate.sort_values("economy_rate", ignore_index=True)
+
+    first_innings_score = pd.DataFrame({
+        "season_id": match_season[has_first],
+        "first_innings_runs": first_runs[has_first],
+    })
+    metrics["avg_first_innings_score"] = (
+        first_innings_score.groupby("season_id")["first_innings_runs"]
+        .mean()
+        .round(2)
+        .reset_index(name="avg_first_innings_score")
+        .sort_values("season_id", ignore_index=True)
+    )
+
+    return metrics
+
+
+# ============================================================
+# MATCH METRICS (seasons, results, teams, toss, awards)
+# ============================================================
+
+@traced(category="pandas")
+def compute_match_metrics(matches):
+    toss_winner = matches["toss_winner"]
+    match_winner = matches["match_winner"]
+
+    metrics = {}
+
+    metrics["matches_per_season"] = (
+        matches.groupby("season_id")["match_id"]
+        .nunique()
+        .reset_index(name="total_matches")
+        .sort_values("season_id", ignore_index=True)
+    )
+
+    result_type = match_result(matches["win_by_runs"], matches["win_by_wickets"])
+    metrics["match_result_type"] = counts_frame(result_type, "match_result_type", "total_matches")
+
+    played = counts_frame(pd.concat([matches["team1"], matches["team2"]]), "team_name", "total_matches")
+    wins = counts_frame(match_winner, "team_name", "total_wins")
+    team_win_percentage = played.merge(wins, on="team_name", how="left")
+    team_win_percentage["win_percentage"] = (
+        team_win_percentage["total_wins"] / team_win_percentage["total_matches"] * 100
+    ).round(2)
+    metrics["team_win_percentage"] = team_win_percentage[
+        ["team_name", "total_wins", "total_matches", "win_percentage"]
+    ].sort_values("win_percentage", ascending=False, ignore_index=True)
+
+    decided = toss_winner.notna() & match_winner.notna()
+    toss_won = (toss_winner[decided] == match_winner[decided]).sum()
+    percentage = round(toss_won * 100.0 / decided.sum(), 2) if decided.any() else None
+    metrics["toss_win_percentage"] = pd.DataFrame({"toss_win_percentage": [percentage]})
+
+    metrics["player_of_match"] = counts_frame(matches["player_of_match"], "player", "total_awards")
+
+    return metrics
@@ -0,0 +1,208 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Phase Cube (powerplay / middle / death)
+#
+# This script precomputes, in one pass over ball_by_ball_data,
+# a dense cube per dimension
+#   (season, team or player, innings, phase) -> stats
+# for the batting team, bowling team, batter and bowler, with
+#   runs        - total runs (runs off the bat for a batter)
+#   balls       - legal balls (wides and no-balls excluded)
+#   deliveries  - every delivery, as COUNT(*) in the SQL files
+#   wickets     - wickets (bowler: credited to the bowler,
+#                 batter: dismissals of the batter on strike)
+#   dots        - legal balls with no run
+#   boundaries  - fours and sixes off the bat
+#
+# Phases are given by the over (0-based) each one starts at,
+# so SQL/08's death overs (over_number >= 16) are
+# {"powerplay": 0, "middle": 6, "death": 16}. Any phase slice
+# is then an index into the cube instead of another scan.
+#
+# Usage:
+#   python phase_cube.py
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from local_backend import BACKEND
+from matchup_matrix import NON_BOWLER_WICKETS
+
+
+# ----- Cube Details -----
+# phase name -> first over of the phase (0-based)
+DEFAULT_PHASES = {"powerplay": 0, "middle": 6, "death": 16}
+
+DIMENSIONS = ["team_batting", "team_bowling", "batter", "bowler"]
+AXES = ["season_id", "key", "innings", "phase"]
+STATS = ["runs", "balls", "deliveries", "wickets", "dots", "boundaries"]
+
+DELIVERY_COLUMNS = [
+    "season_id", "innings", "over_number", "team_batting", "team_bowling", "batter", "bowler",
+    "player_out", "batter_runs", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball", "wicket_kind",
+]
+
+
+def phase_codes(over_number, phases=DEFAULT_PHASES):
+    starts = np.asarray(list(phases.values()))
+    if (np.diff(starts) <= 0).any():
+        raise ValueError(f"Phase start overs must increase: {phases}")
+    return np.clip(np.searchsorted(starts, over_number, side="right") - 1, 0, None)
+
+
+def _rates(df):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["run_rate"] = np.round(df["runs"] * 6.0 / df["balls"].where(df["balls"] > 0), 2)
+        df["economy"] = np.round(df["runs"] * 6.0 / df["deliveries"].where(df["deliveries"] > 0), 2)
+        df["dot_percentage"] = np.round(df["dots"] * 100.0 / df["balls"].where(df["balls"] > 0), 2)
+    return df
+
+
+class PhaseCube:
+    def __init__(self, seasons, innings, phases, labels, cubes):
+        self.seasons = seasons
+        self.innings = innings
+        self.phases = phases
+        self.labels = labels
+        self.cubes = cubes
+
+    # ========================================================
+    # BUILD (one pass: every column is read once)
+    # ========================================================
+
+    @classmethod
+    def build(cls, balls, phases=DEFAULT_PHASES):
+        phases = dict(phases)
+
+        season_codes, seasons = pd.factorize(balls["season_id"], sort=True)
+        innings_codes, innings = pd.factorize(balls["innings"], sort=True)
+        phase = phase_codes(balls["over_number"].to_numpy(), phases)
+
+        batter_runs = balls["batter_runs"].to_numpy().astype("int64")
+        total_runs = balls["total_runs"].to_numpy().astype("int64")
+        is_wicket = balls["is_wicket"].to_numpy()
+        legal = ~balls["is_wide_ball"].to_numpy() & ~balls["is_no_ball"].to_numpy()
+        credited = is_wicket & ~balls["wicket_kind"].isin(NON_BOWLER_WICKETS).to_numpy()
+        striker_out = is_wicket & (balls["player_out"].astype(object) == balls["batter"].astype(object)).to_numpy()
+
+        dots = legal & (total_runs == 0)
+        boundaries = (batter_runs == 4) | (batter_runs == 6)
+        deliveries = np.ones(len(balls), dtype="int64")
+        runs = {"batter": batter_runs}
+        wickets = {"batter": striker_out, "bowler": credited}
+
+        # cell of each delivery, without the dimension key
+        base = (season_codes * len(innings) + innings_codes) * len(phases) + phase
+
+        labels, cubes = {}, {}
+        for dimension in DIMENSIONS:
+            key_codes, keys = pd.factorize(balls[dimension], sort=True)
+            named = key_codes >= 0
+            shape = (len(seasons), len(keys), len(innings), len(phases))
+
+            season_part, rest = np.divmod(base[named], len(innings) * len(phases))
+            cell = (season_part * len(keys) + key_codes[named]) * len(innings) * len(phases) + rest
+            size = int(np.prod(shape))
+            measures = [
+                runs.get(dimension, total_runs), legal, deliveries,
+                wickets.get(dimension, is_wicket), dots, boundaries,
+            ]
+            cubes[dimension] = np.stack([
+                np.bincount(cell, weights=values[named], minlength=size).astype("int64").reshape(shape)
+                for values in measures
+            ], axis=-1)
+            labels[dimension] = np.asarray(keys, dtype=object)
+
+        return cls(np.asarray(seasons), np.asarray(innings), list(phases), labels, cubes)
+
+    # ========================================================
+    # LOOKUPS
+    # ========================================================
+
+    def _positions(self, values, selected, axis_name):
+        if selected is None:
+            return slice(None)
+        selected = [selected] if np.ndim(selected) == 0 else list(selected)
+        positions = []
+        for value in selected:
+            found = np.flatnonzero(values == value)
+            if len(found) == 0:
+                raise KeyError(f"Unknown {axis_name} {value!r}")
+            positions.append(found[0])
+        return positions
+
+    # select cells, sum over the axes not kept, one row per non-empty cell
+    def lookup(self, by, season=None, key=None, innings=None, phase=None, keep=AXES):
+        cube = self.cubes[by]
+        axis_values = [self.seasons, self.labels[by], self.innings, np.asarray(self.phases, dtype=object)]
+        selections = [season, key, innings, phase]
+
+        for axis, (values, selected, name) in enumerate(zip(axis_values, selections, AXES)):
+            positions = self._positions(values, selected, name)
+            cube = cube[(slice(None),) * axis + (positions,)]
+            axis_values[axis] = values[positions]
+
+        kept = [axis for axis, name in enumerate(AXES) if name in keep]
+        summed = tuple(axis for axis in range(len(AXES)) if axis not in kept)
+        cube = cube.sum(axis=summed)
+
+        grid = np.meshgrid(*[np.arange(cube.shape[position]) for position in range(len(kept))], indexing="ij")
+        stats = cube.reshape(-1, len(STATS))
+        present = stats[:, STATS.index("deliveries")] > 0
+
+        frame = pd.DataFrame({
+            (by if AXES[axis] == "key" else AXES[axis]): axis_values[axis][positions.ravel()][present]
+            for axis, positions in zip(kept, grid)
+        })
+        for position, stat in enumerate(STATS):
+            frame[stat] = stats[present, position]
+        return _rates(frame)
+
+    def phase_summary(self, by, key=None, season=None, innings=None):
+        keep = ["key", "phase"] if key is None else ["phase"]
+        return self.lookup(by, season=season, key=key, innings=innings, keep=keep)
+
+    # same as SQL/08 query 4 (death over bowling economy)
+    def death_over_economy(self, by="bowler", phase="death"):
+        result = self.lookup(by, phase=phase, keep=["key"])[[by, "economy"]]
+        return result.sort_values("economy", kind="stable", ignore_index=True)
+
+
+# ------------------------------------------------------------
+# Build from the active backend (filters: see query_filters.py)
+# ------------------------------------------------------------
+def load_phase_cube(phases=DEFAULT_PHASES, **filters):
+    if BACKEND == "csv":
+        balls = local_backend.deliveries(**filters)[DELIVERY_COLUMNS]
+    else:
+        from ipl_schema import DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, apply_schema
+        from load_sql_results import load_table_columns
+
+        balls = apply_schema(
+            load_table_columns("ball_by_ball_data", DELIVERY_COLUMNS, filters),
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES,
+        )
+    return PhaseCube.build(balls, phases)
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    cube = load_phase_cube()
+    print(f"Phase cube built in {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    economy = cube.death_over_economy()
+    print(f"\nDeath over economy ({(time.perf_counter() - start) * 1000:.3f} ms):")
+    print(economy.head(15).to_string(index=False))
+
+    print("\nRun rate by phase, per batting team:")
+    summary = cube.phase_summary("team_batting")
+    print(summary.pivot(index="team_batting", columns="phase", values="run_rate")[cube.phases].to_string())
@@ -0,0 +1,265 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Player Form Engine (rolling last-N innings)
+#
+# This script builds, for every player, the sequence of their
+# batting and bowling innings sorted by match date, and the
+# rolling "last N innings" form at every one of them:
+#   batting - runs, balls, dismissals, strike rate, average
+#   bowling - runs conceded, balls, wickets, economy, average
+#
+# Innings totals are summed once per (player, match). The rows
+# are then sorted by (player, match_date) and cumulative sums
+# are taken over the whole array, so the total of any window is
+# prefix[end] - prefix[start]. Windows of every player (of any
+# size N) are computed in one vectorized pass; no window is
+# re-summed.
+#
+# Super over deliveries are not counted. Runs conceded exclude
+# byes, leg byes and penalty runs; wickets exclude run outs and
+# other dismissals not credited to the bowler.
+#
+# Usage:
+#   python player_form.py "V Kohli" 5
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from local_backend import BACKEND
+from matchup_matrix import NON_BOWLER_WICKETS
+
+
+# ----- Form Details -----
+DEFAULT_WINDOW = 5
+
+DELIVERY_COLUMNS = [
+    "match_id", "batter", "bowler", "player_out", "batter_runs", "total_runs",
+    "is_wicket", "is_wide_ball", "is_no_ball", "leg_bye_runs", "bye_runs",
+    "penalty_runs", "wicket_kind", "is_super_over",
+]
+MATCH_COLUMNS = ["match_id", "match_date"]
+
+BATTING_STATS = ["runs", "balls", "dismissals"]
+BOWLING_STATS = ["runs_conceded", "balls", "wickets"]
+
+# rate column -> (numerator, denominator, scale)
+BATTING_RATES = {
+    "strike_rate": ("runs", "balls", 100.0),
+    "average": ("runs", "dismissals", 1.0),
+}
+BOWLING_RATES = {
+    "economy": ("runs_conceded", "balls", 6.0),
+    "average": ("runs_conceded", "wickets", 1.0),
+}
+
+
+def _add_rates(df, rates):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for column, (numerator, denominator, scale) in rates.items():
+            values = df[numerator].to_numpy() * scale / df[denominator].to_numpy()
+            df[column] = np.round(np.where(df[denominator].to_numpy() > 0, values, np.nan), 2)
+    return df
+
+
+# ------------------------------------------------------------
+# Sum per (player, match); rows with no player are skipped
+# ------------------------------------------------------------
+def _innings_totals(player_codes, match_codes, n_matches, columns):
+    keys = []
+    weights = [[] for _ in columns[0]]
+    for codes, values in zip(player_codes, columns):
+        named = codes >= 0
+        keys.append(codes[named].astype("int64") * n_matches + match_codes[named])
+        for position, value in enumerate(values):
+            weights[position].append(value[named])
+
+    keys = np.concatenate(keys)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.column_stack([
+        np.bincount(inverse, weights=np.concatenate(parts), minlength=len(unique_keys))
+        for parts in weights
+    ]).astype("int64")
+    player, match = np.divmod(unique_keys, n_matches)
+    return player, match, totals
+
+
+class FormTable:
+    def __init__(self, role, players, player, match_id, match_date, totals, stats, rates):
+        self.role = role
+        self.players = players
+        self.stats = stats
+        self.rates = rates
+        self._player_code = {name: code for code, name in enumerate(players)}
+
+        # innings of one player are a contiguous run, oldest first
+        order = np.lexsort((match_id, match_date, player))
+        self.player = player[order]
+        self.match_id = match_id[order]
+        self.match_date = match_date[order]
+        self.totals = totals[order]
+
+        self.offsets = np.searchsorted(self.player, np.arange(len(players) + 1))
+        self.prefix = np.vstack([np.zeros((1, len(stats)), dtype="int64"), np.cumsum(self.totals, axis=0)])
+
+        # (player, day) keys for as-of lookups
+        self._days = self.match_date.astype("datetime64[D]").astype("int64")
+        self._first_day = int(self._days.min(initial=0))
+        self._day_span = int(self._days.max(initial=0)) - self._first_day + 2
+        self._date_keys = self.player * self._day_span + (self._days - self._first_day)
+
+        self._tables = {}
+
+    def __len__(self):
+        return len(self.player)
+
+    # sums over rows [start, end) of the sorted innings
+    def _window(self, start, end, player):
+        frame = pd.DataFrame(self.prefix[end] - self.prefix[start], columns=self.stats)
+        frame.insert(0, "innings", end - start)
+        frame.insert(0, "player", np.asarray(self.players, dtype=object)[player])
+        return _add_rates(frame, self.rates)
+
+    # ========================================================
+    # QUERIES
+    # ========================================================
+
+    # every innings with the form over the last n (this one included)
+    def table(self, n=DEFAULT_WINDOW):
+        if n not in self._tables:
+            end = np.arange(1, len(self) + 1)
+            start = np.maximum(end - n, self.offsets[self.player])
+
+            form = self._window(start, end, self.player)
+            form.insert(1, "match_id", self.match_id)
+            form.insert(2, "match_date", self.match_date)
+            form.insert(3, "innings_number", end - self.offsets[self.player])
+            for position, column in enumerate(self.stats):
+                form.insert(4 + position, f"match_{column}", self.totals[:, position])
+            self._tables[n] = form
+        return self._tables[n]
+
+    def player_form(self, player, n=DEFAULT_WINDOW):
+        code = self._player_code.get(player)
+        if code is None:
+            raise KeyError(f"Unknown player {player!r}")
+        return self.table(n).iloc[self.offsets[code]:self.offsets[code + 1]].reset_index(drop=True)
+
+    # form of every player over their last n innings before date
+    def as_of(self, date, n=DEFAULT_WINDOW, min_innings=1):
+        day = int(np.datetime64(pd.Timestamp(date), "D").astype("int64")) - self._first_day
+        codes = np.arange(len(self.players))
+        end = np.searchsorted(self._date_keys, codes * self._day_span + np.clip(day, 0, self._day_span - 1))
+        start = np.maximum(end - n, self.offsets[:-1])
+
+        keep = end - start >= max(min_innings, 1)
+        return self._window(start[keep], end[keep], codes[keep]).reset_index(drop=True)
+
+    def top(self, by, date=None, n=DEFAULT_WINDOW, k=10, min_innings=None, ascending=False):
+        min_innings = n if min_innings is None else min_innings
+        date = pd.Timestamp.max if date is None else date
+        form = self.as_of(date, n, min_innings).dropna(subset=[by])
+        return form.sort_values(by, ascending=ascending, kind="stable").head(k).reset_index(drop=True)
+
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def build_player_form(balls, matches):
+    balls = balls[~balls["is_super_over"].to_numpy()]
+
+    match_codes, match_ids = pd.factorize(balls["match_id"])
+    dates = matches.drop_duplicates("match_id").set_index("match_id")["match_date"]
+    match_dates = dates.reindex(match_ids).to_numpy(dtype="datetime64[ns]")
+
+    # batter, bowler and player_out share one category dtype
+    players = balls["batter"].cat.categories.to_numpy(dtype=object)
+    batter = balls["batter"].cat.codes.to_numpy()
+    bowler = balls["bowler"].cat.codes.to_numpy()
+    player_out = balls["player_out"].cat.codes.to_numpy()
+
+    not_wide = ~balls["is_wide_ball"].to_numpy()
+    legal = not_wide & ~balls["is_no_ball"].to_numpy()
+    credited = balls["is_wicket"].to_numpy() & ~balls["wicket_kind"].isin(NON_BOWLER_WICKETS).to_numpy()
+    conceded = (
+        balls["total_runs"].to_numpy().astype("int64")
+        - balls["leg_bye_runs"].to_numpy() - balls["bye_runs"].to_numpy() - balls["penalty_runs"].to_numpy()
+    )
+    zeros = np.zeros(len(balls), dtype="int64")
+    ones = np.ones(len(balls), dtype="int64")
+
+    # a non-striker run out without facing a ball still batted
+    batting = _innings_totals(
+        [batter, player_out], match_codes, len(match_ids),
+        [[balls["batter_runs"].to_numpy(), not_wide, zeros], [zeros, zeros, ones]],
+    )
+    bowling = _innings_totals(
+        [bowler], match_codes, len(match_ids),
+        [[conceded, legal, credited]],
+    )
+
+    tables = {}
+    for role, (player, match, totals), stats, rates in [
+        ("batting", batting, BATTING_STATS, BATTING_RATES),
+        ("bowling", bowling, BOWLING_STATS, BOWLING_RATES),
+    ]:
+        dated = ~np.isnat(match_dates[match])
+        tables[role] = FormTable(
+            role, players, player[dated], match_ids.to_numpy()[match[dated]], match_dates[match[dated]],
+            totals[dated], stats, rates,
+        )
+    return tables["batting"], tables["bowling"]
+
+
+# ------------------------------------------------------------
+# Build from the active backend (filters: see query_filters.py)
+# ------------------------------------------------------------
+def load_player_form(**filters):
+    if BACKEND == "csv":
+        balls = local_backend.deliveries(**filters)[DELIVERY_COLUMNS]
+        matches = local_backend.matches(**filters)[MATCH_COLUMNS]
+    else:
+        from ipl_schema import (
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, MATCH_SCHEMA, apply_schema,
+        )
+        from load_sql_results import load_table_columns
+
+        balls = apply_schema(
+            load_table_columns("ball_by_ball_data", DELIVERY_COLUMNS, filters),
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES,
+        )
+        matches = apply_schema(load_table_columns("ipl_matches_data", MATCH_COLUMNS, filters), MATCH_SCHEMA)
+    return build_player_form(balls, matches)
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+
+    start = time.perf_counter()
+    batting, bowling = load_player_form()
+    print(f"{len(batting)} batting and {len(bowling)} bowling innings "
+          f"in {time.perf_counter() - start:.3f} s")
+
+    player = sys.argv[1] if len(sys.argv) > 1 else "V Kohli"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WINDOW
+
+    start = time.perf_counter()
+    batting.table(n)
+    bowling.table(n)
+    print(f"Last-{n} form at every innings in {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    print(f"\nBatting form of {player} (last {n} innings):")
+    print(batting.player_form(player, n).tail(10).to_string(index=False))
+
+    print(f"\nBest last-{n} batting average:")
+    print(batting.top("average", n=n).to_string(index=False))
+
+    print(f"\nBest last-{n} economy:")
+    print(bowling.top("economy", n=n, ascending=True).to_string(index=False))
@@ -0,0 +1,316 @@
+
+# ============================================================
+# IPL Performance Analysis
+# On-Disk Query Result Cache
+#
+# This script stores the result of each SQL query on disk so
+# that re-running a script against unchanged tables does not
+# hit SQL Server again.
+#
+# An entry is keyed by the normalized query text plus a
+# fingerprint of every table the query reads (row count and
+# max match_id); names defined in a WITH clause (CTEs) are not
+# tables and are skipped. Appending matches changes the fingerprint, so
+# stale results are never returned. Frames are stored as
+# Parquet when pyarrow is installed, otherwise as pickle files.
+# The cache directory is kept under a size limit by removing
+# the least recently used entries. Entries are written to a
+# temporary file and renamed into place, and writes / evictions
+# hold a lock, so threads (query_executor.fetch_all) can share
+# the cache. Table fingerprints are re-read after
+# IPL_CACHE_FINGERPRINT_TTL seconds, so a long-running process
+# notices new rows.
+#
+# Settings (environment variables):
+#   IPL_CACHE_DIR     cache folder (default: <repo>/.cache/query_results)
+#   IPL_CACHE_MAX_MB  size limit in MB (default: 512)
+#   IPL_CACHE=off     disable the cache
+#   IPL_CACHE_FINGERPRINT_TTL  seconds a table fingerprint is reused (default: 30)
+#
+# Usage:
+#   python query_cache.py            cache folder size
+#   python query_cache.py --clear    remove every entry
+#   python query_cache.py --check    table names found in every query
+# ============================================================
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from instrumentation import stage
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET = True
+except ImportError:
+    PARQUET = False
+
+
+# ----- Cache Details -----
+CACHE_DIR = os.environ.get(
+    "IPL_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "query_results"),
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("IPL_CACHE_MAX_MB", "512")) * 1024 * 1024)
+CACHE_ENABLED = os.environ.get("IPL_CACHE", "on").strip().lower() not in ("off", "0", "false")
+FINGERPRINT_TTL = float(os.environ.get("IPL_CACHE_FINGERPRINT_TTL", "30"))
+
+# tables that carry a match_id column
+MATCH_TABLES = {"ball_by_ball_data", "ipl_matches_data"}
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(?:dbo\.)?\[?(\w+)\]?", re.IGNORECASE)
+# "WITH name AS (" and ", name AS (" in a CTE list
+CTE_PATTERN = re.compile(r"(?:\bWITH|,)\s*\[?(\w+)\]?\s+AS\s*\(", re.IGNORECASE)
+
+# table fingerprints fetched in this process: table -> (fingerprint, time)
+_fingerprints = {}
+
+# put / evict / invalidate change the folder one thread at a time
+_lock = threading.RLock()
+
+
+# ------------------------------------------------------------
+# Query text helpers
+# ------------------------------------------------------------
+def normalize_query(query):
+    query = str(query)
+    query = re.sub(r"--[^\n]*", " ", query)
+    return " ".join(query.split())
+
+
+def query_tables(query):
+    query = str(query)
+    ctes = {name.lower() for name in CTE_PATTERN.findall(query)}
+    return sorted({name.lower() for name in TABLE_PATTERN.findall(query)} - ctes)
+
+
+# query text plus bound parameter values
+def cache_key(query, params=None):
+    key = normalize_query(query)
+    if params:
+        key += " /* " + repr(sorted(params.items())) + " */"
+    return key
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:24]
+
+
+# ------------------------------------------------------------
+# Fingerprint of the source tables (row count, max match_id)
+# ------------------------------------------------------------
+def table_fingerprint(table_name, con):
+    known = _fingerprints.get(table_name)
+    if known is not None and time.monotonic() - known[1] < FINGERPRINT_TTL:
+        return known[0]
+
+    if table_name in MATCH_TABLES:
+        query = f"SELECT COUNT(*), MAX(match_id) FROM dbo.{table_name}"
+    else:
+        query = f"SELECT COUNT(*), NULL FROM dbo.{table_name}"
+
+    if hasattr(con, "connect"):
+        with con.connect() as conn:
+            row = conn.execute(text(query)).fetchone()
+    else:
+        row = con.execute(text(query)).fetchone()
+
+    fingerprint = f"{table_name}:{row[0]}:{row[1]}"
+    _fingerprints[table_name] = (fingerprint, time.monotonic())
+    return fingerprint
+
+
+def query_fingerprint(query, con):
+    return "|".join(table_fingerprint(name, con) for name in query_tables(query))
+
+
+# ------------------------------------------------------------
+# Entry files: <query hash>_<fingerprint hash>.<parquet|pkl>
+# ------------------------------------------------------------
+def _entry_paths(query_hash, fingerprint_hash="*"):
+    pattern = os.path.join(CACHE_DIR, f"{query_hash}_{fingerprint_hash}.*")
+    return glob.glob(pattern)
+
+
+# another thread or process may have removed the file already
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read_entry(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+# written to a hidden temporary file, then renamed, so readers
+# never see a half-written entry
+def _write_file(write, path):
+    handle, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=CACHE_DIR)
+    os.close(handle)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        _remove(temp_path)
+
+
+def _write_entry(df, base_path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    if PARQUET:
+        try:
+            _write_file(lambda path: df.to_parquet(path, index=False), base_path + ".parquet")
+            return
+        except (TypeError, ValueError):
+            # mixed-type object columns cannot be stored as Parquet
+            pass
+
+    _write_file(df.to_pickle, base_path + ".pkl")
+
+
+def get(query, fingerprint):
+    for path in _entry_paths(_hash(normalize_query(query)), _hash(fingerprint)):
+        try:
+            df = _read_entry(path)
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            continue
+        except Exception:
+            _remove(path)
+            continue
+        return df
+    return None
+
+
+def put(query, fingerprint, df):
+    query_hash = _hash(normalize_query(query))
+
+    with _lock:
+        # older fingerprints of the same query can never be hit again
+        for path in _entry_paths(query_hash):
+            _remove(path)
+
+        _write_entry(df, os.path.join(CACHE_DIR, f"{query_hash}_{_hash(fingerprint)}"))
+        evict()
+
+
+# ------------------------------------------------------------
+# Size-bounded LRU eviction
+# ------------------------------------------------------------
+def cache_entries():
+    entries = []
+    for path in glob.glob(os.path.join(CACHE_DIR, "*_*.*")):
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((info.st_mtime, info.st_size, path))
+    return sorted(entries)
+
+
+def evict(max_bytes=None):
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        entries = cache_entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+# ------------------------------------------------------------
+# Explicit invalidation (one query, or the whole cache)
+# ------------------------------------------------------------
+def invalidate(query=None):
+    _fingerprints.clear()
+
+    with _lock:
+        if query is None:
+            paths = [path for _, _, path in cache_entries()]
+        else:
+            paths = _entry_paths(_hash(normalize_query(query)))
+
+        for path in paths:
+            _remove(path)
+    return len(paths)
+
+
+# ------------------------------------------------------------
+# Drop-in replacement for pd.read_sql(query, engine, params=...)
+# ------------------------------------------------------------
+def read_sql_cached(query, con, params=None):
+    if params and isinstance(query, str):
+        query = text(query)  # ":name" parameters
+
+    with stage("read_sql", category="sql") as current:
+        if not CACHE_ENABLED:
+            df = pd.read_sql(query, con, params=params)
+            current.set(cache="off")
+        else:
+            key = cache_key(query, params)
+            fingerprint = query_fingerprint(query, con)
+            df = get(key, fingerprint)
+            current.set(cache="hit" if df is not None else "miss")
+            if df is None:
+                df = pd.read_sql(query, con, params=params)
+                put(key, fingerprint, df)
+        current.record_frame(df)
+    return df
+
+
+# ------------------------------------------------------------
+# Cache summary / clearing when file executed directly
+# ------------------------------------------------------------
+# ------------------------------------------------------------
+# Every query of the SQL folder and match_analysis_visuals.py
+# must only name tables that exist (not CTEs), or fingerprinting
+# it fails on SQL Server
+# ------------------------------------------------------------
+def check_query_tables():
+    from local_backend import TABLE_FILES
+    import match_analysis_visuals
+
+    sql_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SQL")
+    queries = {name: str(query) for name, query in match_analysis_visuals.QUERIES.items()}
+    for path in sorted(glob.glob(os.path.join(sql_dir, "*.sql"))):
+        with open(path, encoding="cp1252") as f:
+            queries[os.path.basename(path)] = f.read()
+
+    unknown = {}
+    for name, query in queries.items():
+        tables = [table for table in query_tables(query) if table not in TABLE_FILES]
+        if tables:
+            unknown[name] = tables
+    return len(queries), unknown
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--check" in sys.argv:
+        checked, unknown = check_query_tables()
+        for name, tables in unknown.items():
+            print(f"{name}: not a table {tables}")
+        print(f"{checked} queries checked, {len(unknown)} name a table that does not exist")
+        sys.exit(1 if unknown else 0)
+    elif "--clear" in sys.argv:
+        print("Removed", invalidate(), "cached results")
+    else:
+        entries = cache_entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"Cache folder: {os.path.abspath(CACHE_DIR)}")
+        print(f"{len(entries)} entries, {total / 1024 / 1024:.2f} MB of {CACHE_MAX_BYTES / 1024 / 1024:.0f} MB")
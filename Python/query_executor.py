@@ -0,0 +1,45 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Concurrent Query Executor
+#
+# This script runs a set of independent SQL queries at the same
+# time on a thread pool. Every query checks out its own
+# connection from the shared engine in database_connection.py,
+# so the total wait is about that of the slowest query instead
+# of the sum of all of them.
+#
+#   data = fetch_all({"top_runs": top_runs_query, "pom": pom_query})
+#   data["top_runs"]  -> DataFrame
+#
+# params (e.g. {"season": 2017}) are bound to every query.
+# ============================================================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from query_cache import read_sql_cached
+
+
+# ----- Executor Details -----
+# default: one worker per pooled connection
+MAX_WORKERS = int(os.environ.get("IPL_QUERY_WORKERS", "0"))
+
+
+def fetch_all(queries, engine=None, params=None):
+    if engine is None:
+        from database_connection import POOL_SIZE, get_engine
+        engine = get_engine()
+        workers = MAX_WORKERS or POOL_SIZE
+    else:
+        pool_size = getattr(engine.pool, "size", None)
+        workers = MAX_WORKERS or (pool_size() if callable(pool_size) else 1)
+
+    workers = max(1, min(workers, len(queries)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ipl-query") as executor:
+        futures = {
+            name: executor.submit(read_sql_cached, query, engine, params)
+            for name, query in queries.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,208 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Season / Team / Venue / Innings Filters
+#
+# This script turns the optional filters
+#   season  - season_id
+#   team    - matches the team played in (either side)
+#   venue   - matches played at the venue
+#   innings - innings number (deliveries only)
+# into
+#   - a SQL WHERE clause with bound parameters, so SQL Server
+#     returns only the matching rows (filter_query() wraps every
+#     dbo.<table> of an existing query in a filtered derived
+#     table), and
+#   - a boolean mask for the local tables (filter_mask()).
+#
+# A filter that does not apply to a table (innings on matches)
+# is ignored for that table.
+# ============================================================
+
+import re
+
+import numpy as np
+from sqlalchemy import text
+
+
+FILTER_NAMES = ["season", "team", "venue", "innings"]
+
+# filters that are stored as numbers
+NUMERIC_FILTERS = {"season", "innings"}
+
+MATCHES_TABLE = "ipl_matches_data"
+DELIVERIES_TABLE = "ball_by_ball_data"
+
+# columns each filter reads, per table
+FILTER_COLUMNS = {
+    DELIVERIES_TABLE: {
+        "season": ["season_id"],
+        "team": ["team_batting", "team_bowling"],
+        "venue": ["match_id"],
+        "innings": ["innings"],
+    },
+    MATCHES_TABLE: {
+        "season": ["season_id"],
+        "team": ["team1", "team2"],
+        "venue": ["venue"],
+    },
+}
+
+TABLE_PATTERN = re.compile(
+    r"\bdbo\.\[?(ball_by_ball_data|ipl_matches_data)\]?(?:(\s+)(?:AS\s+)?(\w+))?",
+    re.IGNORECASE,
+)
+
+# words that can follow a table name but are not an alias
+SQL_KEYWORDS = {
+    "where", "group", "order", "join", "inner", "left", "right", "full", "cross",
+    "on", "having", "union", "with", "as",
+}
+
+
+def make_filters(season=None, team=None, venue=None, innings=None):
+    filters = {"season": season, "team": team, "venue": venue, "innings": innings}
+    filters = {name: value for name, value in filters.items() if value not in (None, "")}
+    for name in NUMERIC_FILTERS & filters.keys():
+        filters[name] = int(filters[name])
+    return filters
+
+
+# hashable form, for memo / lru_cache keys
+def filters_key(filters):
+    return tuple(sorted((filters or {}).items()))
+
+
+def applicable(table_name, filters):
+    columns = FILTER_COLUMNS.get(table_name, {})
+    return {name: value for name, value in (filters or {}).items() if name in columns}
+
+
+def describe(filters):
+    return ", ".join(f"{name}={value}" for name, value in (filters or {}).items()) or "all matches"
+
+
+# ============================================================
+# SQL (bound parameters)
+# ============================================================
+
+def sql_predicates(table_name, filters, alias=None):
+    filters = applicable(table_name, filters)
+    column = (lambda name: f"{alias}.{name}") if alias else (lambda name: name)
+    predicates = []
+
+    if "season" in filters:
+        predicates.append(f"{column('season_id')} = :season")
+    if "team" in filters:
+        first, second = FILTER_COLUMNS[table_name]["team"]
+        predicates.append(f"({column(first)} = :team OR {column(second)} = :team)")
+    if "venue" in filters:
+        if table_name == MATCHES_TABLE:
+            predicates.append(f"{column('venue')} = :venue")
+        else:
+            predicates.append(
+                f"{column('match_id')} IN (SELECT match_id FROM dbo.{MATCHES_TABLE} WHERE venue = :venue)"
+            )
+    if "innings" in filters:
+        predicates.append(f"{column('innings')} = :innings")
+
+    return " AND ".join(predicates), filters
+
+
+def filtered_table_sql(table_name, columns, filters):
+    where, params = sql_predicates(table_name, filters)
+    query = f"SELECT {', '.join(columns)}\nFROM dbo.{table_name}"
+    if where:
+        query += f"\nWHERE {where}"
+    return query, params
+
+
+# ------------------------------------------------------------
+# Filter an existing query: dbo.<table> [alias] becomes
+# (SELECT * FROM dbo.<table> WHERE ...) alias
+# ------------------------------------------------------------
+def filter_query(query, filters):
+    if not filters:
+        return query, {}
+
+    query = str(query)
+    params = {}
+
+    def replace(match):
+        table_name, space, word = match.group(1).lower(), match.group(2), match.group(3)
+        where, table_params = sql_predicates(table_name, filters)
+        if not where:
+            return match.group(0)
+        params.update(table_params)
+
+        derived = f"(SELECT * FROM dbo.{table_name} WHERE {where})"
+        if word and word.lower() not in SQL_KEYWORDS:
+            return f"{derived} {word}"
+        return f"{derived} AS {table_name}" + (f"{space}{word}" if word else "")
+
+    return text(TABLE_PATTERN.sub(replace, query)), params
+
+
+def filter_queries(queries, filters):
+    filtered = {}
+    params = {}
+    for name, query in queries.items():
+        filtered[name], query_params = filter_query(query, filters)
+        params.update(query_params)
+    return filtered, params
+
+
+# ============================================================
+# LOCAL TABLES (boolean mask)
+# ============================================================
+
+def filter_mask(df, table_name, filters, matches=None):
+    filters = applicable(table_name, filters)
+    mask = np.ones(len(df), dtype=bool)
+
+    if "season" in filters:
+        mask &= df["season_id"].to_numpy() == filters["season"]
+    if "team" in filters:
+        first, second = FILTER_COLUMNS[table_name]["team"]
+        mask &= ((df[first] == filters["team"]) | (df[second] == filters["team"])).to_numpy(dtype=bool)
+    if "venue" in filters:
+        if table_name == MATCHES_TABLE:
+            mask &= (df["venue"] == filters["venue"]).to_numpy(dtype=bool)
+        else:
+            match_ids = matches.loc[matches["venue"] == filters["venue"], "match_id"]
+            mask &= df["match_id"].isin(match_ids).to_numpy()
+    if "innings" in filters:
+        mask &= df["innings"].to_numpy() == filters["innings"]
+
+    return mask
+
+
+def mask_columns(table_name, filters):
+    columns = []
+    for name in applicable(table_name, filters):
+        columns += FILTER_COLUMNS[table_name][name]
+    return list(dict.fromkeys(columns))
+
+
+# ============================================================
+# COMMAND LINE
+# ============================================================
+
+def add_filter_arguments(parser):
+    group = parser.add_argument_group("filters")
+    group.add_argument("--season", type=int, help="season_id, e.g. 2017")
+    group.add_argument("--team", help="only matches this team played in")
+    group.add_argument("--venue", help="only matches at this venue")
+    group.add_argument("--innings", type=int, help="innings number (deliveries only)")
+    return parser
+
+
+def filters_from_args(args):
+    return make_filters(**{name: getattr(args, name, None) for name in FILTER_NAMES})
+
+
+def parse_filters(description=None):
+    import argparse
+
+    parser = add_filter_arguments(argparse.ArgumentParser(description=description))
+    return filters_from_args(parser.parse_args())
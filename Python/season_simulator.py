@@ -0,0 +1,455 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Monte Carlo Innings and Season Simulator
+#
+# This script plays out the remaining league fixtures of a
+# season from ipl_matches_data many times and reports each
+# team's playoff odds. League fixtures are the matches with a
+# match_number and no playoff stage; up to 2024 the playoffs
+# have a blank stage and are only told apart by their missing
+# match_number.
+#
+# Every ball is sampled from the outcome distribution of the
+# batter on strike against the bowler of that over, by phase
+# (powerplay / middle / death, as in phase_cube.py):
+#   dot, 1, 2, 3, 4, 6, wicket, extra (wide or no-ball)
+# Player distributions from ball_by_ball_data are shrunk to
+# the league distribution of the phase and combined with the
+# odds-ratio (log5) method. Batting orders and bowling plans
+# come from each team's latest season in the delivery data;
+# missing players are league-average replacements.
+#
+# Innings are simulated ball by ball for a whole batch of
+# simulations at once (numpy arrays, one row per simulation),
+# and batches run in a process pool. Each batch has its own
+# seed spawned from --seed, so results are the same for any
+# number of processes.
+#
+# Simplifications: wides and no-balls count one run and are
+# bowled again, a wicket always dismisses the striker, ties are
+# a coin flip (super over), and teams level on points are
+# separated by net runs of the simulated matches.
+#
+# Usage:
+#   python season_simulator.py --season 2025 --played 35 --simulations 100000
+# ============================================================
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from delivery_index import SORT_COLUMNS
+from local_backend import BACKEND
+from phase_cube import DEFAULT_PHASES, phase_codes
+
+
+# ----- Simulation Details -----
+OUTCOMES = ["dot", "one", "two", "three", "four", "six", "wicket", "extra"]
+OUTCOME_RUNS = np.array([0, 1, 2, 3, 4, 6, 0, 1])
+WICKET = OUTCOMES.index("wicket")
+EXTRA = OUTCOMES.index("extra")
+
+OVERS = 20
+BALLS_PER_OVER = 6
+BATTING_SLOTS = 11
+MAX_OVERS_PER_BOWLER = 4
+BOWLERS_USED = 6
+PLAYOFF_TEAMS = 4
+
+# balls of league data a player's distribution is shrunk with
+PRIOR_BALLS = 60
+
+PLAYOFF_STAGES = ["Qualifier 1", "Eliminator", "Qualifier 2", "Final"]
+
+DEFAULT_SIMULATIONS = 100_000
+CHUNK_SIMULATIONS = 5_000
+DEFAULT_SEED = 2025
+
+DELIVERY_COLUMNS = SORT_COLUMNS + [
+    "season_id", "team_batting", "team_bowling", "batter", "bowler", "non_striker",
+    "total_runs", "is_wicket", "is_wide_ball", "is_no_ball",
+]
+MATCH_COLUMNS = ["match_id", "season_id", "match_date", "match_number", "team1", "team2", "match_winner", "result", "stage"]
+
+
+# ============================================================
+# OUTCOME DISTRIBUTIONS
+# ============================================================
+
+def outcome_codes(balls):
+    total_runs = balls["total_runs"].to_numpy()
+    extra = balls["is_wide_ball"].to_numpy() | balls["is_no_ball"].to_numpy()
+    return np.select(
+        [extra, balls["is_wicket"].to_numpy(), total_runs == 0, total_runs == 1,
+         total_runs == 2, total_runs == 3, total_runs >= 6],
+        [EXTRA, WICKET, 0, 1, 2, 3, 5],
+        default=4,  # four (and the odd five)
+    )
+
+
+def _counts(codes, phase, outcome, n_players, n_phases):
+    named = codes >= 0
+    cell = (codes[named] * n_phases + phase[named]) * len(OUTCOMES) + outcome[named]
+    counts = np.bincount(cell, minlength=n_players * n_phases * len(OUTCOMES))
+    return counts.reshape(n_players, n_phases, len(OUTCOMES)).astype(float)
+
+
+class OutcomeModel:
+    def __init__(self, balls, phases=DEFAULT_PHASES):
+        self.phases = dict(phases)
+        n_phases = len(self.phases)
+
+        # batter and bowler share one category dtype
+        self.players = balls["batter"].cat.categories
+        phase = phase_codes(balls["over_number"].to_numpy(), self.phases)
+        outcome = outcome_codes(balls)
+
+        league = np.bincount(phase * len(OUTCOMES) + outcome, minlength=n_phases * len(OUTCOMES))
+        league = league.reshape(n_phases, len(OUTCOMES)).astype(float) + 1
+        self.league = league / league.sum(axis=1, keepdims=True)
+
+        self.batting = self._shrunk(_counts(balls["batter"].cat.codes.to_numpy(), phase, outcome,
+                                            len(self.players), n_phases))
+        self.bowling = self._shrunk(_counts(balls["bowler"].cat.codes.to_numpy(), phase, outcome,
+                                            len(self.players), n_phases))
+        self.over_phase = phase_codes(np.arange(OVERS), self.phases)
+
+    def _shrunk(self, counts):
+        counts = counts + PRIOR_BALLS * self.league
+        return counts / counts.sum(axis=2, keepdims=True)
+
+    def code(self, player):
+        return self.players.get_loc(player) if player in self.players else -1
+
+    # (batting slot, over, outcome) probabilities of one innings
+    def innings_table(self, batting_order, bowling_plan):
+        phase = self.over_phase
+        league = self.league[phase]                                      # (over, outcome)
+        bowler = np.array([self.bowling[code, phase[over]] if code >= 0 else league[over]
+                           for over, code in enumerate(bowling_plan)])    # (over, outcome)
+        batter = np.array([self.batting[code][phase] if code >= 0 else league
+                           for code in batting_order])                    # (slot, over, outcome)
+
+        table = batter * bowler[None] / league[None]
+        return table / table.sum(axis=2, keepdims=True)
+
+
+# ============================================================
+# TEAM LINEUPS
+# ============================================================
+
+def _latest_season(balls, column, team, season):
+    seasons = balls.loc[balls[column] == team, "season_id"].unique()
+    if len(seasons) == 0:
+        return None
+    earlier = seasons[seasons <= season]
+    return earlier.max() if len(earlier) else seasons.max()
+
+
+def batting_order(balls, team, season, model):
+    latest = _latest_season(balls, "team_batting", team, season)
+    if latest is None:
+        return np.full(BATTING_SLOTS, -1)
+    team_balls = balls[(balls["team_batting"] == team) & (balls["season_id"] == latest)]
+
+    # position in the innings where each player first appears
+    position = team_balls.groupby(["match_id", "innings"]).cumcount()
+    arrivals = pd.concat([
+        pd.DataFrame({"match_id": team_balls["match_id"], "innings": team_balls["innings"],
+                      "player": team_balls[column].astype(object), "position": position})
+        for column in ["batter", "non_striker"]
+    ])
+    first = arrivals.groupby(["match_id", "innings", "player"])["position"].min()
+    order = first.groupby(["match_id", "innings"]).rank(method="first")
+    summary = order.groupby("player").agg(["size", "mean"])
+
+    # most regular players, in their usual order
+    regulars = summary.sort_values(["size", "mean"], ascending=[False, True]).head(BATTING_SLOTS)
+    names = regulars.sort_values("mean").index
+    codes = [model.code(name) for name in names]
+    return np.array(codes + [-1] * (BATTING_SLOTS - len(codes)))
+
+
+def bowling_plan(balls, team, season, model):
+    latest = _latest_season(balls, "team_bowling", team, season)
+    plan = np.full(OVERS, -1)
+    if latest is None:
+        return plan
+    team_balls = balls[(balls["team_bowling"] == team) & (balls["season_id"] == latest)]
+
+    phase = phase_codes(team_balls["over_number"].to_numpy(), model.phases)
+    usage = pd.crosstab(team_balls["bowler"].astype(object).to_numpy(), phase)
+    usage = usage.loc[usage.sum(axis=1).nlargest(BOWLERS_USED).index]
+    share = usage / usage.sum(axis=1).to_numpy()[:, None]
+
+    # each over to the bowler most used in its phase, at most four
+    # overs each and never two in a row
+    quota = dict.fromkeys(share.index, MAX_OVERS_PER_BOWLER)
+    previous = None
+    for over in range(OVERS):
+        column = model.over_phase[over]
+        candidates = [name for name in share.index if quota[name] > 0 and name != previous]
+        if not candidates or column not in share.columns:
+            previous = None
+            continue
+        chosen = max(candidates, key=lambda name: (share.at[name, column], usage.loc[name].sum()))
+        quota[chosen] -= 1
+        plan[over] = model.code(chosen)
+        previous = chosen
+    return plan
+
+
+# ============================================================
+# VECTORIZED INNINGS (one row per simulated innings)
+# ============================================================
+
+def cumulative(tables):
+    cdf = np.cumsum(tables, axis=-1)
+    cdf[..., -1] = 1.0
+    return cdf.astype("float32")
+
+
+# cdf: (table, batting slot, over, outcome); table_index: one per row
+def simulate_innings(cdf, table_index, rng, target=None):
+    n = len(table_index)
+    slots_per_table = cdf.shape[1] * cdf.shape[2]
+    cdf = cdf.reshape(-1, cdf.shape[-1])
+    final_runs = np.zeros(n, dtype="int64")
+
+    # state of the innings still in progress
+    rows = np.arange(n)
+    tables = np.asarray(table_index) * slots_per_table
+    target = None if target is None else np.asarray(target)
+    runs = np.zeros(n, dtype="int64")
+    wickets = np.zeros(n, dtype="int64")
+    legal = np.zeros(n, dtype="int64")
+    striker = np.zeros(n, dtype="int64")
+    non_striker = np.ones(n, dtype="int64")
+
+    while len(rows):
+        # first outcome whose cumulative probability reaches u
+        probabilities = cdf[tables + striker * OVERS + legal // BALLS_PER_OVER]
+        outcome = (probabilities < rng.random(len(rows), dtype="float32")[:, None]).argmin(axis=1)
+
+        scored = OUTCOME_RUNS[outcome]
+        is_legal = outcome != EXTRA
+        out = outcome == WICKET
+        runs += scored
+        legal += is_legal
+        wickets += out
+
+        # next batter takes strike after a wicket
+        striker = np.where(out, np.minimum(wickets + 1, BATTING_SLOTS - 1), striker)
+
+        # change ends on odd runs and at the end of an over
+        swap = (is_legal & (scored % 2 == 1)) ^ (is_legal & (legal % BALLS_PER_OVER == 0))
+        striker, non_striker = np.where(swap, non_striker, striker), np.where(swap, striker, non_striker)
+
+        done = (wickets >= BATTING_SLOTS - 1) | (legal >= OVERS * BALLS_PER_OVER)
+        if target is not None:
+            done |= runs >= target
+        final_runs[rows[done]] = runs[done]
+
+        going = ~done
+        rows, tables, runs, wickets, legal = rows[going], tables[going], runs[going], wickets[going], legal[going]
+        striker, non_striker = striker[going], non_striker[going]
+        if target is not None:
+            target = target[going]
+
+    return final_runs
+
+
+# first innings score, chase score and chasing team win per row
+def simulate_match(cdf, first_index, second_index, rng):
+    first = simulate_innings(cdf, first_index, rng)
+    second = simulate_innings(cdf, second_index, rng, target=first + 1)
+    chasing_won = (second > first) | ((second == first) & (rng.random(len(first)) < 0.5))
+    return first, second, chasing_won
+
+
+# ============================================================
+# SEASON
+# ============================================================
+
+class SeasonSimulator:
+    def __init__(self, balls, matches, season, played=None, phases=DEFAULT_PHASES):
+        self.season = season
+        league = matches[
+            (matches["season_id"] == season)
+            & matches["match_number"].notna()
+            & ~matches["stage"].isin(PLAYOFF_STAGES)
+        ]
+        league = league.sort_values(["match_date", "match_number"], kind="stable")
+
+        self.played = len(league) // 2 if played is None else min(played, len(league))
+        self.teams = sorted(set(league["team1"].astype(object)) | set(league["team2"].astype(object)))
+        team_code = {team: code for code, team in enumerate(self.teams)}
+
+        # points from matches already played (2 for a win, 1 each for no result)
+        self.points = np.zeros(len(self.teams))
+        for match in league.iloc[:self.played].itertuples():
+            if str(match.result) == "no result" or pd.isna(match.match_winner):
+                self.points[[team_code[match.team1], team_code[match.team2]]] += 1
+            else:
+                self.points[team_code[match.match_winner]] += 2
+
+        remaining = league.iloc[self.played:]
+        self.home = remaining["team1"].astype(object).map(team_code).to_numpy(dtype="int64")
+        self.away = remaining["team2"].astype(object).map(team_code).to_numpy(dtype="int64")
+
+        # innings table for every (batting team, bowling team)
+        model = OutcomeModel(balls, phases)
+        orders = [batting_order(balls, team, season, model) for team in self.teams]
+        plans = [bowling_plan(balls, team, season, model) for team in self.teams]
+        self.cdf = cumulative(np.stack([
+            model.innings_table(orders[batting], plans[bowling])
+            for batting in range(len(self.teams)) for bowling in range(len(self.teams))
+        ]))
+
+    @property
+    def fixtures(self):
+        return list(zip(self.home.tolist(), self.away.tolist()))
+
+    def table_index(self, batting, bowling):
+        return batting * len(self.teams) + bowling
+
+    # what-if: one fixture played n times, team1 batting first
+    def head_to_head(self, team1, team2, n=10_000, seed=DEFAULT_SEED):
+        batting, bowling = self.teams.index(team1), self.teams.index(team2)
+        first, second, chasing_won = simulate_match(
+            self.cdf, np.full(n, self.table_index(batting, bowling)), np.full(n, self.table_index(bowling, batting)),
+            np.random.default_rng(seed),
+        )
+        return {
+            f"{team1} win %": round(float(100.0 - chasing_won.mean() * 100), 2),
+            f"{team1} average score": round(float(first.mean()), 1),
+            f"{team2} average chase": round(float(second.mean()), 1),
+        }
+
+    # ----- one batch of season simulations (every fixture at once) -----
+    def simulate_chunk(self, n, seed):
+        rng = np.random.default_rng(seed)
+        n_teams = len(self.teams)
+
+        home_bats = rng.random((n, len(self.home))) < 0.5
+        first_team = np.where(home_bats, self.home, self.away).ravel()
+        second_team = np.where(home_bats, self.away, self.home).ravel()
+        first, second, chasing_won = simulate_match(
+            self.cdf, self.table_index(first_team, second_team), self.table_index(second_team, first_team), rng,
+        )
+
+        simulation = np.repeat(np.arange(n), len(self.home)) * n_teams
+        winner = np.where(chasing_won, second_team, first_team)
+        margin = first - second
+        points = self.points + 2 * np.bincount(simulation + winner, minlength=n * n_teams).reshape(n, n_teams)
+        net_runs = (
+            np.bincount(simulation + first_team, weights=margin, minlength=n * n_teams)
+            - np.bincount(simulation + second_team, weights=margin, minlength=n * n_teams)
+        ).reshape(n, n_teams)
+
+        # rank by points, then net runs, then at random
+        score = points * 1e6 + net_runs + rng.random(points.shape) * 1e-3
+        ranking = np.argsort(-score, axis=1)
+        top = np.zeros((n, n_teams), dtype=bool)
+        np.put_along_axis(top, ranking[:, :PLAYOFF_TEAMS], True, axis=1)
+
+        return {
+            "simulations": n,
+            "playoffs": top.sum(axis=0),
+            "table_top": np.bincount(ranking[:, 0], minlength=n_teams),
+            "points": points.sum(axis=0),
+        }
+
+
+def _run_chunk(args):
+    simulator, n, seed = args
+    return simulator.simulate_chunk(n, seed)
+
+
+def run_simulations(simulator, simulations=DEFAULT_SIMULATIONS, seed=DEFAULT_SEED,
+                    processes=None, chunk_size=CHUNK_SIMULATIONS):
+    if simulations < 1 or chunk_size < 1:
+        raise ValueError(f"simulations and chunk_size must be at least 1, got {simulations} and {chunk_size}")
+
+    sizes = [chunk_size] * (simulations // chunk_size)
+    if simulations % chunk_size:
+        sizes.append(simulations % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(simulator, size, child) for size, child in zip(sizes, seeds)]
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_run_chunk, jobs))
+    seconds = time.perf_counter() - start
+
+    total = {key: sum(result[key] for result in results) for key in results[0]}
+    odds = pd.DataFrame({
+        "team": simulator.teams,
+        "current_points": simulator.points.astype(int),
+        "expected_points": np.round(total["points"] / simulations, 2),
+        "playoff_odds": np.round(total["playoffs"] * 100.0 / simulations, 2),
+        "table_top_odds": np.round(total["table_top"] * 100.0 / simulations, 2),
+    })
+    odds = odds.sort_values(["playoff_odds", "expected_points"], ascending=False, ignore_index=True)
+    return odds, seconds
+
+
+# ------------------------------------------------------------
+# Build from the active backend
+# ------------------------------------------------------------
+def load_tables():
+    if BACKEND == "csv":
+        return local_backend.deliveries()[DELIVERY_COLUMNS], local_backend.matches()[MATCH_COLUMNS]
+
+    from ipl_schema import (
+        DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, MATCH_SCHEMA, MATCH_SHARED_CATEGORIES, apply_schema,
+    )
+    from load_sql_results import load_table_columns
+
+    balls = apply_schema(
+        load_table_columns("ball_by_ball_data", DELIVERY_COLUMNS), DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES,
+    )
+    matches = apply_schema(
+        load_table_columns("ipl_matches_data", MATCH_COLUMNS), MATCH_SCHEMA, MATCH_SHARED_CATEGORIES,
+    )
+    return balls, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the rest of an IPL season.")
+    parser.add_argument("--season", type=int, help="season_id (default: the latest)")
+    parser.add_argument("--played", type=int, help="league matches already played (default: half)")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIMULATIONS, help="simulations per batch")
+    args = parser.parse_args()
+    if args.simulations < 1 or args.chunk_size < 1:
+        parser.error("--simulations and --chunk-size must be at least 1")
+
+    balls, matches = load_tables()
+    season = args.season or int(matches["season_id"].max())
+
+    start = time.perf_counter()
+    simulator = SeasonSimulator(balls, matches, season, args.played)
+    print(f"Season {season}: {simulator.played} league matches played, {len(simulator.fixtures)} to simulate "
+          f"(model built in {time.perf_counter() - start:.3f} s)")
+
+    processes = args.processes or os.cpu_count()
+    odds, seconds = run_simulations(simulator, args.simulations, args.seed, processes, args.chunk_size)
+    print(f"\n{args.simulations:,} seasons in {seconds:.2f} s on {processes} processes "
+          f"({args.simulations / seconds:,.0f} simulations/s, seed {args.seed})\n")
+    print(odds.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
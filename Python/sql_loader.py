@@ -0,0 +1,247 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Bulk CSV to SQL Loader
+#
+# This script loads the "IPL Data" CSV files into typed SQL
+# tables (dbo.<table>), so the analysis queries no longer have
+# to cast text columns:
+#   - column types come from ipl_schema.py (ball_by_ball_data,
+#     ipl_matches_data) or are inferred from the CSV (players,
+#     teams); text columns are sized to their longest value
+#   - rows are inserted in batches (--batch-size) with
+#     fast_executemany on SQL Server (pyodbc)
+#   - tables are loaded in parallel (--workers), each in its
+#     own transaction, and indexed after the load
+#
+# The default target is the database_connection.py engine.
+# Any SQLAlchemy URL can be given instead; a SQLite file is
+# attached as schema "dbo", so it works as a local stand-in
+# (SQLite writes one table at a time).
+#
+# The CSV files are checked with data_validation.py first; the
+# load stops if any rule at "error" severity fails, unless
+# --allow-errors is given (--skip-validation skips the check).
+#
+# Usage:
+#   python sql_loader.py
+#   python sql_loader.py --target sqlite:///ipl.db --batch-size 5000
+# ============================================================
+
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Date, Float, Index, Integer, MetaData, SmallInteger, Table, Unicode,
+    create_engine, event, inspect, text,
+)
+
+import local_backend
+from data_validation import print_report, validate
+from ipl_schema import BLANK_VALUE_COLUMNS, DELIVERY_SCHEMA, MATCH_SCHEMA
+
+
+# ----- Loader Details -----
+SCHEMA = "dbo"
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+
+TABLE_SCHEMAS = {
+    "ball_by_ball_data": DELIVERY_SCHEMA,
+    "ipl_matches_data": MATCH_SCHEMA,
+}
+
+# columns filtered / joined on by the analysis queries
+INDEXES = {
+    "ball_by_ball_data": ["match_id", "batter", "bowler", "season_id", "batter_id"],
+    "ipl_matches_data": ["match_id", "season_id"],
+    "players_data_updated": ["player_id"],
+    "teams_data": ["team_id"],
+}
+
+SQL_TYPES = {
+    "int8": SmallInteger,  # TINYINT is unsigned on SQL Server
+    "int16": SmallInteger,
+    "int32": Integer,
+    "int64": BigInteger,
+    "float64": Float,
+    "bool": Boolean,
+    "datetime": Date,
+}
+
+# text column sizes (longest value rounded up to one of these)
+TEXT_LENGTHS = [50, 100, 255, 1000, 4000]
+
+
+# ============================================================
+# TARGET ENGINE
+# ============================================================
+
+def sqlite_engine(path):
+    # main database in memory, the file attached as "dbo"
+    def connect():
+        connection = sqlite3.connect(":memory:", timeout=60, check_same_thread=False)
+        connection.execute("ATTACH DATABASE ? AS dbo", (path,))
+        return connection
+
+    return create_engine("sqlite://", creator=connect)
+
+
+def target_engine(url=None):
+    if url is None:
+        from database_connection import get_engine
+        engine = get_engine()
+    elif url.startswith("sqlite:///"):
+        engine = sqlite_engine(url[len("sqlite:///"):])
+    else:
+        engine = create_engine(url)
+        if engine.dialect.name != "mssql":
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+
+    # pyodbc sends each batch as one parameter array
+    @event.listens_for(engine, "before_cursor_execute")
+    def fast_executemany(conn, cursor, statement, parameters, context, executemany):
+        if executemany and hasattr(cursor, "fast_executemany"):
+            cursor.fast_executemany = True
+
+    return engine
+
+
+# ============================================================
+# TYPED TABLES
+# ============================================================
+
+def _text_type(values):
+    longest = int(values.dropna().astype(str).str.len().max()) if values.notna().any() else 1
+    length = next((size for size in TEXT_LENGTHS if longest <= size), None)
+    return Unicode(length) if length else Unicode()
+
+
+def _column_type(name, values, schema):
+    dtype = schema.get(name, str(values.dtype))
+    if dtype in ("category", "object") or pd.api.types.is_string_dtype(values):
+        return _text_type(values)
+    return SQL_TYPES[dtype.lower()]()
+
+
+def table_definition(name, df, metadata):
+    schema = TABLE_SCHEMAS.get(name, {})
+    # only the indexed key columns are NOT NULL
+    keys = INDEXES.get(name, [])
+    columns = [
+        Column(column, _column_type(column, df[column], schema),
+               nullable=column not in keys or bool(df[column].isna().any()))
+        for column in df.columns
+    ]
+    return Table(name, metadata, *columns, schema=SCHEMA)
+
+
+# ------------------------------------------------------------
+# Rows as plain Python values (None for missing)
+# ------------------------------------------------------------
+def _records(df):
+    df = df.copy()
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.date
+    df = df.astype(object)
+
+    # blank text is NULL, as in ipl_schema.null_tokens(); players and
+    # teams are read without default NA values, so blanks are still ""
+    blank = (df == "") & ~df.columns.isin(BLANK_VALUE_COLUMNS)
+    return df.where(df.notna() & ~blank, None).to_dict("records")
+
+
+def _batches(df, batch_size):
+    for start in range(0, len(df), batch_size):
+        yield _records(df.iloc[start:start + batch_size])
+
+
+# ============================================================
+# LOAD
+# ============================================================
+
+def load_table(engine, name, batch_size=DEFAULT_BATCH_SIZE):
+    start = time.perf_counter()
+    df = local_backend.load_table(name)
+    table = table_definition(name, df, MetaData())
+
+    with engine.begin() as conn:
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+        for batch in _batches(df, batch_size):
+            conn.execute(table.insert(), batch)
+
+        # indexes after the rows, so they are built once
+        for column in INDEXES.get(name, []):
+            Index(f"ix_{name}_{column}", table.c[column]).create(conn)
+
+    return {"table": name, "rows": len(df), "seconds": time.perf_counter() - start}
+
+
+def load_all(engine, tables=None, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+    tables = tables or list(local_backend.TABLE_FILES)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(load_table, engine, name, batch_size) for name in tables]
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"  {result['table']:<22} {result['rows']:>9,} rows  {result['seconds']:7.2f} s  "
+                  f"({result['rows'] / result['seconds']:,.0f} rows/s)", flush=True)
+            results.append(result)
+    return results
+
+
+# ------------------------------------------------------------
+# Rows in each loaded table, compared with the CSV files
+# ------------------------------------------------------------
+def check_counts(engine, tables=None):
+    tables = tables or list(local_backend.TABLE_FILES)
+    existing = set(inspect(engine).get_table_names(schema=SCHEMA))
+    counts = {}
+    with engine.connect() as conn:
+        for name in tables:
+            loaded = conn.execute(text(f"SELECT COUNT(*) FROM {SCHEMA}.{name}")).scalar() if name in existing else 0
+            counts[name] = (int(loaded), len(local_backend.load_table(name)))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load the IPL CSV files into typed SQL tables.")
+    parser.add_argument("--target", help="SQLAlchemy URL (default: the SQL Server in database_connection.py)")
+    parser.add_argument("--tables", nargs="+", choices=list(local_backend.TABLE_FILES), help="only these tables")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per insert batch")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="tables loaded in parallel")
+    parser.add_argument("--skip-validation", action="store_true", help="load without checking the CSV files")
+    parser.add_argument("--allow-errors", action="store_true", help="load even if validation finds errors")
+    args = parser.parse_args()
+
+    if not args.skip_validation:
+        report = validate()
+        print_report(report)
+        if report.errors and not args.allow_errors:
+            print("Validation failed, nothing loaded (use --allow-errors to load anyway)")
+            return 1
+        print()
+
+    engine = target_engine(args.target)
+    target = args.target or engine.url.render_as_string(hide_password=True)
+    print(f"Loading {local_backend.DATA_DIR} into {target} "
+          f"(batch size {args.batch_size}, {args.workers} workers)")
+
+    start = time.perf_counter()
+    load_all(engine, args.tables, args.batch_size, args.workers)
+    print(f"Done in {time.perf_counter() - start:.2f} s")
+
+    for name, (loaded, expected) in check_counts(engine, args.tables).items():
+        status = "ok" if loaded == expected else f"expected {expected}"
+        print(f"  {name:<22} {loaded:>9,} rows  {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Streaming Aggregation over Deliveries
+#
+# This script reads ball_by_ball_data in fixed-size chunks
+# (from the CSV file or from SQL Server with a server-side
+# cursor) and folds every chunk into small partial aggregates.
+# Only one chunk and the per-key totals are held in memory, so
+# memory use stays flat however many deliveries there are.
+#
+# A PartialAggregate keeps, per key (team, player, ...):
+#   - row counts
+#   - sums of numeric / flag columns
+#   - sets of distinct values (e.g. match_id)
+# Two partial aggregates can be merged, so chunks (or files)
+# can also be aggregated separately and combined afterwards.
+# ============================================================
+
+import os
+
+import pandas as pd
+from sqlalchemy import text
+
+import local_backend
+from instrumentation import traced_chunks
+from ipl_schema import DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, apply_schema, read_typed_csv
+from local_backend import BACKEND
+from query_filters import DELIVERIES_TABLE, filter_mask, mask_columns, sql_predicates
+
+
+# ----- Streaming Details -----
+DEFAULT_CHUNKSIZE = 250_000
+
+
+# ============================================================
+# MERGEABLE PARTIAL AGGREGATE
+# ============================================================
+
+def _plain_index(data):
+    # categories differ from chunk to chunk, labels do not
+    data.index = data.index.astype(object)
+    return data
+
+
+class PartialAggregate:
+    def __init__(self, key, sum_columns=(), distinct_columns=()):
+        self.key = key
+        self.sum_columns = list(sum_columns)
+        self.distinct_columns = list(distinct_columns)
+
+        self.counts = pd.Series(dtype="int64")
+        self.sums = pd.DataFrame(columns=self.sum_columns, dtype="float64")
+        self.distinct = {column: {} for column in self.distinct_columns}
+
+    # fold one chunk of rows into the totals
+    def update(self, chunk):
+        grouped = chunk.groupby(self.key, observed=True)
+
+        partial = PartialAggregate(self.key, self.sum_columns, self.distinct_columns)
+        partial.counts = _plain_index(grouped.size())
+        partial.sums = _plain_index(grouped[self.sum_columns].sum().astype("float64"))
+        for column in self.distinct_columns:
+            unique_values = _plain_index(grouped[column].unique())
+            partial.distinct[column] = {key: set(values) for key, values in unique_values.items()}
+
+        return self.merge(partial)
+
+    # combine with another partial aggregate of the same shape
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+        self.sums = self.sums.add(other.sums, fill_value=0)
+        for column in self.distinct_columns:
+            totals = self.distinct[column]
+            for key, values in other.distinct[column].items():
+                totals.setdefault(key, set()).update(values)
+        return self
+
+    def mean(self, column):
+        return self.sums[column] / self.counts
+
+    def distinct_count(self, column):
+        return pd.Series({key: len(values) for key, values in self.distinct[column].items()}, dtype="int64")
+
+    def result(self):
+        df = self.sums.copy()
+        df.insert(0, "rows", self.counts)
+        for column in self.distinct_columns:
+            df[f"distinct_{column}"] = self.distinct_count(column)
+        return df.rename_axis(self.key)
+
+
+# ============================================================
+# CHUNKED READERS
+# ============================================================
+
+def iter_csv_chunks(columns, chunksize=DEFAULT_CHUNKSIZE, path=None, filters=None):
+    file_name, encoding = local_backend.TABLE_FILES["ball_by_ball_data"]
+    path = path or os.path.join(local_backend.DATA_DIR, file_name)
+
+    # filter columns are read too, then dropped
+    read_columns = list(dict.fromkeys(columns + mask_columns(DELIVERIES_TABLE, filters)))
+    matches = local_backend.matches() if filters and "venue" in filters else None
+
+    reader = read_typed_csv(
+        path, DELIVERY_SCHEMA, encoding=encoding, usecols=read_columns, chunksize=chunksize
+    )
+    with reader:
+        for chunk in reader:
+            if filters:
+                chunk = chunk.loc[filter_mask(chunk, DELIVERIES_TABLE, filters, matches), columns]
+            yield chunk
+
+
+def iter_sql_chunks(columns, chunksize=DEFAULT_CHUNKSIZE, engine=None, filters=None):
+    if engine is None:
+        from database_connection import get_engine
+        engine = get_engine()
+
+    where, params = sql_predicates(DELIVERIES_TABLE, filters)
+    query = text(f"SELECT {', '.join(columns)} FROM dbo.ball_by_ball_data" + (f" WHERE {where}" if where else ""))
+
+    # stream_results keeps the rows on the server until fetched
+    with engine.connect().execution_options(stream_results=True) as conn:
+        chunks = pd.read_sql(query, conn, params=params, chunksize=chunksize)
+        for chunk in traced_chunks("read_sql_chunk", chunks):
+            yield apply_schema(chunk, DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES)
+
+
+def iter_delivery_chunks(columns, chunksize=DEFAULT_CHUNKSIZE, filters=None):
+    if BACKEND == "csv":
+        return iter_csv_chunks(columns, chunksize, filters=filters)
+    return iter_sql_chunks(columns, chunksize, filters=filters)
+
+
+# ============================================================
+# TEAM TOTALS FOR THE FINAL DASHBOARD
+# ============================================================
+
+def stream_team_ball_totals(chunksize=DEFAULT_CHUNKSIZE, chunks=None, filters=None):
+    columns = ["team_batting", "team_bowling", "total_runs", "is_wicket"]
+    chunks = chunks if chunks is not None else iter_delivery_chunks(columns, chunksize, filters)
+
+    # counts and sums only: per-team distinct sets would grow with the input
+    batting = PartialAggregate("team_batting", ["total_runs"])
+    bowling = PartialAggregate("team_bowling", ["is_wicket"])
+
+    for chunk in chunks:
+        batting.update(chunk)
+        bowling.update(chunk)
+
+    return batting, bowling
+
+
+# ------------------------------------------------------------
+# Quick preview when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import sys
+
+    chunksize = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CHUNKSIZE
+    batting, bowling = stream_team_ball_totals(chunksize)
+
+    print("\nBatting teams:")
+    print(batting.result().sort_values("total_runs", ascending=False).head(10))
+
+    print("\nBowling teams:")
+    print(bowling.result().sort_values("is_wicket", ascending=False).head(10))
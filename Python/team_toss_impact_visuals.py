@@ -5,14 +5,17 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sqlalchemy import text
-from database_connection import engine
+
+import local_backend
+from instrumentation import traced
+from ipl_schema import plain_labels
+from local_backend import BACKEND
+from query_executor import fetch_all
+from query_filters import describe, filter_queries, parse_filters
 
 sns.set_style("whitegrid")
 plt.rcParams["figure.figsize"] = (10,5)
 
-print("Connection Successful")
-print("Loading team & toss impact data from SQL Server...")
-
 
 # --------------------------------------------------
 # 1. Toss decision distribution
@@ -22,45 +25,43 @@ SELECT toss_decision, COUNT(*) AS total
 FROM dbo.ipl_matches_data
 GROUP BY toss_decision
 """)
-
-toss_decision = pd.read_sql(toss_decision_query, engine)
-
-plt.figure()
-sns.barplot(x="toss_decision", y="total", data=toss_decision)
-plt.title("Toss Decision Distribution")
-plt.xlabel("Decision")
-plt.ylabel("Matches")
-plt.tight_layout()
-plt.show()
+
+@traced(category="plot")
+def plot_toss_decision(toss_decision):
+    plt.figure()
+    sns.barplot(x="toss_decision", y="total", data=toss_decision)
+    plt.title("Toss Decision Distribution")
+    plt.xlabel("Decision")
+    plt.ylabel("Matches")
+    plt.tight_layout()
 
 
 # --------------------------------------------------
 # 2. Toss winner vs match winner
 # --------------------------------------------------
 toss_win_query = text("""
-SELECT 
-CASE 
+SELECT
+CASE
     WHEN toss_winner = match_winner THEN 'Won Match'
     ELSE 'Lost Match'
 END AS result,
 COUNT(*) AS total
 FROM dbo.ipl_matches_data
-GROUP BY 
-CASE 
+GROUP BY
+CASE
     WHEN toss_winner = match_winner THEN 'Won Match'
     ELSE 'Lost Match'
 END
 """)
-
-toss_win = pd.read_sql(toss_win_query, engine)
-
-plt.figure()
-sns.barplot(x="result", y="total", data=toss_win)
-plt.title("Did Toss Winner Win the Match?")
-plt.xlabel("Result")
-plt.ylabel("Matches")
-plt.tight_layout()
-plt.show()
+
+@traced(category="plot")
+def plot_toss_win(toss_win):
+    plt.figure()
+    sns.barplot(x="result", y="total", data=toss_win)
+    plt.title("Did Toss Winner Win the Match?")
+    plt.xlabel("Result")
+    plt.ylabel("Matches")
+    plt.tight_layout()
 
 
 # --------------------------------------------------
@@ -72,16 +73,75 @@ FROM dbo.ipl_matches_data
 GROUP BY match_winner
 ORDER BY wins DESC
 """)
+
+@traced(category="plot")
+def plot_team_wins(team_wins):
+    plt.figure()
+    sns.barplot(x="wins", y="team", data=team_wins)
+    plt.title("Top Winning Teams")
+    plt.xlabel("Wins")
+    plt.ylabel("Team")
+    plt.tight_layout()
+
+
+# --------------------------------------------------
+# Load all three results (fetched concurrently)
+# --------------------------------------------------
+QUERIES = {
+    "toss_decision": toss_decision_query,
+    "toss_win": toss_win_query,
+    "team_wins": team_wins_query,
+}
+
+
+# same results from the local CSV files (IPL_BACKEND=csv)
+def load_local_data(**filters):
+    return chart_data(local_backend.matches(**filters))
+
+
+# chart tables from typed matches (also used by dashboard_server.py)
+def chart_data(matches):
+    toss_won = matches["toss_winner"] == matches["match_winner"]
+
+    data = {
+        "toss_decision": matches["toss_decision"].value_counts(dropna=False)
+            .reset_index(name="total"),
+        "toss_win": toss_won.map({True: "Won Match", False: "Lost Match"}).value_counts()
+            .rename_axis("result").reset_index(name="total"),
+        "team_wins": matches["match_winner"].value_counts().head(10)
+            .rename_axis("team").reset_index(name="wins"),
+    }
+    return {name: plain_labels(df) for name, df in data.items()}
+
+
+# filters: season, team, venue (see query_filters.py)
+def load_data(**filters):
+    if BACKEND == "csv":
+        print(f"Loading team & toss impact data from local CSV files ({describe(filters)})...")
+        return load_local_data(**filters)
+
+    print(f"Loading team & toss impact data from SQL Server ({describe(filters)})...")
+    queries, params = filter_queries(QUERIES, filters)
+    return fetch_all(queries, params=params)
+
+
+# (chart name, plot function, data key)
+CHARTS = [
+    ("toss_decision", plot_toss_decision, "toss_decision"),
+    ("toss_winner_result", plot_toss_win, "toss_win"),
+    ("top_winning_teams", plot_team_wins, "team_wins"),
+]
+
+
+def main(**filters):
+    data = load_data(**filters)
 
-team_wins = pd.read_sql(team_wins_query, engine)
+    for _, plot, key in CHARTS:
+        plot(data[key])
+        plt.show()
 
-plt.figure()
-sns.barplot(x="wins", y="team", data=team_wins)
-plt.title("Top Winning Teams")
-plt.xlabel("Wins")
-plt.ylabel("Team")
-plt.tight_layout()
-plt.show()
+    print("Team & Toss impact visualizations generated successfully.")
 
 
-print("Team & Toss impact visualizations generated successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main(**parse_filters("Team & toss impact charts"))
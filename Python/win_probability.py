@@ -0,0 +1,274 @@
+
+# ============================================================
+# IPL Performance Analysis
+# Second Innings Win Probability
+#
+# This script derives the game state before every second
+# innings delivery of ball_by_ball_data
+#   target          - first innings total + 1
+#   runs_needed     - target minus runs scored so far
+#   balls_left      - legal balls left in the innings
+#   wickets_in_hand - 10 minus wickets fallen so far
+# with cumulative sums over the deliveries sorted by match,
+# innings and ball (no per-match loop), and fits a logistic
+# regression (numpy only, Newton / IRLS steps) that gives the
+# chasing team's chance of winning from that state.
+#
+# The model is trained on earlier seasons and evaluated on the
+# last ones, then whole seasons are scored in one batch.
+# Training and scoring throughput are reported in deliveries
+# per second.
+#
+# Target revisions (DLS) are not in the data, so the target is
+# always the first innings total + 1; no result matches and
+# super overs are left out.
+#
+# Usage:
+#   python win_probability.py --test-seasons 2024 2025
+# ============================================================
+
+import time
+
+import numpy as np
+import pandas as pd
+
+import local_backend
+from delivery_index import SORT_COLUMNS
+from local_backend import BACKEND
+
+
+# ----- Model Details -----
+DELIVERY_COLUMNS = SORT_COLUMNS + [
+    "season_id", "team_batting", "total_runs", "is_wicket", "is_wide_ball", "is_no_ball", "is_super_over",
+]
+MATCH_COLUMNS = ["match_id", "match_winner", "result", "overs", "balls_per_over"]
+
+STATE_COLUMNS = ["target", "runs_needed", "balls_left", "wickets_in_hand"]
+FEATURE_NAMES = STATE_COLUMNS[1:] + ["required_rate", "runs_per_wicket", "target"]
+
+MAX_ITERATIONS = 25
+TOLERANCE = 1e-8
+RIDGE = 1e-4  # keeps the Newton step defined for separable data
+MAX_REQUIRED_RATE = 36.0  # runs per over, caps the last-ball spike
+
+
+# ============================================================
+# GAME STATE (vectorized)
+# ============================================================
+
+def _running_before(values, starts):
+    # sum of the earlier rows of the same innings
+    total = np.cumsum(values, dtype="int64")
+    before = total - values
+    return before - before[starts]
+
+
+def game_states(balls, matches):
+    balls = balls[~balls["is_super_over"].to_numpy() & balls["innings"].isin([1, 2]).to_numpy()]
+    order = np.lexsort([balls[column].to_numpy() for column in reversed(SORT_COLUMNS)])
+    balls = balls.iloc[order].reset_index(drop=True)
+
+    match_ids = balls["match_id"].to_numpy()
+    innings = balls["innings"].to_numpy()
+    runs = balls["total_runs"].to_numpy().astype("int64")
+    legal = (~balls["is_wide_ball"].to_numpy() & ~balls["is_no_ball"].to_numpy()).astype("int64")
+    wickets = balls["is_wicket"].to_numpy().astype("int64")
+
+    # first innings totals, looked up by match
+    match_codes, codes_index = pd.factorize(match_ids)
+    first_totals = np.bincount(match_codes, weights=runs * (innings == 1), minlength=len(codes_index))
+    has_first = np.bincount(match_codes, weights=innings == 1, minlength=len(codes_index)) > 0
+
+    # row index of the first delivery of each innings, for every row
+    changed = np.ones(len(balls), dtype=bool)
+    changed[1:] = (match_ids[1:] != match_ids[:-1]) | (innings[1:] != innings[:-1])
+    starts = np.maximum.accumulate(np.where(changed, np.arange(len(balls)), 0))
+
+    played = matches.drop_duplicates("match_id").set_index("match_id")
+    played = played[played["result"].astype(object) != "no result"]
+    # overs / balls_per_over are int8 in the schema: widen before multiplying
+    scheduled = played["overs"].astype("Int64") * played["balls_per_over"].astype("Int64")
+    scheduled = scheduled.reindex(codes_index).to_numpy(dtype=float, na_value=np.nan)
+    winner = played["match_winner"].astype(object).reindex(codes_index).to_numpy()
+
+    chase = (innings == 2) & has_first[match_codes] & ~np.isnan(scheduled[match_codes])
+    rows = np.flatnonzero(chase)
+
+    target = first_totals[match_codes[rows]].astype("int64") + 1
+    states = pd.DataFrame({
+        "match_id": match_ids[rows],
+        "season_id": balls["season_id"].to_numpy()[rows],
+        "team_batting": balls["team_batting"].astype(object).to_numpy()[rows],
+        "over_number": balls["over_number"].to_numpy()[rows],
+        "ball_number": balls["ball_number"].to_numpy()[rows],
+        "target": target,
+        "runs_needed": target - _running_before(runs, starts)[rows],
+        "balls_left": scheduled[match_codes[rows]].astype("int64") - _running_before(legal, starts)[rows],
+        "wickets_in_hand": 10 - _running_before(wickets, starts)[rows],
+    })
+    states["chasing_team_won"] = states["team_batting"].to_numpy() == winner[match_codes[rows]]
+    return states
+
+
+# ------------------------------------------------------------
+# Model inputs from the game state
+# ------------------------------------------------------------
+def features(states):
+    runs_needed = states["runs_needed"].to_numpy(dtype=float)
+    balls_left = np.maximum(states["balls_left"].to_numpy(dtype=float), 0)
+    wickets = states["wickets_in_hand"].to_numpy(dtype=float)
+    required_rate = np.minimum(runs_needed * 6.0 / np.maximum(balls_left, 1), MAX_REQUIRED_RATE)
+
+    # same order as FEATURE_NAMES
+    return np.column_stack([
+        runs_needed,
+        balls_left,
+        wickets,
+        required_rate,
+        runs_needed / (wickets + 1),
+        states["target"].to_numpy(dtype=float),
+    ])
+
+
+# ============================================================
+# LOGISTIC REGRESSION (numpy, CPU)
+# ============================================================
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+class WinProbabilityModel:
+    def __init__(self):
+        self.mean = None
+        self.scale = None
+        self.weights = None
+        self.iterations = 0
+
+    def _design(self, states):
+        x = (features(states) - self.mean) / self.scale
+        return np.column_stack([np.ones(len(x)), x])
+
+    def fit(self, states):
+        if len(states) == 0:
+            raise ValueError("No second innings states to train on; check the data and --test-seasons")
+        x = features(states)
+        self.mean = x.mean(axis=0)
+        self.scale = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+        x = self._design(states)
+        y = states["chasing_team_won"].to_numpy(dtype=float)
+
+        weights = np.zeros(x.shape[1])
+        ridge = RIDGE * len(x) * np.eye(x.shape[1])
+        ridge[0, 0] = 0  # no penalty on the intercept
+        for self.iterations in range(1, MAX_ITERATIONS + 1):
+            p = _sigmoid(x @ weights)
+            gradient = x.T @ (p - y) + ridge @ weights
+            hessian = (x * (p * (1 - p))[:, None]).T @ x + ridge
+            step = np.linalg.solve(hessian, gradient)
+            weights -= step
+            if np.abs(step).max() < TOLERANCE:
+                break
+
+        self.weights = weights
+        return self
+
+    def predict(self, states):
+        probability = _sigmoid(self._design(states) @ self.weights)
+
+        # decided states: target reached / no balls or wickets left
+        probability = np.where(states["runs_needed"].to_numpy() <= 0, 1.0, probability)
+        finished = (states["balls_left"].to_numpy() <= 0) | (states["wickets_in_hand"].to_numpy() <= 0)
+        return np.where(finished & (states["runs_needed"].to_numpy() > 0), 0.0, probability)
+
+    def coefficients(self):
+        return pd.Series(self.weights, index=["intercept"] + FEATURE_NAMES).round(4)
+
+
+def evaluate(model, states):
+    y = states["chasing_team_won"].to_numpy(dtype=float)
+    p = np.clip(model.predict(states), 1e-15, 1 - 1e-15)
+    return {
+        "deliveries": len(states),
+        "log_loss": round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4),
+        "brier": round(float(np.mean((p - y) ** 2)), 4),
+        "accuracy": round(float(np.mean((p >= 0.5) == (y == 1))), 4),
+    }
+
+
+# ------------------------------------------------------------
+# Score whole seasons in one batch
+# ------------------------------------------------------------
+def score_seasons(model, states, seasons=None):
+    if seasons is not None:
+        states = states[states["season_id"].isin(seasons)]
+    return states.assign(win_probability=np.round(model.predict(states), 4))
+
+
+# ------------------------------------------------------------
+# Game states from the active backend
+# ------------------------------------------------------------
+def load_game_states(**filters):
+    if BACKEND == "csv":
+        balls = local_backend.deliveries(**filters)[DELIVERY_COLUMNS]
+        matches = local_backend.matches(**filters)[MATCH_COLUMNS]
+    else:
+        from ipl_schema import (
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES, MATCH_SCHEMA, MATCH_SHARED_CATEGORIES, apply_schema,
+        )
+        from load_sql_results import load_table_columns
+
+        balls = apply_schema(
+            load_table_columns("ball_by_ball_data", DELIVERY_COLUMNS, filters),
+            DELIVERY_SCHEMA, DELIVERY_SHARED_CATEGORIES,
+        )
+        matches = apply_schema(
+            load_table_columns("ipl_matches_data", MATCH_COLUMNS, filters),
+            MATCH_SCHEMA, MATCH_SHARED_CATEGORIES,
+        )
+    return game_states(balls, matches)
+
+
+def _rate(count, seconds):
+    return f"{count / seconds:,.0f} deliveries/s" if seconds > 0 else "n/a"
+
+
+# ------------------------------------------------------------
+# Train, evaluate and score when file executed directly
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Second innings win probability.")
+    parser.add_argument("--test-seasons", type=int, nargs="+", help="held out seasons (default: the last one)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    states = load_game_states()
+    seconds = time.perf_counter() - start
+    print(f"{len(states)} second innings states from {states['match_id'].nunique()} matches "
+          f"in {seconds:.3f} s ({_rate(len(states), seconds)})")
+
+    test_seasons = args.test_seasons or [int(states["season_id"].max())]
+    test = states["season_id"].isin(test_seasons).to_numpy()
+    train_states, test_states = states[~test], states[test]
+
+    start = time.perf_counter()
+    model = WinProbabilityModel().fit(train_states)
+    seconds = time.perf_counter() - start
+    print(f"\nTrained on {len(train_states)} deliveries in {seconds:.3f} s, {model.iterations} iterations "
+          f"({_rate(len(train_states), seconds)})")
+    print(model.coefficients().to_string())
+
+    print(f"\nTrain: {evaluate(model, train_states)}")
+    print(f"Test (seasons {test_seasons}): {evaluate(model, test_states)}")
+
+    start = time.perf_counter()
+    scored = score_seasons(model, states)
+    seconds = time.perf_counter() - start
+    print(f"\nScored {len(scored)} deliveries in {seconds * 1000:.3f} ms ({_rate(len(scored), seconds)})")
+
+    match_id = scored["match_id"].iloc[-1]
+    print(f"\nWin probability by over, match {match_id}:")
+    match = scored[scored["match_id"] == match_id].groupby("over_number").tail(1)
+    print(match[["over_number", "team_batting"] + STATE_COLUMNS + ["win_probability"]].to_string(index=False))
@@ -2,6 +2,8 @@
 IPL PERFORMANCE ANALYSIS
 FILE: 01_database_check.sql
 PURPOSE: Validate imported IPL datasets before analysis
+NOTE: Python/data_validation.py runs these checks on the CSV
+      files before they are loaded (sql_loader.py)
 ============================================================ */
 
 -- 1. Preview all tables
@@ -22,7 +22,7 @@ SELECT
 p.bat_style,
 SUM(TRY_CAST(b.batter_runs AS INT)) AS total_runs
 FROM dbo.ball_by_ball_data b
-JOIN dbo.[players_data_updated] p ON b.batter = p.player_name
+JOIN dbo.[players_data_updated] p ON b.batter_id = p.player_id
 GROUP BY p.bat_style
 ORDER BY total_runs DESC;
 
@@ -36,7 +36,7 @@ p.bat_style,
 SUM(TRY_CAST(b.batter_runs AS INT)) AS total_runs,
 COUNT(*) AS balls_faced
 FROM dbo.ball_by_ball_data b
-JOIN dbo.[players_data_updated] p ON b.batter = p.player_name
+JOIN dbo.[players_data_updated] p ON b.batter_id = p.player_id
 WHERE b.is_wide_ball = 0
 GROUP BY b.batter, p.bat_style
 )
@@ -7,6 +7,7 @@ Simple queries only (same style as before)
 
 ----------------------------------------------------------
 -- 1) DOES TOSS HELP WIN MATCH?
+-- (same labels as toss_result() in Python/match_features.py)
 ----------------------------------------------------------
 SELECT
     CASE 
@@ -24,6 +25,7 @@ GROUP BY CASE
 
 ----------------------------------------------------------
 -- 2) CHASING vs DEFENDING SUCCESS
+-- (same labels as match_result() in Python/match_features.py)
 ----------------------------------------------------------
 SELECT
 CASE
@@ -60,6 +62,7 @@ ORDER BY avg_runs_scored DESC;
 
 ----------------------------------------------------------
 -- 4) DEATH OVER BOWLING ECONOMY (16-20 overs)
+-- (Python/phase_cube.py precomputes every phase slice)
 ----------------------------------------------------------
 SELECT TOP 15
     bowler,